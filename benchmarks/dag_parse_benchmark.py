@@ -0,0 +1,102 @@
+"""
+Champions League Match Tracker - DAG Parse Benchmark
+
+Measures how long Airflow takes to parse the dags/ folder, the way the
+scheduler's DAG processor does: each sample is a fresh interpreter that
+imports Airflow and then times one DagBag load. Also reports which heavy
+libraries the DAG files pulled in at parse time; ideally none of them,
+since they belong inside the task callables.
+
+Requires apache-airflow (the MWAA version) in the running interpreter.
+
+Usage (from the repository root):
+    python -m benchmarks.dag_parse_benchmark --runs 10
+    python -m benchmarks.dag_parse_benchmark --runs 20 --output parse.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DAG_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dags')
+
+# Should only be imported by task callables, never while parsing
+HEAVY_MODULES = ['boto3', 'botocore', 'requests', 'pandas', 'duckdb',
+                 'airflow.providers.amazon.aws.operators.athena', 'airflow.operators.bash']
+
+# Runs in the child interpreter; Airflow's own import cost is excluded from the timing
+PARSE_SNIPPET = """
+import json, sys, time
+from airflow.models.dagbag import DagBag
+before = set(sys.modules)
+started = time.perf_counter()
+dagbag = DagBag(dag_folder=sys.argv[1], include_examples=False)
+elapsed = time.perf_counter() - started
+heavy = [name for name in json.loads(sys.argv[2]) if name in sys.modules and name not in before]
+print(json.dumps({
+    'seconds': elapsed,
+    'dags': sorted(dagbag.dag_ids),
+    'tasks': sum(len(dag.tasks) for dag in dagbag.dags.values()),
+    'import_errors': {path: str(error) for path, error in dagbag.import_errors.items()},
+    'heavy_modules': heavy,
+}))
+"""
+
+def parse_once(dag_folder):
+    result = subprocess.run(
+        [sys.executable, '-c', PARSE_SNIPPET, dag_folder, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, check=True
+    )
+    # Airflow may log to stdout; the sample is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(args):
+    samples = [parse_once(args.dag_folder) for _ in range(args.runs)]
+    seconds = sorted(sample['seconds'] for sample in samples)
+    p95_index = min(len(seconds) - 1, int(round(0.95 * (len(seconds) - 1))))
+    last = samples[-1]
+    return {
+        'dag_folder': args.dag_folder,
+        'runs': args.runs,
+        'median_seconds': round(statistics.median(seconds), 4),
+        'p95_seconds': round(seconds[p95_index], 4),
+        'min_seconds': round(seconds[0], 4),
+        'max_seconds': round(seconds[-1], 4),
+        'dags': last['dags'],
+        'tasks': last['tasks'],
+        'import_errors': last['import_errors'],
+        'heavy_modules': sorted({name for sample in samples for name in sample['heavy_modules']}),
+    }
+
+def print_report(report):
+    print(f"\n=== DAG parse benchmark: {report['dag_folder']} ({report['runs']} runs) ===")
+    print(f"median {report['median_seconds'] * 1000:.1f}ms  p95 {report['p95_seconds'] * 1000:.1f}ms  "
+          f"min {report['min_seconds'] * 1000:.1f}ms  max {report['max_seconds'] * 1000:.1f}ms")
+    print(f"DAGs: {', '.join(report['dags'])} ({report['tasks']} tasks)")
+    if report['heavy_modules']:
+        print(f"✗ Imported at parse time: {', '.join(report['heavy_modules'])}")
+    else:
+        print("✓ No heavy modules imported at parse time")
+    for path, error in report['import_errors'].items():
+        print(f"✗ Import error in {path}: {error}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Airflow parse time for the dags/ folder")
+    parser.add_argument('--runs', type=int, default=10, help="Fresh interpreters to sample")
+    parser.add_argument('--dag-folder', default=DAG_FOLDER)
+    parser.add_argument('--output', help="Also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+    return 1 if report['import_errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Champions League Match Tracker - Fake RapidAPI Server
+
+A local stand-in for uefa-champions-league1.p.rapidapi.com that serves
+deterministic synthetic payloads for any number of seasons and teams, in
+the same shapes the pipeline parses:
+
+    /team/list, /teams/list  {"teams": [...]}
+    /schedule                {"schedule": {"YYYYMMDD": [match, ...]}}
+    /standings               {"standings": [{"group": ..., "entries": [...]}]}
+    /team/roster             {"athletes": [...]}
+
+Every team plays MATCHES_PER_TEAM league-phase matches per season.
+
+Usage:
+    python -m benchmarks.fake_rapidapi --teams 36 --port 8765
+"""
+
+import argparse
+import json
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MATCHES_PER_TEAM = 8
+PLAYERS_PER_TEAM = 25
+VENUES = ['Estádio da Luz', 'Stade Louis-II', 'Gewiss Stadium', 'Allianz Arena', 'Anfield']
+
+def team_id(index):
+    return str(100 + index)
+
+def build_teams(year, teams):
+    return {"teams": [
+        {"id": team_id(i), "displayName": f"Team {i} FC", "abbreviation": f"T{i:02d}",
+         "logo": f"https://example.com/teamlogos/{team_id(i)}.png"}
+        for i in range(teams)
+    ]}
+
+def build_schedule(year, teams):
+    rng = random.Random(year)
+    kickoff = datetime(year - 1, 9, 17, 19, 0, tzinfo=timezone.utc)
+    schedule = {}
+    match_number = 0
+    # Pair each team with the next MATCHES_PER_TEAM / 2 teams, home and away
+    for offset in range(1, MATCHES_PER_TEAM // 2 + 1):
+        day = kickoff + timedelta(days=14 * offset)
+        matches = []
+        for home in range(teams):
+            away = (home + offset) % teams
+            if away == home:
+                continue
+            match_number += 1
+            matches.append({
+                "id": str(year * 10000 + match_number),
+                "date": (day + timedelta(hours=2 * (home % 2))).isoformat().replace('+00:00', 'Z'),
+                "completed": True,
+                "status": {"detail": "FT"},
+                "venue": {"fullName": VENUES[home % len(VENUES)]},
+                "competitors": [
+                    {"id": team_id(home), "isHome": True, "score": str(rng.randint(0, 4)),
+                     "team": {"displayName": f"Team {home} FC", "abbreviation": f"T{home:02d}"}},
+                    {"id": team_id(away), "isHome": False, "score": str(rng.randint(0, 3)),
+                     "team": {"displayName": f"Team {away} FC", "abbreviation": f"T{away:02d}"}},
+                ],
+            })
+        schedule[day.strftime('%Y%m%d')] = matches
+    return {"schedule": schedule}
+
+def build_standings(year, teams):
+    rng = random.Random(year * 7)
+    entries = [
+        {"team": {"id": team_id(i), "displayName": f"Team {i} FC", "abbreviation": f"T{i:02d}"},
+         "stats": {"points": rng.randint(0, 24), "gamesPlayed": MATCHES_PER_TEAM}}
+        for i in range(teams)
+    ]
+    entries.sort(key=lambda entry: -entry["stats"]["points"])
+    return {"standings": [{"group": "League Phase", "entries": entries}]}
+
+def build_roster(year, team):
+    return {"team": {"id": team}, "athletes": [
+        {"id": f"{team}{n:03d}", "displayName": f"Player {team}-{n}", "firstName": "Player",
+         "lastName": f"{team}-{n}", "jersey": str(n + 1), "age": 18 + n % 17,
+         "position": {"displayName": "Midfielder", "abbreviation": "M"}}
+        for n in range(PLAYERS_PER_TEAM)
+    ]}
+
+class FakeRapidAPIHandler(BaseHTTPRequestHandler):
+    teams = 36
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        year = int(params.get('year') or params.get('season') or 0)
+        endpoint = url.path.strip('/')
+
+        if endpoint in ('team/list', 'teams/list'):
+            payload = build_teams(year, self.teams)
+        elif endpoint == 'schedule':
+            payload = build_schedule(year, self.teams)
+        elif endpoint == 'standings':
+            payload = build_standings(year, self.teams)
+        elif endpoint == 'team/roster':
+            payload = build_roster(year, params.get('teamId'))
+        else:
+            self.send_error(404)
+            return
+
+        body = json.dumps(payload, indent=4).encode('utf-8')
+        self.server.request_count += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(teams, port=0):
+    """Start the server on a background thread. Returns (server, base_url)."""
+    handler = type('Handler', (FakeRapidAPIHandler,), {'teams': teams})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic RapidAPI payloads locally")
+    parser.add_argument('--teams', type=int, default=36)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    server, base_url = start_server(args.teams, args.port)
+    print(f"Serving {args.teams} teams per season at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
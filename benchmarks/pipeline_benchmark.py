@@ -0,0 +1,178 @@
+"""
+Champions League Match Tracker - End-to-End Pipeline Benchmark
+
+Runs the pipeline stages in-process against an in-memory S3 (moto) and the
+fake RapidAPI server, for a synthetic competition of N seasons x M teams:
+
+    ingest   scripts/ingest_data.main
+    extract  extract_real_matches.main
+    fix_json scripts/fix_json_format.main
+    tables   scripts/local_engine (all four CTAS files in DuckDB)
+
+Reports wall/CPU time, throughput and peak RSS per stage, so regressions
+show up before they reach MWAA and workers can be sized for more seasons
+or competitions.
+
+Requires moto (pip install moto) on top of requirements.txt.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline_benchmark --seasons 11 --teams 36
+    python -m benchmarks.pipeline_benchmark --seasons 30 --teams 64 --output bench.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_rapidapi import start_server
+
+BUCKET = 'ucl-lake-2025'
+REGION = 'ap-southeast-1'
+LAST_SEASON = 2025
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def raw_zone_stats(s3):
+    count = size = 0
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=BUCKET, Prefix='raw/'):
+        for obj in page.get('Contents', []):
+            count += 1
+            size += obj['Size']
+    return count, size
+
+def download_prefix(s3, prefix, target_dir):
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=BUCKET, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            local_path = os.path.join(target_dir, obj['Key'])
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            s3.download_file(BUCKET, obj['Key'], local_path)
+
+class StageTimer:
+    def __init__(self, verbose):
+        self.verbose = verbose
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        result = {'stage': name}
+        sink = contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+        wall, cpu = time.perf_counter(), time.process_time()
+        with sink:
+            yield result
+        result['seconds'] = round(time.perf_counter() - wall, 4)
+        result['cpu_seconds'] = round(time.process_time() - cpu, 4)
+        result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+        if result.get('items'):
+            result['items_per_second'] = round(result['items'] / max(result['seconds'], 1e-9), 1)
+        self.stages.append(result)
+
+def configure_environment(args, base_url):
+    """Point the pipeline at the local stand-ins; must run before its modules are imported"""
+    first_season = LAST_SEASON - args.seasons + 1
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'benchmark',
+        'AWS_SECRET_ACCESS_KEY': 'benchmark',
+        'AWS_DEFAULT_REGION': REGION,
+        'RAPIDAPI_KEY': 'benchmark',
+        'RAPIDAPI_BASE_URL': base_url,
+        'UCL_SEASON_RANGE': f"{first_season}-{LAST_SEASON}",
+        'UCL_ROSTER_MIN_YEAR': str(first_season if args.all_rosters else LAST_SEASON - 1),
+        'UCL_ROSTERS_PER_SEASON': str(args.rosters_per_season),
+        'UCL_COMPETITIONS': 'ucl',
+        'UCL_API_RATE_LIMIT': '0',
+    })
+
+def run(args):
+    from moto import mock_aws
+
+    server, base_url = start_server(args.teams)
+    configure_environment(args, base_url)
+
+    with mock_aws(), tempfile.TemporaryDirectory() as workdir:
+        import boto3
+        s3 = boto3.client('s3', region_name=REGION)
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={'LocationConstraint': REGION})
+
+        # Imported only now so their module-level clients and config see the mock
+        ingest_data = importlib.import_module('scripts.ingest_data')
+        extract_real_matches = importlib.import_module('extract_real_matches')
+        fix_json_format = importlib.import_module('scripts.fix_json_format')
+        local_engine = importlib.import_module('scripts.local_engine')
+
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        timer = StageTimer(args.verbose)
+        try:
+            with timer.stage('ingest') as stage:
+                ingest_data.main()
+                stage['api_requests'] = server.request_count
+                stage['items'], stage['bytes'] = raw_zone_stats(s3)
+
+            with timer.stage('extract') as stage:
+                extract_real_matches.main([])
+                with open('real_matches.csv', encoding='utf-8') as f:
+                    stage['items'] = sum(1 for _ in f) - 1
+                stage['bytes'] = os.path.getsize('real_matches.csv')
+
+            with timer.stage('fix_json') as stage:
+                fix_json_format.main(['--workers', str(args.workers)])
+                stage['items'], stage['bytes'] = raw_zone_stats(s3)
+
+            with timer.stage('tables') as stage:
+                download_prefix(s3, 'raw/', workdir)
+                con = local_engine.connect('real_matches.csv', os.path.join(workdir, 'raw'))
+                rows = 0
+                for name in local_engine.SQL_FILES:
+                    _, row_count, _ = local_engine.run_sql_file(con, os.path.join(local_engine.SQL_DIR, name))
+                    rows += row_count
+                stage['items'] = rows
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+
+    return {
+        'config': {'seasons': args.seasons, 'teams': args.teams, 'workers': args.workers,
+                   'rosters_per_season': args.rosters_per_season},
+        'total_seconds': round(sum(stage['seconds'] for stage in timer.stages), 4),
+        'stages': timer.stages,
+    }
+
+def print_report(report):
+    config = report['config']
+    print(f"\n=== Pipeline benchmark: {config['seasons']} seasons x {config['teams']} teams ===")
+    print(f"{'stage':<10} {'seconds':>9} {'cpu':>9} {'items':>9} {'items/s':>10} {'rss MB':>8}")
+    for stage in report['stages']:
+        print(f"{stage['stage']:<10} {stage['seconds']:>9.3f} {stage['cpu_seconds']:>9.3f} "
+              f"{stage.get('items', 0):>9} {stage.get('items_per_second', 0):>10.1f} {stage['peak_rss_mb']:>8.1f}")
+    print(f"{'total':<10} {report['total_seconds']:>9.3f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against local S3/API stand-ins")
+    parser.add_argument('--seasons', type=int, default=11, help="Number of seasons (ending 2025)")
+    parser.add_argument('--teams', type=int, default=36, help="Teams per season")
+    parser.add_argument('--rosters-per-season', type=int, default=5)
+    parser.add_argument('--all-rosters', action='store_true', help="Fetch rosters for every season")
+    parser.add_argument('--workers', type=int, default=8, help="fix_json_format workers")
+    parser.add_argument('--output', help="Also write the report as JSON to this path")
+    parser.add_argument('--verbose', action='store_true', help="Show pipeline output")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Champions League Match Tracker - Query Service Benchmark
+
+Measures request latency of scripts/query_service.py over HTTP on local
+data: a mix of /table, /fixtures and /results requests drawn from the
+loaded snapshot, sent over one keep-alive connection. Reports p50/p95/p99
+with the response cache disabled (every request hits the indexes) and with
+it warm.
+
+Build the tables first, e.g.:
+    python -m scripts.local_engine --raw-dir raw --output-dir local_tables
+
+Usage (from the repository root):
+    python -m benchmarks.query_service_benchmark --data-dir local_tables
+    python -m benchmarks.query_service_benchmark --data-dir local_tables --requests 20000 --output query.json
+"""
+
+import argparse
+import http.client
+import json
+import random
+import statistics
+import sys
+import time
+
+from scripts.query_service import QueryService, start_server
+
+def request_targets(store, count, seed=0):
+    """A reproducible mix of realistic requests against the loaded snapshot"""
+    rng = random.Random(seed)
+    seasons = sorted(store.standings)
+    teams = sorted(store.matches_by_team)
+    dates = sorted(date for date in store.matches_by_date if date)
+    targets = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4 and seasons:
+            competition, season = rng.choice(seasons)
+            targets.append(f"/table?season={season}&competition={competition}")
+        elif kind < 0.7 and teams:
+            endpoint = rng.choice(['fixtures', 'results'])
+            targets.append(f"/{endpoint}?team={rng.choice(teams)}&limit=10")
+        elif kind < 0.85 and dates:
+            targets.append(f"/results?date={rng.choice(dates)}")
+        else:
+            competition, season = rng.choice(seasons)
+            targets.append(f"/results?season={season}&competition={competition}&limit=20")
+    return targets
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def measure(base_url, targets):
+    host, port = base_url.rsplit('/', 1)[1].split(':')
+    connection = http.client.HTTPConnection(host, int(port))
+    samples = []
+    for target in targets:
+        started = time.perf_counter()
+        connection.request('GET', target)
+        response = connection.getresponse()
+        response.read()
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status not in (200, 404):
+            raise RuntimeError(f"{target} -> HTTP {response.status}")
+    connection.close()
+    samples.sort()
+    return {
+        'requests': len(samples),
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(percentile(samples, 0.95), 3),
+        'p99_ms': round(percentile(samples, 0.99), 3),
+        'max_ms': round(samples[-1], 3),
+    }
+
+def run(args):
+    started = time.perf_counter()
+    service = QueryService(args.data_dir, cache_size=0)
+    results = {'load_seconds': round(time.perf_counter() - started, 3)}
+    targets = request_targets(service.store, args.requests, args.seed)
+
+    server, base_url = start_server(service)
+    results['uncached'] = measure(base_url, targets)
+    server.shutdown()
+
+    # Same snapshot, cache large enough to hold every distinct request, warmed by one pass
+    service = QueryService(args.data_dir, cache_size=len(set(targets)))
+    server, base_url = start_server(service)
+    measure(base_url, targets)
+    results['cached'] = measure(base_url, targets)
+    server.shutdown()
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark query service latency on local tables")
+    parser.add_argument('--data-dir', default='local_tables', help="Local lake or local_engine output directory")
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"Snapshot loaded in {results['load_seconds']:.2f}s")
+    for label in ('uncached', 'cached'):
+        r = results[label]
+        print(f"{label:>9}: {r['requests']} requests, p50 {r['p50_ms']:.2f} ms, p95 {r['p95_ms']:.2f} ms, "
+              f"p99 {r['p99_ms']:.2f} ms, max {r['max_ms']:.2f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,9 @@
 Champions League Match Tracker - External Tables Setup
 
 This script creates the necessary external tables in Athena to read
-the real Champions League match data from S3 CSV files.
+the real match data of every competition from S3 CSV files. Each
+competition's CSV is a partition (processed/real_matches/competition=<code>/),
+resolved by partition projection over the codes in scripts/competitions.json.
 
 Run this script BEFORE running the Airflow pipeline to ensure
 the external tables exist.
@@ -14,6 +16,12 @@ Date: July 2025
 import boto3
 import time
 
+from scripts import competitions, instrumentation
+
+ATHENA_DATABASE = 'ucl_analytics_db'
+ATHENA_OUTPUT_S3 = 's3://ucl-lake-2025/athena-query-results/'
+MATCHES_LOCATION = 's3://ucl-lake-2025/processed/real_matches/'
+
 def run_athena_query(query, description):
     """Run Athena query and return success status"""
     client = boto3.client('athena', region_name='ap-southeast-1')
@@ -22,8 +30,8 @@ def run_athena_query(query, description):
     
     response = client.start_query_execution(
         QueryString=query,
-        QueryExecutionContext={'Database': 'ucl_analytics_db'},
-        ResultConfiguration={'OutputLocation': 's3://ucl-lake-2025/athena-query-results/'}
+        QueryExecutionContext={'Database': ATHENA_DATABASE},
+        ResultConfiguration={'OutputLocation': ATHENA_OUTPUT_S3}
     )
     
     query_execution_id = response['QueryExecutionId']
@@ -33,6 +41,9 @@ def run_athena_query(query, description):
         query_details = client.get_query_execution(QueryExecutionId=query_execution_id)
         status = query_details['QueryExecution']['Status']['State']
         
+        if status in ('SUCCEEDED', 'FAILED', 'CANCELLED'):
+            instrumentation.record_athena(query_details, label=description)
+        
         if status == 'SUCCEEDED':
             print(f"✓ {description} - SUCCESS")
             return True
@@ -49,47 +60,11 @@ def run_athena_query(query, description):
     print(f"✗ {description} - TIMEOUT")
     return False
 
-def main():
-    """Create external tables for real Champions League data"""
-    print("=== Champions League Match Tracker - External Tables Setup ===")
-    print("Creating external tables to read real match data from S3...")
-    
-    # External table for fact_matches
-    matches_query = """
-    CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.real_matches_csv (
-        match_id STRING,
-        match_datetime STRING,
-        match_date STRING,
-        completed STRING,
-        match_status STRING,
-        home_team_id STRING,
-        home_score STRING,
-        away_team_id STRING,
-        away_score STRING,
-        match_name STRING,
-        match_short_name STRING,
-        venue STRING,
-        season_year STRING
-    )
-    ROW FORMAT SERDE 'org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe'
-    WITH SERDEPROPERTIES (
-        'serialization.format' = ',',
-        'field.delim' = ',',
-        'escape.delim' = '\\\\'
-    )
-    STORED AS TEXTFILE
-    LOCATION 's3://ucl-lake-2025/processed/real_matches/'
-    TBLPROPERTIES (
-        'skip.header.line.count' = '1',
-        'projection.enabled' = 'false'
-    )
-    """
-    
-    success1 = run_athena_query(matches_query, "Create external table for matches")
-    
-    # External table for fact_standings (same structure, different name)
-    standings_query = """
-    CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.real_matches_for_standings (
+def matches_table_ddl(table):
+    """DDL for an external table over every competition's real_matches.csv"""
+    codes = ','.join(competitions.registry())
+    return f"""
+    CREATE EXTERNAL TABLE IF NOT EXISTS {ATHENA_DATABASE}.{table} (
         match_id STRING,
         match_datetime STRING,
         match_date STRING,
@@ -102,8 +77,15 @@ def main():
         match_name STRING,
         match_short_name STRING,
         venue STRING,
-        season_year STRING
+        season_year STRING,
+        home_team_name STRING,
+        home_team_abbrev STRING,
+        home_team_logo STRING,
+        away_team_name STRING,
+        away_team_abbrev STRING,
+        away_team_logo STRING
     )
+    PARTITIONED BY (competition STRING)
     ROW FORMAT SERDE 'org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe'
     WITH SERDEPROPERTIES (
         'serialization.format' = ',',
@@ -111,22 +93,35 @@ def main():
         'escape.delim' = '\\\\'
     )
     STORED AS TEXTFILE
-    LOCATION 's3://ucl-lake-2025/processed/real_matches/'
+    LOCATION '{MATCHES_LOCATION}'
     TBLPROPERTIES (
         'skip.header.line.count' = '1',
-        'projection.enabled' = 'false'
+        'projection.enabled' = 'true',
+        'projection.competition.type' = 'enum',
+        'projection.competition.values' = '{codes}',
+        'storage.location.template' = '{MATCHES_LOCATION}competition=${{competition}}/'
     )
     """
+
+def main():
+    """Create external tables for the real match data of every competition"""
+    print("=== Champions League Match Tracker - External Tables Setup ===")
+    print("Creating external tables to read real match data from S3...")
     
-    success2 = run_athena_query(standings_query, "Create external table for standings")
+    results = []
+    # External table for fact_matches, and the same structure for fact_standings
+    for table, description in (('real_matches_csv', 'matches'), ('real_matches_for_standings', 'standings')):
+        # Recreated so a table from before the competition partitioning picks up the new layout
+        run_athena_query(f"DROP TABLE IF EXISTS {ATHENA_DATABASE}.{table}", f"Drop old external table for {description}")
+        results.append(run_athena_query(matches_table_ddl(table), f"Create external table for {description}"))
     
-    if success1 and success2:
+    if all(results):
         print("\n✅ SUCCESS: All external tables created successfully!")
-        print("📊 Data: 1,797 real Champions League matches (2015-2025)")
+        print(f"📊 Competitions: {', '.join(competitions.registry())}")
         print("🚀 Ready: The Airflow pipeline can now be run with real data.")
         
         # Test the external table
-        test_query = "SELECT COUNT(*) FROM ucl_analytics_db.real_matches_csv"
+        test_query = f"SELECT competition, COUNT(*) FROM {ATHENA_DATABASE}.real_matches_csv GROUP BY competition"
         print(f"\n🔍 Testing external table...")
         if run_athena_query(test_query, "Verify match data count"):
             print("✅ External tables are working correctly!")
@@ -134,6 +129,8 @@ def main():
     else:
         print("\n❌ FAILED: Some external tables failed to create.")
         print("Please check the error messages above and try again.")
+    
+    instrumentation.flush("create_external_tables")
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
@@ -1,184 +1,366 @@
 # dags/ucl_master_pipeline.py
+#
+# The scheduler re-parses this file every few seconds, so it only imports
+# Airflow itself at module level. boto3 and friends are imported inside the
+# task callables, and the SQL and shell scripts are read from the DAGs bucket
+# when a task runs (see benchmarks/dag_parse_benchmark.py).
 from airflow.models.dag import DAG
-from airflow.operators.python import PythonOperator
-from airflow.providers.amazon.aws.operators.athena import AthenaOperator
-from airflow.operators.bash import BashOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 from airflow.models import Variable
 import pendulum
-import boto3
-import subprocess
-import tempfile
 import os
-import json
-from datetime import datetime
-import time
+from datetime import timedelta
+
+# Pipeline scripts (scripts/*.py and scripts/sql/*.sql) live next to the DAGs
+DAGS_BUCKET = 'championsleague-mwaa-dags-2025'
+
+# Shared pool sized to the RapidAPI quota, e.g.
+#   airflow pools set rapidapi_quota 2 "RapidAPI request quota"
+RAPIDAPI_POOL = 'rapidapi_quota'
+
+# Competitions to run (codes from scripts/competitions.json), e.g. UCL_COMPETITIONS=ucl,uel.
+# They are ingested side by side as mapped tasks, all drawing on RAPIDAPI_POOL.
+DEFAULT_COMPETITIONS = 'ucl'
+COMPETITIONS_KEY = 'scripts/competitions.json'
+ROSTER_MIN_YEAR = 2023
+INGEST_ENTITIES = ['teams', 'schedules', 'standings']
+
+# Everything run_script_from_s3 needs from the DAGs bucket
+PIPELINE_SCRIPTS = ('scripts/', 'extract_real_matches.py')
+PIPELINE_FILE_TYPES = ('.py', '.sql', '.json')
+
+# Configuration
+ATHENA_OUTPUT_S3 = "s3://ucl-lake-2025/athena-query-results/" 
+ATHENA_DATABASE = 'ucl_analytics_db'
+
+# Per-run metrics fragments merged by scripts/instrumentation.py into raw/run_metrics.json
+METRICS_FRAGMENT_KEY = 'raw/_metrics/{run_id}/{component}.json'
+
+# Rolling DataScannedInBytes history per SQL file, used by the scan budget guard
+SCAN_BASELINE_KEY = 'raw/_metrics/scan_baselines/{name}.json'
+SCAN_BASELINE_SAMPLES = 10
+SCAN_BASELINE_MIN_SAMPLES = 3
+# Consecutive over-budget runs after which the new scan size becomes the baseline
+SCAN_BASELINE_ACCEPT_AFTER = 3
+# Ignore growth below this size; small tables fluctuate a lot relative to their size
+SCAN_GUARD_MIN_BYTES = 10 * 1024 * 1024
+
+# Tables written by scripts/match_rollups.py (scripts/sql/rollups/create_rollup_<level>.sql)
+ROLLUP_LEVELS = ['season', 'season_team', 'season_team_home_away', 'venue']
+
+# Kickoff windows built by scripts/matchday_index.py
+MATCHDAY_INDEX_KEY = 'processed/matchday_index/matchday_index.json'
+
+def load_competitions():
+    """Active competitions from the registry in the DAGs bucket: {code: entry}"""
+    import json
+    import boto3
+
+    registry = json.loads(boto3.client('s3').get_object(Bucket=DAGS_BUCKET, Key=COMPETITIONS_KEY)['Body'].read())
+    codes = [code.strip() for code in Variable.get("UCL_COMPETITIONS", default_var=DEFAULT_COMPETITIONS).split(',')]
+    unknown = [code for code in codes if code not in registry]
+    if unknown:
+        raise Exception(f"Unknown competitions {unknown}; known: {sorted(registry)}")
+    return {code: registry[code] for code in codes if code}
 
 def test_api_connection():
-    """Test if the API connection works with correct credentials"""
+    """Test if the API connection works with correct credentials, for every active competition"""
     import requests
     from airflow.models import Variable
     
     api_key = Variable.get("RAPIDAPI_KEY")
-    headers = {
-        "X-RapidAPI-Key": api_key,
-        "X-RapidAPI-Host": "uefa-champions-league1.p.rapidapi.com"
-    }
-    
     print(f"Testing API with key: {api_key[:10]}...")
-    url = "https://uefa-champions-league1.p.rapidapi.com/team/list"
-    params = {"year": "2025"}
-    
-    response = requests.get(url, headers=headers, params=params)
     
-    if response.status_code == 200:
-        print("Success! API connection working")
-        return True
-    else:
-        raise Exception(f"API test failed with status {response.status_code}")
+    for code, competition in load_competitions().items():
+        host = competition['api_host']
+        if not host:
+            raise Exception(f"No api_host configured for {code} in {COMPETITIONS_KEY}")
+        headers = {
+            "X-RapidAPI-Key": api_key,
+            "X-RapidAPI-Host": host
+        }
+        url = f"https://{host}/team/list"
+        params = {"year": "2025"}
+        
+        response = requests.get(url, headers=headers, params=params)
+        
+        if response.status_code == 200:
+            print(f"Success! API connection working for {code}")
+        else:
+            raise Exception(f"API test for {code} failed with status {response.status_code}")
+    return True
+
+def _run_pipeline_command(command, context):
+    """Download the pipeline scripts from the DAGs bucket and run a command in their directory"""
+    import shutil
+    import subprocess
+    import tempfile
+    import boto3
 
-def run_ingest_script_multi_year(**context):
-    """Run ingestion script for multiple years"""
     s3 = boto3.client('s3')
-    
-    print("=== Creating Multi-Year Ingestion Script ===")
-    
-    script_content = '''
-import os
-import requests
-import boto3
-import json
-from datetime import datetime
-import time
+    workdir = tempfile.mkdtemp()
 
-# Configuration
-API_KEY = os.environ.get("RAPIDAPI_KEY")
-API_HOST = "uefa-champions-league1.p.rapidapi.com"
-S3_BUCKET_NAME = "ucl-lake-2025"
-HEADERS = {"X-RapidAPI-Key": API_KEY, "X-RapidAPI-Host": API_HOST}
-s3_client = boto3.client('s3')
-
-# Years to process
-START_YEAR = 2015
-END_YEAR = 2025
-
-def fetch_from_api(endpoint, params=None):
-    url = f"https://{API_HOST}/{endpoint}"
-    print(f"Fetching: {url} with params: {params}")
-    response = requests.get(url, headers=HEADERS, params=params)
-    if response.status_code == 200:
-        print(f"✓ Success: {endpoint}")
-        return response.json()
-    else:
-        print(f"✗ Failed {endpoint}: {response.status_code} - {response.text}")
-        return None
+    try:
+        # Fetch the whole scripts/ package so modules can import their siblings
+        paginator = s3.get_paginator('list_objects_v2')
+        for prefix in PIPELINE_SCRIPTS:
+            for page in paginator.paginate(Bucket=DAGS_BUCKET, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    if obj['Key'].endswith(PIPELINE_FILE_TYPES):
+                        local_path = os.path.join(workdir, obj['Key'])
+                        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                        s3.download_file(DAGS_BUCKET, obj['Key'], local_path)
+
+        env = os.environ.copy()
+        env['RAPIDAPI_KEY'] = Variable.get("RAPIDAPI_KEY")
+        env['UCL_COMPETITIONS'] = Variable.get("UCL_COMPETITIONS", default_var=DEFAULT_COMPETITIONS)
+        # Overrides every competition's own season range when set
+        season_range = Variable.get("UCL_SEASON_RANGE", default_var=None)
+        if season_range:
+            env['UCL_SEASON_RANGE'] = season_range
+        env['UCL_ROSTER_MIN_YEAR'] = str(Variable.get("UCL_ROSTER_MIN_YEAR", default_var=ROSTER_MIN_YEAR))
+        # UCL_PROFILE=1 writes cProfile/tracemalloc reports under raw/_profiles/ (scripts/profiling.py)
+        env['UCL_PROFILE'] = Variable.get("UCL_PROFILE", default_var="")
+        # Where diff_schedules publishes score/status events (scripts/match_events.py)
+        env['UCL_EVENT_SINKS'] = Variable.get("UCL_EVENT_SINKS", default_var="lake")
+        # Scripts that query Athena run in the same workgroup (and scan cutoff) as the SQL tasks
+        env['UCL_ATHENA_WORKGROUP'] = Variable.get("UCL_ATHENA_WORKGROUP", default_var="primary")
+        # Shared by every mapped ingestion unit so their manifest fragments line up
+        env['UCL_RUN_ID'] = context['run_id']
+
+        print(f"Running: {' '.join(command)}")
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=workdir)
+
+        print(f"Return code: {result.returncode}")
+        print(f"STDOUT:\n{result.stdout}")
+        if result.stderr:
+            print(f"STDERR:\n{result.stderr}")
+
+        if result.returncode != 0:
+            raise Exception(f"{' '.join(command)} failed with return code {result.returncode}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
 
-def upload_to_s3(data, s3_key):
+def run_script_from_s3(module, args=(), **context):
+    """Run one of the pipeline scripts as a module, e.g. scripts.ingest_data"""
+    _run_pipeline_command(['python3', '-m', module, *[str(arg) for arg in args]], context)
+
+def get_seasons(competition):
+    """Seasons to ingest for a registry entry; the UCL_SEASON_RANGE variable (e.g. '2015-2025') overrides it"""
+    value = Variable.get("UCL_SEASON_RANGE", default_var=None) or competition['season_range']
+    start, _, end = value.strip().partition('-')
+    return list(range(int(start), int(end or start) + 1))
+
+def list_ingestion_targets(**context):
+    """One mapped ingestion task per (competition, entity, season)"""
+    return [
+        {'module': 'scripts.ingest_data', 'args': ['--competition', code, '--entity', entity, '--season', year]}
+        for code, competition in load_competitions().items()
+        for year in get_seasons(competition)
+        for entity in INGEST_ENTITIES
+    ]
+
+def list_roster_targets(**context):
+    """One mapped roster task per competition and recent season"""
+    min_year = int(Variable.get("UCL_ROSTER_MIN_YEAR", default_var=ROSTER_MIN_YEAR))
+    return [
+        {'module': 'scripts.ingest_data', 'args': ['--competition', code, '--rosters', '--season', year]}
+        for code, competition in load_competitions().items()
+        for year in get_seasons(competition)
+        if year >= min_year
+    ]
+
+def load_matchday_index():
+    """Read the kickoff window index, or None if it has not been built yet"""
+    import json
+    import boto3
+
+    s3 = boto3.client('s3')
     try:
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=s3_key,
-            Body=json.dumps(data, indent=4)
-        )
-        print(f"✓ Uploaded: {s3_key}")
+        response = s3.get_object(Bucket='ucl-lake-2025', Key=MATCHDAY_INDEX_KEY)
+    except s3.exceptions.NoSuchKey:
+        print(f"No matchday index at {MATCHDAY_INDEX_KEY}")
+        return None
+    return json.loads(response['Body'].read())
+
+def check_matchday(data_interval_start=None, **context):
+    """In 'matchday' mode, only run the daily rebuild when matches were played"""
+    mode = Variable.get("UCL_SCHEDULE_MODE", default_var="daily")
+    if mode != 'matchday':
         return True
-    except Exception as e:
-        print(f"✗ Upload error: {e}")
-        return False
 
-# Main logic
-print(f"Starting multi-year ingestion for {START_YEAR}-{END_YEAR}...")
-all_team_ids = set()
+    index = load_matchday_index()
+    if index is None:
+        # No index yet: fall back to the full rebuild
+        return True
 
-for year in range(START_YEAR, END_YEAR + 1):
-    print(f"\\n=== Processing Year {year} ===")
-    
-    # Teams
-    teams_data = fetch_from_api("team/list", {"year": str(year)})
-    if teams_data:
-        upload_to_s3(teams_data, f"raw/teams/year={year}/teams_{year}.json")
-        
-        if isinstance(teams_data, list):
-            teams = teams_data
-        elif isinstance(teams_data, dict):
-            teams = teams_data.get('teams', []) or teams_data.get('data', [])
-        else:
-            teams = []
-        
-        for team in teams:
-            if isinstance(team, dict):
-                team_id = team.get('id') or team.get('teamId')
-                if team_id:
-                    all_team_ids.add((team_id, year))
-    
-    # Schedule
-    schedule = fetch_from_api("schedule", {"year": str(year)})
-    if schedule:
-        upload_to_s3(schedule, f"raw/schedules/year={year}/schedule_{year}.json")
-    
-    # Standings
-    standings = fetch_from_api("standings", {"year": str(year)})
-    if standings:
-        upload_to_s3(standings, f"raw/standings/year={year}/standings_{year}.json")
-    
-    time.sleep(1)
+    day = data_interval_start.date().isoformat()
+    played = day in index['matchdays']
+    print(f"{day} is {'a' if played else 'not a'} matchday")
+    return played
 
-# Fetch some team rosters (optional - limited to reduce API calls)
-print(f"\\n=== Fetching Team Rosters ===")
-recent_teams = [(tid, yr) for tid, yr in all_team_ids if yr >= 2024][:5]
+def check_schedule_refresh(**context):
+    """
+    In 'matchday' mode, return the current season and its competitions so their schedule
+    is refreshed ahead of the matchday gate. Without it the index would only ever hold the
+    fixtures known when it was built, and later draws (e.g. knockout ties) would never be fetched.
+    """
+    if Variable.get("UCL_SCHEDULE_MODE", default_var="daily") != 'matchday':
+        return None
 
-for team_id, year in recent_teams:
-    print(f"Fetching roster for team {team_id} ({year})")
-    roster = fetch_from_api("team/roster", {"teamId": str(team_id), "year": str(year)})
-    if roster:
-        upload_to_s3(roster, f"raw/team_rosters/year={year}/team_{team_id}_roster_{year}.json")
-    time.sleep(0.5)
+    by_season = {}
+    for code, competition in load_competitions().items():
+        by_season.setdefault(get_seasons(competition)[-1], []).append(code)
+    # Competitions whose range ends earlier have finished
+    season = max(by_season)
+    print(f"Refreshing the {season} schedule of {by_season[season]}")
+    return {'season_year': season, 'competitions': by_season[season]}
 
-print(f"\\nIngestion complete! Processed {END_YEAR - START_YEAR + 1} years")
-'''
-    
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-        f.write(script_content)
-        temp_file = f.name
-    
-    api_key = Variable.get("RAPIDAPI_KEY")
-    env = os.environ.copy()
-    env['RAPIDAPI_KEY'] = api_key
-    
-    result = subprocess.run(['python3', temp_file], capture_output=True, text=True, env=env)
-    
-    print(f"Return code: {result.returncode}")
-    print(f"STDOUT:\n{result.stdout}")
-    if result.stderr:
-        print(f"STDERR:\n{result.stderr}")
-    
-    if result.returncode != 0:
-        raise Exception(f"Script failed with return code {result.returncode}")
-    
-    os.unlink(temp_file)
-    return result.stdout
+def check_kickoff_window(**context):
+    """Return the open kickoff window (and its season and competitions) if matches are in progress"""
+    index = load_matchday_index()
+    if index is None:
+        return None
 
-def execute_sql_from_s3(sql_file_path, database, output_location, **context):
-    """Execute SQL from S3 file using boto3"""
-    print(f"Reading SQL file: {sql_file_path}")
-    
-    # Read SQL from S3
-    s3 = boto3.client('s3')
+    now = pendulum.now('UTC')
+    for window in index['windows']:
+        if window['pending_matches'] and pendulum.parse(window['start']) <= now <= pendulum.parse(window['end']):
+            print(f"In kickoff window {window['start']} - {window['end']} "
+                  f"({window['pending_matches']} pending matches, season {window['season_year']})")
+            # Indexes built before competitions were tracked only held UCL matches
+            window.setdefault('competitions', [DEFAULT_COMPETITIONS])
+            return window
+
+    print("No matches in progress, skipping")
+    return None
+
+def write_athena_metrics(label, query_execution, run_id):
+    """
+    Write a finished query's get_query_execution response as the run metrics fragment
+    athena_<label>, in the format of scripts/instrumentation.py (record_athena + flush).
+    """
+    import json
+    import re
+    from datetime import datetime
+    import boto3
+
+    execution = query_execution['QueryExecution']
+    statistics = execution.get('Statistics', {})
+    entry = {
+        'label': label,
+        'query_id': execution['QueryExecutionId'],
+        'state': execution['Status']['State'],
+        'engine_execution_ms': statistics.get('EngineExecutionTimeInMillis'),
+        'data_scanned_bytes': statistics.get('DataScannedInBytes'),
+        'queue_ms': statistics.get('QueryQueueTimeInMillis'),
+        'total_ms': statistics.get('TotalExecutionTimeInMillis'),
+    }
+    component = 'athena_' + os.path.splitext(os.path.basename(label))[0]
+    fragment = {
+        'run_id': run_id,
+        'component': component,
+        'recorded_at': datetime.now().isoformat(),
+        'counters': {},
+        'histograms': {},
+        'athena_queries': [entry],
+    }
     try:
-        response = s3.get_object(Bucket='championsleague-mwaa-dags-2025', Key=sql_file_path)
-        sql_query = response['Body'].read().decode('utf-8').strip()
-        print(f"Successfully read SQL file: {sql_file_path}")
-        print(f"SQL query length: {len(sql_query)} characters")
+        boto3.client('s3').put_object(
+            Bucket='ucl-lake-2025',
+            Key=METRICS_FRAGMENT_KEY.format(run_id=re.sub(r'[^A-Za-z0-9_.-]', '_', run_id), component=component),
+            Body=json.dumps(fragment, separators=(',', ':')),
+            ContentType='application/json'
+        )
     except Exception as e:
-        print(f"Error reading SQL file from S3: {e}")
-        raise
-    
-    # Execute using Athena
+        # Metrics must never fail the pipeline
+        print(f"Could not record Athena metrics for {entry['query_id']}: {e}")
+
+def check_scan_budget(sql_file_path, scanned_bytes):
+    """
+    Compare a query's DataScannedInBytes with the rolling median of previous runs.
+    Warns or raises (UCL_SCAN_GUARD_MODE = warn | fail) when it scans more than
+    UCL_SCAN_GUARD_RATIO times the baseline. Regressions are kept out of the baseline
+    until they are accepted: the baseline restarts from the over-budget samples once
+    SCAN_BASELINE_ACCEPT_AFTER runs in a row exceed it, or at once for SQL files
+    named in UCL_SCAN_BASELINE_RESET (comma-separated, e.g. "create_fact_matches").
+    """
+    import json
+    import boto3
+
+    if scanned_bytes is None:
+        return
+
+    mode = Variable.get("UCL_SCAN_GUARD_MODE", default_var="warn")
+    ratio = float(Variable.get("UCL_SCAN_GUARD_RATIO", default_var="3"))
+    reset = {item.strip() for item in Variable.get("UCL_SCAN_BASELINE_RESET", default_var="").split(',')}
+    name = os.path.splitext(os.path.basename(sql_file_path))[0]
+    key = SCAN_BASELINE_KEY.format(name=name)
+
+    s3 = boto3.client('s3')
+    try:
+        history = json.loads(s3.get_object(Bucket='ucl-lake-2025', Key=key)['Body'].read())
+    except s3.exceptions.NoSuchKey:
+        history = {}
+    # Older baselines are a bare list of samples
+    if isinstance(history, list):
+        history = {'samples': history}
+    samples, over_budget = history.get('samples', []), history.get('over_budget', [])
+
+    def save(samples, over_budget):
+        body = json.dumps({'samples': samples[-SCAN_BASELINE_SAMPLES:], 'over_budget': over_budget})
+        s3.put_object(Bucket='ucl-lake-2025', Key=key, Body=body, ContentType='application/json')
+
+    if len(samples) >= SCAN_BASELINE_MIN_SAMPLES:
+        baseline = sorted(samples)[len(samples) // 2]
+        print(f"Scan: {scanned_bytes} bytes (baseline {baseline} bytes over {len(samples)} runs)")
+        if scanned_bytes > SCAN_GUARD_MIN_BYTES and scanned_bytes > baseline * ratio:
+            over_budget = over_budget + [scanned_bytes]
+            if name in reset or len(over_budget) >= SCAN_BASELINE_ACCEPT_AFTER:
+                print(f"Scan: accepting {scanned_bytes} bytes as the new baseline for {name}")
+                save(over_budget, [])
+                return
+            save(samples, over_budget)
+            message = (f"{name} scanned {scanned_bytes} bytes, "
+                       f"{scanned_bytes / max(baseline, 1):.1f}x its baseline of {baseline} bytes "
+                       f"({len(over_budget)} of {SCAN_BASELINE_ACCEPT_AFTER} runs before it is accepted)")
+            if mode == 'fail':
+                raise Exception(f"Scan budget exceeded: {message}")
+            print(f"WARNING: Scan budget exceeded: {message}")
+            return
+
+    save(samples + [scanned_bytes], [])
+
+def configure_athena_workgroup(**context):
+    """Apply UCL_ATHENA_SCAN_CUTOFF_BYTES as the workgroup's BytesScannedCutoffPerQuery"""
+    import boto3
+
+    workgroup = Variable.get("UCL_ATHENA_WORKGROUP", default_var="primary")
+    cutoff = Variable.get("UCL_ATHENA_SCAN_CUTOFF_BYTES", default_var=None)
+    athena = boto3.client('athena', region_name='ap-southeast-1')
+
+    if not cutoff:
+        print(f"No scan cutoff configured for workgroup {workgroup}")
+        return
+
+    # Athena cancels any query in the workgroup that scans past the cutoff
+    athena.update_work_group(
+        WorkGroup=workgroup,
+        ConfigurationUpdates={'BytesScannedCutoffPerQuery': int(cutoff)}
+    )
+    print(f"Set BytesScannedCutoffPerQuery={cutoff} on workgroup {workgroup}")
+
+def run_athena_query(query, database, output_location, label, context):
+    """Run one Athena query, wait for it and record its statistics. Returns its query_id and bytes scanned."""
+    import time
+    import boto3
+
     athena = boto3.client('athena', region_name='ap-southeast-1')
     
     response = athena.start_query_execution(
-        QueryString=sql_query,
+        QueryString=query,
         QueryExecutionContext={'Database': database},
-        ResultConfiguration={'OutputLocation': output_location}
+        ResultConfiguration={'OutputLocation': output_location},
+        WorkGroup=Variable.get("UCL_ATHENA_WORKGROUP", default_var="primary")
     )
     
     query_id = response['QueryExecutionId']
@@ -198,15 +380,69 @@ def execute_sql_from_s3(sql_file_path, database, output_location, **context):
         time.sleep(2)
         attempt += 1
     
+    statistics = result['QueryExecution'].get('Statistics', {})
+    metrics = {'query_id': query_id, 'data_scanned_bytes': statistics.get('DataScannedInBytes')}
+    print(f"Athena: {statistics.get('EngineExecutionTimeInMillis')}ms engine, "
+          f"{metrics['data_scanned_bytes']} bytes scanned")
+    write_athena_metrics(label, result, context['run_id'])
+    
     if status != 'SUCCEEDED':
         error = result['QueryExecution']['Status'].get('StateChangeReason', 'Unknown error')
         raise Exception(f"Query failed: {error}")
     
     print(f"Query completed successfully")
-    return query_id
+    return metrics
 
-# Configuration
-ATHENA_OUTPUT_S3 = "s3://ucl-lake-2025/athena-query-results/" 
+def run_athena_statement(query, database, output_location, **context):
+    """Run a short inline Athena statement (DDL)"""
+    return run_athena_query(query, database, output_location, context['task'].task_id, context)['query_id']
+
+def execute_sql_from_s3(sql_file_path, database, output_location, **context):
+    """Execute SQL from S3 file using boto3"""
+    from string import Template
+    import boto3
+
+    print(f"Reading SQL file: {sql_file_path}")
+    
+    # Read SQL from S3
+    s3 = boto3.client('s3')
+    try:
+        response = s3.get_object(Bucket=DAGS_BUCKET, Key=sql_file_path)
+        sql_query = response['Body'].read().decode('utf-8').strip()
+        print(f"Successfully read SQL file: {sql_file_path}")
+        print(f"SQL query length: {len(sql_query)} characters")
+    except Exception as e:
+        print(f"Error reading SQL file from S3: {e}")
+        raise
+    
+    # ${season_range} and ${competitions} are filled in; Athena's own ${partition_0}-style
+    # placeholders are left alone
+    competitions = load_competitions()
+    seasons = [year for competition in competitions.values() for year in get_seasons(competition)]
+    sql_query = Template(sql_query).safe_substitute(season_range=f"{min(seasons)},{max(seasons)}",
+                                                    competitions=','.join(competitions))
+    
+    # Execute using Athena
+    metrics = run_athena_query(sql_query, database, output_location, sql_file_path, context)
+    check_scan_budget(sql_file_path, metrics['data_scanned_bytes'])
+    return metrics['query_id']
+
+def drop_table_and_data(table, **context):
+    """Drop an Athena table and delete its Parquet data under processed/"""
+    import boto3
+
+    print(f"Dropping {table} table and cleaning S3 data...")
+    run_athena_query(f"DROP TABLE IF EXISTS {ATHENA_DATABASE}.{table}", ATHENA_DATABASE,
+                     ATHENA_OUTPUT_S3, f"drop_{table}", context)
+
+    s3 = boto3.client('s3')
+    deleted = 0
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket='ucl-lake-2025', Prefix=f"processed/{table}/"):
+        objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+        if objects:
+            s3.delete_objects(Bucket='ucl-lake-2025', Delete={'Objects': objects})
+            deleted += len(objects)
+    print(f"Completed {table} cleanup ({deleted} objects deleted)")
 
 with DAG(
     dag_id='ucl_master_pipeline_v1', 
@@ -216,196 +452,293 @@ with DAG(
     tags=['champions-league'],
 ) as dag:
     
+    # In matchday mode, fetch the current season's schedule and rebuild the index every day,
+    # so fixtures scheduled after the last known matchday reach the gate and the live DAG
+    schedule_refresh = ShortCircuitOperator(
+        task_id='check_schedule_refresh',
+        python_callable=check_schedule_refresh,
+        # Only the refresh is skipped in daily mode; the gate still runs
+        ignore_downstream_trigger_rules=False
+    )
+
+    refresh_season = "{{ ti.xcom_pull(task_ids='check_schedule_refresh')['season_year'] }}"
+    refresh_competitions = "{{ ti.xcom_pull(task_ids='check_schedule_refresh')['competitions'] | join(',') }}"
+
+    refresh_schedule = PythonOperator(
+        task_id='refresh_current_schedule',
+        python_callable=run_script_from_s3,
+        pool=RAPIDAPI_POOL,
+        op_kwargs={'module': 'scripts.ingest_data',
+                   'args': ['--competition', refresh_competitions, '--entity', 'schedules', '--season', refresh_season]}
+    )
+
+    extract_current_season = PythonOperator(
+        task_id='extract_current_season',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'extract_real_matches',
+                   'args': ['--competition', refresh_competitions, '--seasons', refresh_season]}
+    )
+
+    refresh_index = PythonOperator(
+        task_id='refresh_matchday_index',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.matchday_index'}
+    )
+
+    # Skip the whole rebuild on non-matchdays when UCL_SCHEDULE_MODE=matchday.
+    # A failed refresh falls back to the index as it was.
+    matchday_gate = ShortCircuitOperator(
+        task_id='check_matchday',
+        python_callable=check_matchday,
+        trigger_rule='all_done'
+    )
+
     # Test API connection
     test_api = PythonOperator(
         task_id='test_api_connection',
         python_callable=test_api_connection
     )
     
-    # Ingest data from API
-    ingest_data = PythonOperator(
+    # Ingest data from API: one mapped task per (entity, season) so a failed
+    # piece retries on its own, all sharing the RapidAPI pool
+    list_targets = PythonOperator(
+        task_id='list_ingestion_targets',
+        python_callable=list_ingestion_targets
+    )
+
+    ingest_data = PythonOperator.partial(
         task_id='ingest_raw_data_to_s3',
-        python_callable=run_ingest_script_multi_year
+        python_callable=run_script_from_s3,
+        pool=RAPIDAPI_POOL,
+        retries=3,
+        retry_delay=timedelta(minutes=2)
+    ).expand(op_kwargs=list_targets.output)
+
+    # A failed unit does not block anything by itself: the run goes on to the summary, and
+    # verify_data_uploaded fails it only if a required entity is missing (REQUIRED_ENTITIES
+    # in scripts/verify_ingestion.py is the one place that decides which are required)
+    list_rosters = PythonOperator(
+        task_id='list_roster_targets',
+        python_callable=list_roster_targets,
+        trigger_rule='all_done'
+    )
+
+    ingest_rosters = PythonOperator.partial(
+        task_id='ingest_team_rosters',
+        python_callable=run_script_from_s3,
+        pool=RAPIDAPI_POOL,
+        retries=3,
+        retry_delay=timedelta(minutes=2)
+    ).expand(op_kwargs=list_rosters.output)
+
+    # Runs after failed units too, so the manifest records exactly which ones are missing
+    write_summary = PythonOperator(
+        task_id='write_ingestion_summary',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.ingest_data', 'args': ['--summary']},
+        trigger_rule='all_done'
     )
 
-    # Verify data was uploaded
-    verify_data = BashOperator(
+    # Verify data was uploaded: one manifest read plus a HEAD per expected object.
+    # This is the task that fails the run when required data is missing.
+    verify_data = PythonOperator(
         task_id='verify_data_uploaded',
-        bash_command="""
-        echo "=== Checking S3 for uploaded data ==="
-        FILE_COUNT=$(aws s3 ls s3://ucl-lake-2025/raw/ --recursive | wc -l)
-        echo "Found $FILE_COUNT files in raw folder"
-        
-        if [ $FILE_COUNT -eq 0 ]; then
-            echo "ERROR: No data found in S3. Ingestion failed!"
-            exit 1
-        fi
-        
-        echo -e "\nFiles by type:"
-        echo "Teams: $(aws s3 ls s3://ucl-lake-2025/raw/teams/ --recursive | wc -l)"
-        echo "Schedules: $(aws s3 ls s3://ucl-lake-2025/raw/schedules/ --recursive | wc -l)"
-        echo "Standings: $(aws s3 ls s3://ucl-lake-2025/raw/standings/ --recursive | wc -l)"
-        echo "Rosters: $(aws s3 ls s3://ucl-lake-2025/raw/team_rosters/ --recursive | wc -l)"
-        
-        echo -e "\nSample files:"
-        aws s3 ls s3://ucl-lake-2025/raw/ --recursive | head -10
-        """
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.verify_ingestion'}
+    )
+
+    # Emit inserted/updated/deleted matches against the previous schedule snapshot
+    diff_schedules = PythonOperator(
+        task_id='diff_schedules',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.diff_schedules'}
+    )
+
+    # Extract matches from the fresh schedules and rebuild the kickoff windows
+    extract_matches = PythonOperator(
+        task_id='extract_real_matches',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'extract_real_matches'}
+    )
+
+    # Vectorized checks of the extracted CSVs; a failure stops the run before any Athena query
+    validate_matches = PythonOperator(
+        task_id='validate_matches',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.validate_matches'}
+    )
+
+    build_matchday_index = PythonOperator(
+        task_id='build_matchday_index',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.matchday_index'}
+    )
+
+    # Head-to-head / team record index, refreshed from the new matches only
+    build_team_history = PythonOperator(
+        task_id='build_team_history',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.team_history'}
+    )
+
+    # Elo ratings, appended incrementally to processed/fact_team_ratings/
+    build_team_ratings = PythonOperator(
+        task_id='build_team_ratings',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.team_ratings'}
+    )
+
+    # SCD2 player/team history from the rosters that changed since the last run
+    build_player_history = PythonOperator(
+        task_id='build_player_history',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.player_history'}
+    )
+
+    # Rolling-form features per (team, match), appended to processed/match_features/
+    build_match_features = PythonOperator(
+        task_id='build_match_features',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.match_features'}
+    )
+
+    # Memory-mappable binary copy of real_matches.csv for notebooks and jobs
+    build_match_archive = PythonOperator(
+        task_id='build_match_archive',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.match_archive'}
+    )
+
+    # Season/team/venue aggregates for dashboards, rebuilt every run
+    build_rollups = PythonOperator(
+        task_id='build_rollups',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.match_rollups'}
+    )
+
+    create_rollup_tables = PythonOperator.partial(
+        task_id='create_rollup_tables',
+        python_callable=execute_sql_from_s3
+    ).expand(op_kwargs=[
+        {'sql_file_path': f'scripts/sql/rollups/create_rollup_{level}.sql',
+         'database': ATHENA_DATABASE, 'output_location': ATHENA_OUTPUT_S3}
+        for level in ROLLUP_LEVELS
+    ])
+
+    # Official group / league-phase tables from raw/standings, checked against the matches
+    parse_official_standings = PythonOperator(
+        task_id='parse_official_standings',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.official_standings'}
+    )
+
+    reconcile_standings = PythonOperator(
+        task_id='reconcile_standings',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.reconcile_standings'}
+    )
+
+    create_standings_tables = PythonOperator.partial(
+        task_id='create_standings_tables',
+        python_callable=execute_sql_from_s3
+    ).expand(op_kwargs=[
+        {'sql_file_path': f'scripts/sql/{name}.sql', 'database': ATHENA_DATABASE, 'output_location': ATHENA_OUTPUT_S3}
+        for name in ('create_fact_official_standings', 'create_standings_reconciliation')
+    ])
+
+    create_fact_team_ratings = PythonOperator(
+        task_id='create_fact_team_ratings',
+        python_callable=execute_sql_from_s3,
+        op_kwargs={
+            'sql_file_path': 'scripts/sql/create_fact_team_ratings.sql',
+            'database': ATHENA_DATABASE,
+            'output_location': ATHENA_OUTPUT_S3
+        }
+    )
+
+    create_dim_player_team_bridge = PythonOperator(
+        task_id='create_dim_player_team_bridge',
+        python_callable=execute_sql_from_s3,
+        op_kwargs={
+            'sql_file_path': 'scripts/sql/create_dim_player_team_bridge.sql',
+            'database': ATHENA_DATABASE,
+            'output_location': ATHENA_OUTPUT_S3
+        }
+    )
+
+    # Enforce the per-query scan cutoff on the workgroup, if one is configured
+    configure_workgroup = PythonOperator(
+        task_id='configure_athena_workgroup',
+        python_callable=configure_athena_workgroup
     )
 
     # Create database if not exists
-    create_database = AthenaOperator(
+    create_database = PythonOperator(
         task_id='create_database',
-        query="CREATE DATABASE IF NOT EXISTS ucl_analytics_db",
-        database='default',
-        output_location=ATHENA_OUTPUT_S3
+        python_callable=run_athena_statement,
+        op_kwargs={
+            'query': f"CREATE DATABASE IF NOT EXISTS {ATHENA_DATABASE}",
+            'database': 'default',
+            'output_location': ATHENA_OUTPUT_S3
+        }
     )
 
     # Drop and recreate raw table
-    drop_raw_table = AthenaOperator(
+    drop_raw_table = PythonOperator(
         task_id='drop_raw_table',
-        query="DROP TABLE IF EXISTS ucl_analytics_db.raw",
-        database='ucl_analytics_db',
-        output_location=ATHENA_OUTPUT_S3
+        python_callable=run_athena_statement,
+        op_kwargs={
+            'query': f"DROP TABLE IF EXISTS {ATHENA_DATABASE}.raw",
+            'database': ATHENA_DATABASE,
+            'output_location': ATHENA_OUTPUT_S3
+        }
     )
 
     # Create the raw table with partition projection
-    create_raw_table = AthenaOperator(
+    create_raw_table = PythonOperator(
         task_id='create_raw_table',
-        query="""
-        CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.raw (
-            col0 string
-        )
-        PARTITIONED BY (
-            partition_0 string,
-            year string
-        )
-        STORED AS INPUTFORMAT 'org.apache.hadoop.mapred.TextInputFormat'
-        OUTPUTFORMAT 'org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat'
-        LOCATION 's3://ucl-lake-2025/raw/'
-        TBLPROPERTIES (
-            'projection.enabled' = 'true',
-            'projection.partition_0.type' = 'enum',
-            'projection.partition_0.values' = 'teams,schedules,standings,team_rosters',
-            'projection.year.type' = 'integer',
-            'projection.year.range' = '2015,2025',
-            'projection.year.digits' = '4',
-            'storage.location.template' = 's3://ucl-lake-2025/raw/${partition_0}/year=${year}/'
-        )
-        """,
-        database='ucl_analytics_db',
-        output_location=ATHENA_OUTPUT_S3
+        python_callable=execute_sql_from_s3,
+        op_kwargs={
+            'sql_file_path': 'scripts/sql/create_raw_table.sql',
+            'database': ATHENA_DATABASE,
+            'output_location': ATHENA_OUTPUT_S3
+        }
     )
 
     # Test the raw table with diagnostic query
-    test_raw_table = AthenaOperator(
+    test_raw_table = PythonOperator(
         task_id='test_raw_table',
-        query="""
-        WITH data_summary AS (
-            SELECT 
-                partition_0,
-                year,
-                COUNT(*) as record_count,
-                AVG(LENGTH(col0)) as avg_json_length,
-                MIN(LENGTH(col0)) as min_json_length,
-                MAX(LENGTH(col0)) as max_json_length,
-                'summary' as query_type
-            FROM ucl_analytics_db.raw
-            WHERE year IN ('2024', '2025')
-            GROUP BY partition_0, year
-        ),
-        sample_data AS (
-            SELECT 
-                partition_0,
-                year,
-                1 as record_count,
-                LENGTH(col0) as avg_json_length,
-                LENGTH(col0) as min_json_length,
-                LENGTH(col0) as max_json_length,
-                'sample' as query_type
-            FROM ucl_analytics_db.raw
-            WHERE year IN ('2024', '2025')
-              AND col0 IS NOT NULL
-              AND LENGTH(col0) > 10
-            LIMIT 5
-        )
-        SELECT * FROM data_summary
-        UNION ALL
-        SELECT * FROM sample_data
-        ORDER BY query_type, partition_0, year
-        """,
-        database='ucl_analytics_db',
-        output_location=ATHENA_OUTPUT_S3
+        python_callable=execute_sql_from_s3,
+        op_kwargs={
+            'sql_file_path': 'scripts/sql/test_raw_table.sql',
+            'database': ATHENA_DATABASE,
+            'output_location': ATHENA_OUTPUT_S3
+        }
     )
 
     # Drop existing dimensional and fact tables
-    drop_dim_teams = BashOperator(
+    drop_dim_teams = PythonOperator(
         task_id='drop_dim_teams',
-        bash_command='''
-        echo "Dropping dim_teams table and cleaning S3 data..."
-        
-        # Drop table first
-        aws athena start-query-execution \
-            --query-string "DROP TABLE IF EXISTS ucl_analytics_db.dim_teams" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId'
-        
-        # Wait a moment for table drop
-        sleep 5
-        
-        # Clean S3 data
-        aws s3 rm s3://ucl-lake-2025/processed/dim_teams/ --recursive || true
-        echo "Completed dim_teams cleanup"
-        '''
+        python_callable=drop_table_and_data,
+        op_kwargs={'table': 'dim_teams'}
     )
 
-    drop_dim_players = BashOperator(
+    drop_dim_players = PythonOperator(
         task_id='drop_dim_players',
-        bash_command='''
-        echo "Dropping dim_players table and cleaning S3 data..."
-        aws athena start-query-execution \
-            --query-string "DROP TABLE IF EXISTS ucl_analytics_db.dim_players" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId'
-        sleep 5
-        aws s3 rm s3://ucl-lake-2025/processed/dim_players/ --recursive || true
-        echo "Completed dim_players cleanup"
-        '''
-    )
-
-    drop_fact_matches = BashOperator(
+        python_callable=drop_table_and_data,
+        op_kwargs={'table': 'dim_players'}
+    )
+
+    drop_fact_matches = PythonOperator(
         task_id='drop_fact_matches',
-        bash_command='''
-        echo "Dropping fact_matches table and cleaning S3 data..."
-        aws athena start-query-execution \
-            --query-string "DROP TABLE IF EXISTS ucl_analytics_db.fact_matches" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId'
-        sleep 5
-        aws s3 rm s3://ucl-lake-2025/processed/fact_matches/ --recursive || true
-        echo "Completed fact_matches cleanup"
-        '''
-    )
-
-    drop_fact_standings = BashOperator(
+        python_callable=drop_table_and_data,
+        op_kwargs={'table': 'fact_matches'}
+    )
+
+    drop_fact_standings = PythonOperator(
         task_id='drop_fact_standings',
-        bash_command='''
-        echo "Dropping fact_standings table and cleaning S3 data..."
-        aws athena start-query-execution \
-            --query-string "DROP TABLE IF EXISTS ucl_analytics_db.fact_standings" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId'
-        sleep 5
-        aws s3 rm s3://ucl-lake-2025/processed/fact_standings/ --recursive || true
-        echo "Completed fact_standings cleanup"
-        '''
+        python_callable=drop_table_and_data,
+        op_kwargs={'table': 'fact_standings'}
     )
 
     # Create dimensional and fact tables using SQL files from correct path
@@ -414,7 +747,7 @@ with DAG(
         python_callable=execute_sql_from_s3,
         op_kwargs={
             'sql_file_path': 'scripts/sql/create_dim_teams.sql',  # Updated path
-            'database': 'ucl_analytics_db',
+            'database': ATHENA_DATABASE,
             'output_location': ATHENA_OUTPUT_S3
         }
     )
@@ -424,7 +757,7 @@ with DAG(
         python_callable=execute_sql_from_s3,
         op_kwargs={
             'sql_file_path': 'scripts/sql/create_dim_players.sql',  # Updated path
-            'database': 'ucl_analytics_db',
+            'database': ATHENA_DATABASE,
             'output_location': ATHENA_OUTPUT_S3
         }
     )
@@ -434,7 +767,7 @@ with DAG(
         python_callable=execute_sql_from_s3,
         op_kwargs={
             'sql_file_path': 'scripts/sql/create_fact_matches.sql',  # Updated path
-            'database': 'ucl_analytics_db',
+            'database': ATHENA_DATABASE,
             'output_location': ATHENA_OUTPUT_S3
         }
     )
@@ -444,194 +777,55 @@ with DAG(
         python_callable=execute_sql_from_s3,
         op_kwargs={
             'sql_file_path': 'scripts/sql/create_fact_standings.sql',  # Updated path
-            'database': 'ucl_analytics_db',
+            'database': ATHENA_DATABASE,
             'output_location': ATHENA_OUTPUT_S3
         }
     )
 
-    # Verify transformed tables
-    verify_results = BashOperator(
+    # Verify transformed tables: one batched query -> processed/quality/verification_tables.json
+    verify_results = PythonOperator(
         task_id='verify_results',
-        bash_command="""
-        echo "=== Checking Transformed Tables ==="
-        
-        # Function to run athena query with better error handling
-        run_query() {
-            local query="$1"
-            local description="$2"
-            echo "Running: $description"
-            
-            local query_id=$(aws athena start-query-execution \
-                --query-string "$query" \
-                --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-                --query-execution-context Database=ucl_analytics_db \
-                --region ap-southeast-1 \
-                --output text --query 'QueryExecutionId')
-            
-            if [ -z "$query_id" ]; then
-                echo "Failed to start query"
-                return
-            fi
-            
-            # Wait for query to complete
-            sleep 10
-            
-            # Check query status first
-            local status=$(aws athena get-query-execution \
-                --query-execution-id "$query_id" \
-                --region ap-southeast-1 \
-                --output text --query 'QueryExecution.Status.State' 2>/dev/null)
-            
-            if [ "$status" = "SUCCEEDED" ]; then
-                # Get result
-                aws athena get-query-results \
-                    --query-execution-id "$query_id" \
-                    --region ap-southeast-1 \
-                    --output text --query 'ResultSet.Rows[1].Data[0].VarCharValue' 2>/dev/null || echo "0"
-            else
-                echo "Query failed with status: $status"
-                # Get error details
-                aws athena get-query-execution \
-                    --query-execution-id "$query_id" \
-                    --region ap-southeast-1 \
-                    --output text --query 'QueryExecution.Status.StateChangeReason' 2>/dev/null || echo "Unknown error"
-            fi
-        }
-        
-        # First, check if raw data was re-ingested properly
-        echo -e "\n=== Raw Data Check (After Re-ingestion) ==="
-        run_query "SELECT partition_0, year, COUNT(*) as count, AVG(LENGTH(col0)) as avg_len FROM ucl_analytics_db.raw WHERE year IN ('2024', '2025') GROUP BY partition_0, year ORDER BY partition_0, year" "Raw data counts"
-        
-        # Check JSON validity after re-ingestion
-        echo -e "\n=== JSON Validity Check ==="
-        run_query "SELECT partition_0, COUNT(*) as total, SUM(CASE WHEN try(json_parse(col0)) IS NOT NULL THEN 1 ELSE 0 END) as valid_json FROM ucl_analytics_db.raw WHERE year IN ('2024', '2025') GROUP BY partition_0" "JSON validity"
-        
-        # Test simple teams extraction
-        echo -e "\n=== Simple Teams Test ==="
-        run_query "SELECT COUNT(*) FROM ucl_analytics_db.raw WHERE partition_0 = 'teams' AND year = '2024' AND try(json_parse(col0)) IS NOT NULL AND json_extract(json_parse(col0), '$.teams') IS NOT NULL" "Teams with valid JSON and teams array"
-        
-        echo -e "\n=== Record Counts ==="
-        echo "Teams count: $(run_query 'SELECT COUNT(*) FROM dim_teams' 'Teams count')"
-        
-        # Check if other tables exist before querying them
-        echo "Checking if other tables exist..."
-        run_query "SHOW TABLES LIKE 'fact_matches'" "Check fact_matches table"
-        run_query "SHOW TABLES LIKE 'dim_players'" "Check dim_players table"  
-        run_query "SHOW TABLES LIKE 'fact_standings'" "Check fact_standings table"
-        
-        # Only query counts if tables exist
-        if aws athena start-query-execution --query-string "SELECT 1 FROM fact_matches LIMIT 1" --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ --query-execution-context Database=ucl_analytics_db --region ap-southeast-1 >/dev/null 2>&1; then
-            echo "Matches count: $(run_query 'SELECT COUNT(*) FROM fact_matches' 'Matches count')"
-        else
-            echo "Matches count: Table does not exist"
-        fi
-        
-        if aws athena start-query-execution --query-string "SELECT 1 FROM dim_players LIMIT 1" --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ --query-execution-context Database=ucl_analytics_db --region ap-southeast-1 >/dev/null 2>&1; then
-            echo "Players count: $(run_query 'SELECT COUNT(*) FROM dim_players' 'Players count')"
-        else
-            echo "Players count: Table does not exist"
-        fi
-        
-        if aws athena start-query-execution --query-string "SELECT 1 FROM fact_standings LIMIT 1" --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ --query-execution-context Database=ucl_analytics_db --region ap-southeast-1 >/dev/null 2>&1; then
-            echo "Standings count: $(run_query 'SELECT COUNT(*) FROM fact_standings' 'Standings count')"
-        else
-            echo "Standings count: Table does not exist"
-        fi
-        
-        # Check S3 processed data
-        echo -e "\n=== Processed data in S3 ==="
-        for folder in dim_teams fact_matches dim_players fact_standings; do
-            FILE_COUNT=$(aws s3 ls s3://ucl-lake-2025/processed/$folder/ --recursive 2>/dev/null | wc -l)
-            echo "$folder: $FILE_COUNT files"
-        done
-        
-        # Sample data from each table
-        echo -e "\n=== Sample Data ==="
-        echo -e "\nSample Teams:"
-        run_query "SELECT team_id, team_name, team_abbr, COALESCE(team_short_name, team_name) as short_name, season_year FROM dim_teams WHERE team_name IS NOT NULL LIMIT 5" "Teams sample"
-        
-        # Only show samples for tables that exist
-        if aws athena start-query-execution --query-string "SELECT 1 FROM fact_standings LIMIT 1" --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ --query-execution-context Database=ucl_analytics_db --region ap-southeast-1 >/dev/null 2>&1; then
-            echo -e "\nSample Standings:"
-            run_query "SELECT season_year, team_id, position, points, games_played, wins, draws, losses FROM fact_standings WHERE season_year >= 2024 LIMIT 5" "Standings sample"
-        else
-            echo -e "\nStandings table not available yet"
-        fi
-        
-        if aws athena start-query-execution --query-string "SELECT 1 FROM fact_matches LIMIT 1" --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ --query-execution-context Database=ucl_analytics_db --region ap-southeast-1 >/dev/null 2>&1; then
-            echo -e "\nSample Matches:"
-            run_query "SELECT match_id, match_date, home_team_id, away_team_id, home_score, away_score, COALESCE(match_status, 'Unknown') as status FROM fact_matches WHERE match_date IS NOT NULL LIMIT 5" "Matches sample"
-        else
-            echo -e "\nMatches table not available yet"
-        fi
-        
-        if aws athena start-query-execution --query-string "SELECT 1 FROM dim_players LIMIT 1" --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ --query-execution-context Database=ucl_analytics_db --region ap-southeast-1 >/dev/null 2>&1; then
-            echo -e "\nSample Players:"
-            run_query "SELECT player_id, player_name, position, jersey_number, team_id FROM dim_players WHERE player_name IS NOT NULL LIMIT 5" "Players sample"
-        else
-            echo -e "\nPlayers table not available yet"
-        fi
-        """,
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.verify_tables', 'args': ['--stage', 'tables']},
         trigger_rule='all_done'
     )
     
-    # Add simple raw data diagnostic
-    diagnose_raw_content = BashOperator(
+    # Merge every component's metrics into raw/run_metrics.json
+    write_run_metrics = PythonOperator(
+        task_id='write_run_metrics',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.instrumentation'},
+        trigger_rule='all_done'
+    )
+
+    # Raw table diagnostic in one query; reports problems without blocking the table builds
+    diagnose_raw_content = PythonOperator(
         task_id='diagnose_raw_content',
-        bash_command="""
-        echo "=== Raw Data Diagnosis ==="
-        
-        echo -e "\n1. Raw data counts by partition/year:"
-        QUERY_ID=$(aws athena start-query-execution \
-            --query-string "SELECT partition_0, year, COUNT(*) as count FROM ucl_analytics_db.raw GROUP BY partition_0, year ORDER BY partition_0, year" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId')
-        
-        sleep 10
-        aws athena get-query-results \
-            --query-execution-id "$QUERY_ID" \
-            --region ap-southeast-1 \
-            --output table --query 'ResultSet.Rows[*].Data[*].VarCharValue' 2>/dev/null || echo "No results"
-        
-        echo -e "\n2. Sample JSON content from teams:"
-        SAMPLE_QUERY_ID=$(aws athena start-query-execution \
-            --query-string "SELECT partition_0, year, SUBSTR(col0, 1, 500) as sample_json FROM ucl_analytics_db.raw WHERE partition_0 = 'teams' AND LENGTH(col0) > 50 LIMIT 3" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId')
-        
-        sleep 10
-        aws athena get-query-results \
-            --query-execution-id "$SAMPLE_QUERY_ID" \
-            --region ap-southeast-1 \
-            --output table --query 'ResultSet.Rows[*].Data[*].VarCharValue' 2>/dev/null || echo "No sample data"
-            
-        echo -e "\n3. JSON parsing test:"
-        PARSE_QUERY_ID=$(aws athena start-query-execution \
-            --query-string "SELECT partition_0, year, LENGTH(col0) as json_len, try(json_parse(col0)) IS NOT NULL as is_valid_json FROM ucl_analytics_db.raw WHERE LENGTH(col0) > 50 LIMIT 5" \
-            --result-configuration OutputLocation=s3://ucl-lake-2025/athena-query-results/ \
-            --query-execution-context Database=ucl_analytics_db \
-            --region ap-southeast-1 \
-            --output text --query 'QueryExecutionId')
-        
-        sleep 10
-        aws athena get-query-results \
-            --query-execution-id "$PARSE_QUERY_ID" \
-            --region ap-southeast-1 \
-            --output table --query 'ResultSet.Rows[*].Data[*].VarCharValue' 2>/dev/null || echo "No parse results"
-        """
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.verify_tables', 'args': ['--stage', 'raw', '--warn-only']}
     )
 
     # --- Define Task Dependencies ---
     
     # Main ingestion flow
-    test_api >> ingest_data >> verify_data
+    schedule_refresh >> refresh_schedule >> extract_current_season >> refresh_index >> matchday_gate
+    matchday_gate >> test_api >> list_targets >> ingest_data >> list_rosters >> ingest_rosters >> write_summary >> verify_data
+    write_summary >> diff_schedules
     
     # Database and table setup
-    verify_data >> create_database
+    verify_data >> extract_matches >> validate_matches >> build_matchday_index >> configure_workgroup >> create_database
+    extract_matches >> build_team_history
+    extract_matches >> build_team_ratings
+    extract_matches >> build_match_features
+    extract_matches >> build_match_archive
+    extract_matches >> build_rollups
+    [build_rollups, create_database] >> create_rollup_tables
+    verify_data >> parse_official_standings
+    verify_data >> build_player_history
+    [parse_official_standings, extract_matches] >> reconcile_standings
+    [reconcile_standings, create_database] >> create_standings_tables
+    [build_team_ratings, create_database] >> create_fact_team_ratings
+    [build_player_history, create_database] >> create_dim_player_team_bridge
     create_database >> drop_raw_table >> create_raw_table >> test_raw_table >> diagnose_raw_content
     
     # Drop existing tables in parallel
@@ -647,7 +841,72 @@ with DAG(
     create_fact_matches >> create_fact_standings
     
     # Final verification after all tables are created
-    [create_dim_teams, create_dim_players, create_fact_standings] >> verify_results
+    [create_dim_teams, create_dim_players, create_fact_standings] >> verify_results >> write_run_metrics
+
+
+# Live polling: runs every few minutes but short-circuits outside kickoff
+# windows, so non-matchdays cost one S3 read and no API or Athena calls
+with DAG(
+    dag_id='ucl_live_matches_v1',
+    start_date=pendulum.datetime(2025, 7, 8, tz="UTC"),
+    schedule_interval='*/5 * * * *',
+    catchup=False,
+    max_active_runs=1,
+    tags=['champions-league', 'live'],
+) as live_dag:
+
+    kickoff_window = ShortCircuitOperator(
+        task_id='check_kickoff_window',
+        python_callable=check_kickoff_window
+    )
+
+    live_season = "{{ ti.xcom_pull(task_ids='check_kickoff_window')['season_year'] }}"
+    live_competitions = "{{ ti.xcom_pull(task_ids='check_kickoff_window')['competitions'] | join(',') }}"
+
+    # Only the current season's schedule of the competitions playing is fetched while matches are on
+    ingest_live_schedule = PythonOperator(
+        task_id='ingest_live_schedule',
+        python_callable=run_script_from_s3,
+        pool=RAPIDAPI_POOL,
+        op_kwargs={'module': 'scripts.ingest_data',
+                   'args': ['--competition', live_competitions, '--entity', 'schedules', '--season', live_season]}
+    )
+
+    diff_live_schedule = PythonOperator(
+        task_id='diff_live_schedule',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.diff_schedules',
+                   'args': ['--competition', live_competitions, '--seasons', live_season]}
+    )
+
+    extract_live_matches = PythonOperator(
+        task_id='extract_live_matches',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'extract_real_matches',
+                   'args': ['--competition', live_competitions, '--seasons', live_season]}
+    )
+
+    # Rebuilding the index closes the window once every match in it is completed
+    refresh_matchday_index = PythonOperator(
+        task_id='refresh_matchday_index',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.matchday_index'}
+    )
+
+    refresh_team_history = PythonOperator(
+        task_id='refresh_team_history',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.team_history'}
+    )
+
+    # Live runs get their own report so they do not overwrite the daily run's raw/run_metrics.json
+    write_live_metrics = PythonOperator(
+        task_id='write_live_metrics',
+        python_callable=run_script_from_s3,
+        op_kwargs={'module': 'scripts.instrumentation', 'args': ['--report-key', 'raw/live_run_metrics.json']},
+        trigger_rule='all_done'
+    )
 
-    # Raw data diagnosis
-    test_raw_table >> diagnose_raw_content
\ No newline at end of file
+    kickoff_window >> ingest_live_schedule >> diff_live_schedule >> extract_live_matches >> refresh_matchday_index
+    extract_live_matches >> refresh_team_history
+    [refresh_matchday_index, refresh_team_history] >> write_live_metrics
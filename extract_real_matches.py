@@ -1,109 +1,233 @@
 """
 Champions League Match Tracker - Real Data Extraction
 
-This script extracts real Champions League match data from S3 JSON files
-and converts it to CSV format for processing by the Airflow pipeline.
+This script extracts real match data for every tracked competition
+(see scripts/competitions.py) from S3 JSON files and converts it to CSV
+format for processing by the Airflow pipeline.
 
-Data Coverage: 2015-2025 seasons
+Data Coverage: each competition's season range (2015-2025 for UCL)
 Output: CSV file with match details (teams, scores, dates, venues)
-Location: Uploaded to s3://ucl-lake-2025/processed/real_matches/
+Location: Uploaded to s3://ucl-lake-2025/processed/real_matches/competition=<code>/
 
 Author: Champions League Pipeline
 Date: July 2025
 """
 
+import argparse
+import io
 import boto3
 import json
 import csv
 import datetime
+import re
+import sys
 from dateutil.parser import parse as parse_date
 
-def main():
-    print("=== Extracting Real Matches from S3 ===")
-    
-    s3 = boto3.client('s3', region_name='ap-southeast-1')
-    bucket = 'ucl-lake-2025'
-    
+from scripts import competitions, instrumentation, profiling
+
+BUCKET = 'ucl-lake-2025'
+
+CSV_COLUMNS = [
+    'match_id', 'match_datetime', 'match_date', 'completed',
+    'match_status', 'home_team_id', 'home_score', 'away_team_id',
+    'away_score', 'match_name', 'match_short_name', 'venue', 'season_year',
+    'home_team_name', 'home_team_abbrev', 'home_team_logo',
+    'away_team_name', 'away_team_abbrev', 'away_team_logo'
+]
+
+# Athena reads the CSV with LazySimpleSerDe, which ignores quotes: a comma or
+# line break inside a text field would shift every later column of the row
+UNSAFE_TEXT = re.compile(r'\s*[,\r\n]+\s*')
+
+# Field of a TeamLookup entry -> suffix of its home_team_*/away_team_* columns
+TEAM_FIELDS = ['name', 'abbrev', 'logo']
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract real matches from S3 schedules to CSV")
+    parser.add_argument(
+        '--competition',
+        type=competitions.parse_codes,
+        help="Comma-separated competition codes (default: UCL_COMPETITIONS)"
+    )
+    parser.add_argument(
+        '--seasons',
+        help="Comma-separated seasons to re-extract; rows for other seasons are kept "
+             "from the existing CSV in S3 (default: all seasons)"
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="Profile each competition's extraction (see scripts/profiling.py)"
+    )
+    return parser.parse_args(argv)
+
+class TeamLookup:
+    """
+    Interned team_id -> (name, abbrev, logo), built from the competitor objects
+    of every schedule extracted, so each team's strings are stored once and a
+    match whose competitor lacks a team block still gets the team's names.
+    """
+
+    EMPTY = ('', '', '')
+
+    def __init__(self):
+        self.teams = {}
+
+    def add(self, competitor):
+        """Record a competitor's team details; returns the team's entry"""
+        team_id = str(competitor.get('id') or '')
+        team = competitor.get('team') if isinstance(competitor.get('team'), dict) else {}
+        logos = team.get('logos') if isinstance(team.get('logos'), list) else []
+        found = (
+            team.get('displayName') or team.get('name') or team.get('shortDisplayName') or '',
+            team.get('abbreviation') or '',
+            team.get('logo') or next((logo.get('href') for logo in logos if isinstance(logo, dict)), None) or '',
+        )
+        known = self.teams.get(team_id, self.EMPTY)
+        entry = tuple(sys.intern(old or new) for old, new in zip(known, found))
+        if team_id and entry != known:
+            self.teams[team_id] = entry
+        return entry
+
+    def get(self, team_id):
+        return self.teams.get(str(team_id), self.EMPTY)
+
+    def fill(self, matches):
+        """Fill team columns left empty, e.g. rows kept from a CSV written before they existed"""
+        for match in matches:
+            for side in ('home', 'away'):
+                entry = self.get(match.get(f'{side}_team_id'))
+                for field, value in zip(TEAM_FIELDS, entry):
+                    if not match.get(f'{side}_team_{field}'):
+                        match[f'{side}_team_{field}'] = value
+
+def schedule_key(competition, year):
+    return competitions.raw_key('schedules', competition, year, f'schedule_{year}.json')
+
+def load_existing_matches(s3, competition):
+    """Read a competition's current CSV from S3 ([] only if there is none yet; other errors raise)"""
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=competitions.matches_key(competition))
+    except s3.exceptions.NoSuchKey:
+        print(f"  No existing {competition} CSV to merge with")
+        return []
+
+    return list(csv.DictReader(io.StringIO(obj['Body'].read().decode('utf-8'))))
+
+def athena_safe(value):
+    """'Stadion Mladost, Strumica' -> 'Stadion Mladost - Strumica'"""
+    return UNSAFE_TEXT.sub(' - ', value.strip()) if isinstance(value, str) else value
+
+def csv_body(matches):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for match in matches:
+        writer.writerow([athena_safe(match.get(column, '')) for column in CSV_COLUMNS])
+    return out.getvalue()
+
+def extract_competition(s3, competition, seasons=None):
+    """Extract one competition's schedules. Returns its match records."""
     all_matches = []
-    
-    years = [2025, 2024, 2023, 2022, 2021, 2020, 2019, 2018, 2017, 2016, 2015]
-    
+    teams = TeamLookup()
+
+    existing = None
+    failed = []
+
+    # Most recent season first
+    years = sorted(competitions.seasons(competition), reverse=True)
+    if seasons:
+        years = seasons
+        existing = load_existing_matches(s3, competition)
+        all_matches = [row for row in existing if int(row['season_year']) not in years]
+        print(f"Re-extracting {competition} seasons {years}, keeping {len(all_matches)} existing matches")
+
     for year in years:
-        print(f"\nProcessing year {year}...")
-        key = f'raw/schedules/year={year}/schedule_{year}.json'
+        print(f"\nProcessing {competition} year {year}...")
+        key = schedule_key(competition, year)
         
         try:
             # Read the schedule file
-            obj = s3.get_object(Bucket=bucket, Key=key)
-            content = obj['Body'].read().decode('utf-8')
-            data = json.loads(content)
+            with instrumentation.timer("extract.read_schedule"):
+                obj = s3.get_object(Bucket=BUCKET, Key=key)
+                content = obj['Body'].read().decode('utf-8')
+            instrumentation.count("extract.bytes_read", len(content))
+            with instrumentation.timer("extract.parse_json"):
+                data = json.loads(content)
             
             if 'schedule' in data:
-                schedule = data['schedule']
                 matches_count = 0
                 
-                # Process each date in the schedule
-                for date_key, date_matches in schedule.items():
-                    if isinstance(date_matches, list):
-                        for match in date_matches:
-                            if isinstance(match, dict) and 'id' in match:
-                                try:
-                                    match_record = extract_match_data(match, year)
-                                    if match_record:
-                                        all_matches.append(match_record)
-                                        matches_count += 1
-                                except Exception as e:
-                                    print(f"  Error processing match: {e}")
-                                    continue
+                # Process each match in the schedule
+                with instrumentation.timer("extract.season"):
+                    for match in iter_schedule_matches(data):
+                        try:
+                            match_record = extract_match_data(match, year, competition, teams)
+                            if match_record:
+                                all_matches.append(match_record)
+                                matches_count += 1
+                            else:
+                                instrumentation.count("extract.records_dropped")
+                        except Exception as e:
+                            instrumentation.count("extract.records_dropped")
+                            print(f"  Error processing match: {e}")
+                            continue
+                instrumentation.count("extract.records_extracted", matches_count)
                 
                 print(f"  Extracted {matches_count} matches from {year}")
             else:
                 print(f"  No schedule found in {year}")
+                failed.append(year)
                 
         except Exception as e:
             print(f"  Error reading {year}: {e}")
+            failed.append(year)
+
+    # An unreadable schedule must not drop its season from the uploaded CSV:
+    # keep the season's previously extracted rows instead
+    if failed:
+        existing = load_existing_matches(s3, competition) if existing is None else existing
+        kept = [row for row in existing if int(row['season_year']) in failed]
+        print(f"  Keeping {len(kept)} existing matches for unreadable seasons {sorted(failed)}")
+        all_matches.extend(kept)
+
+    teams.fill(all_matches)
+    print(f"  {len(teams.teams)} {competition} teams in the team lookup")
+    return all_matches
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    print("=== Extracting Real Matches from S3 ===")
+    
+    s3 = boto3.client('s3', region_name='ap-southeast-1')
+    seasons = [int(year) for year in args.seasons.split(',')] if args.seasons else None
     
-    # Save to CSV
+    all_matches = []
+    for competition in args.competition or competitions.active_codes():
+        with profiling.stage(f"extract.{competition}"):
+            matches = extract_competition(s3, competition, seasons)
+        if not matches:
+            print(f"No {competition} matches found!")
+            continue
+
+        # One CSV per competition partition
+        s3_key = competitions.matches_key(competition)
+        s3.put_object(Bucket=BUCKET, Key=s3_key, Body=csv_body(matches).encode('utf-8'), ContentType='text/csv')
+        print(f"Uploaded {len(matches)} {competition} matches to s3://{BUCKET}/{s3_key}")
+        all_matches.extend(matches)
+    
+    # Save all competitions locally too
     if all_matches:
         print(f"\nSaving {len(all_matches)} total matches to CSV...")
         
-        # Save locally first
         csv_file = 'real_matches.csv'
         with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            # Header
-            writer.writerow([
-                'match_id', 'match_datetime', 'match_date', 'completed', 
-                'match_status', 'home_team_id', 'home_score', 'away_team_id', 
-                'away_score', 'match_name', 'match_short_name', 'venue', 'season_year'
-            ])
-            
-            # Data
-            for match in all_matches:
-                writer.writerow([
-                    match['match_id'],
-                    match['match_datetime'],
-                    match['match_date'],
-                    match['completed'],
-                    match['match_status'],
-                    match['home_team_id'],
-                    match['home_score'],
-                    match['away_team_id'],
-                    match['away_score'],
-                    match['match_name'],
-                    match['match_short_name'],
-                    match['venue'],
-                    match['season_year']
-                ])
+            f.write(csv_body(all_matches))
         
         print(f"CSV saved to {csv_file}")
         
-        # Upload to S3
-        s3_key = 'processed/real_matches/real_matches.csv'
-        s3.upload_file(csv_file, bucket, s3_key)
-        print(f"Uploaded to s3://{bucket}/{s3_key}")
-        
         # Show sample data
         print(f"\nSample matches:")
         for i, match in enumerate(all_matches[:5]):
@@ -111,10 +235,30 @@ def main():
     
     else:
         print("No matches found!")
+    
+    instrumentation.flush("extract")
+
+def iter_schedule_matches(data):
+    """Yield the match objects of a schedule payload, across all dates"""
+    schedule = data.get('schedule', {}) if isinstance(data, dict) else {}
+    for date_key, date_matches in schedule.items():
+        if isinstance(date_matches, list):
+            for match in date_matches:
+                if isinstance(match, dict) and 'id' in match:
+                    yield match
 
-def extract_match_data(match, year):
+def parse_score(value):
+    """A score as an int, or '' when it is missing or not a number"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return ''
+
+def extract_match_data(match, year, competition=competitions.DEFAULT_COMPETITIONS, teams=None):
     """Extract match data from JSON match object"""
     try:
+        details = competitions.get(competition)
+        teams = teams if teams is not None else TeamLookup()
         match_id = match.get('id', '')
         if not match_id:
             return None
@@ -170,18 +314,14 @@ def extract_match_data(match, year):
         # Extract team IDs and scores
         home_team_id = home_team.get('id', '')
         away_team_id = away_team.get('id', '')
-        home_score = home_team.get('score', 0)
-        away_score = away_team.get('score', 0)
+        # Missing or unparseable scores stay empty (NULL in Athena) instead of reading as 0-0
+        home_score = parse_score(home_team.get('score'))
+        away_score = parse_score(away_team.get('score'))
         
-        # Convert scores to integers
-        try:
-            home_score = int(home_score) if home_score is not None else 0
-            away_score = int(away_score) if away_score is not None else 0
-        except:
-            home_score = 0
-            away_score = 0
-        
-        return {
+        home_details = teams.add(home_team)
+        away_details = teams.add(away_team)
+
+        record = {
             'match_id': match_id,
             'match_datetime': match_datetime,
             'match_date': match_date,
@@ -191,11 +331,15 @@ def extract_match_data(match, year):
             'home_score': home_score,
             'away_team_id': away_team_id,
             'away_score': away_score,
-            'match_name': 'Champions League',
-            'match_short_name': 'UCL',
+            'match_name': details['name'],
+            'match_short_name': details['short_name'],
             'venue': venue,
             'season_year': year
         }
+        for field, home_value, away_value in zip(TEAM_FIELDS, home_details, away_details):
+            record[f'home_team_{field}'] = home_value
+            record[f'away_team_{field}'] = away_value
+        return record
         
     except Exception as e:
         print(f"Error extracting match data: {e}")
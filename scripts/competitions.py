@@ -0,0 +1,89 @@
+"""
+Champions League Match Tracker - Competition Registry
+
+Every competition the pipeline can track (Champions League, Europa League,
+Conference League) is described once in scripts/competitions.json: display
+name, short name, RapidAPI host, default season range and the fewest
+matches a complete season should have (checked by scripts/validate_matches.py). Ingestion,
+extraction and the DAG read it instead of hard-coding one competition.
+
+Which competitions run is set with UCL_COMPETITIONS (comma-separated codes,
+default "ucl"); UCL_SEASON_RANGE, when set, overrides every competition's
+season range.
+
+All competitions share one lake, partitioned by competition:
+    raw/<entity>/competition=<code>/season=<year>/...
+    processed/real_matches/competition=<code>/real_matches.csv
+"""
+
+import json
+import os
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'competitions.json')
+DEFAULT_COMPETITIONS = "ucl"
+DEFAULT_SEASON_RANGE = "2015-2025"
+
+RAW_PREFIX = "raw/{entity}/competition={competition}/season={year}/"
+MATCHES_KEY = "processed/real_matches/competition={competition}/real_matches.csv"
+
+_registry = None
+
+def registry():
+    """{code: competition} as loaded from competitions.json"""
+    global _registry
+    if _registry is None:
+        with open(REGISTRY_PATH, encoding='utf-8') as f:
+            _registry = {code: dict(entry, code=code) for code, entry in json.load(f).items()}
+    return _registry
+
+def get(code):
+    try:
+        return registry()[code]
+    except KeyError:
+        raise ValueError(f"Unknown competition {code!r} (known: {', '.join(registry())})")
+
+def parse_codes(value):
+    """Parse 'ucl,uel' into validated competition codes"""
+    codes = [code.strip().lower() for code in (value or '').split(',') if code.strip()]
+    for code in codes:
+        get(code)
+    return codes
+
+def active_codes(value=None):
+    """Competitions to run: `value`, else UCL_COMPETITIONS, else the default"""
+    return parse_codes(value or os.environ.get("UCL_COMPETITIONS") or DEFAULT_COMPETITIONS)
+
+def parse_season_range(value):
+    """Parse a season range such as '2015-2025' or '2024' into a list of years"""
+    value = (value or DEFAULT_SEASON_RANGE).strip()
+    if '-' in value:
+        start, end = value.split('-', 1)
+    else:
+        start = end = value
+    start, end = int(start), int(end)
+    if start > end:
+        raise ValueError(f"Invalid season range: {value}")
+    return list(range(start, end + 1))
+
+def seasons(code):
+    """Seasons to process for a competition"""
+    return parse_season_range(os.environ.get("UCL_SEASON_RANGE") or get(code)['season_range'])
+
+def api_host(code):
+    host = get(code)['api_host']
+    if not host:
+        raise ValueError(f"No api_host configured for {code} in {REGISTRY_PATH}")
+    return host
+
+def code_for_short_name(short_name):
+    """Competition code of a match_short_name value (e.g. 'UCL' -> 'ucl')"""
+    for code, entry in registry().items():
+        if entry['short_name'] == short_name:
+            return code
+    return (short_name or '').lower()
+
+def raw_key(entity, code, year, filename):
+    return RAW_PREFIX.format(entity=entity, competition=code, year=year) + filename
+
+def matches_key(code):
+    return MATCHES_KEY.format(competition=code)
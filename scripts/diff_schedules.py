@@ -0,0 +1,148 @@
+"""
+Champions League Match Tracker - Schedule Change Data Capture
+
+Compares each competition's and season's freshly ingested schedule with the
+state left by the previous run and writes only the matches that changed:
+
+- inserted: match_id not seen before
+- updated:  content hash changed (score, status, kickoff or venue)
+- deleted:  match_id no longer in the schedule
+
+State:  s3://ucl-lake-2025/processed/schedule_state/competition=<code>/season=YYYY/match_hashes.json
+Deltas: s3://ucl-lake-2025/processed/schedule_deltas/competition=<code>/season=YYYY/delta_<timestamp>.json
+
+Score and status changes in each delta are also published as events to the
+UCL_EVENT_SINKS sinks (scripts/match_events.py).
+"""
+
+import argparse
+import hashlib
+import json
+from datetime import datetime, timezone
+
+import boto3
+
+from extract_real_matches import TeamLookup, extract_match_data, iter_schedule_matches, schedule_key
+from scripts import competitions, instrumentation, match_events
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+STATE_KEY = "processed/schedule_state/competition={competition}/season={year}/match_hashes.json"
+DELTA_KEY = "processed/schedule_deltas/competition={competition}/season={year}/delta_{timestamp}.json"
+
+# Fields whose change makes a match "updated"
+TRACKED_FIELDS = [
+    'match_datetime', 'completed', 'match_status',
+    'home_team_id', 'home_score', 'away_team_id', 'away_score', 'venue',
+]
+
+s3_client = boto3.client('s3', region_name='ap-southeast-1')
+
+def match_hash(record):
+    """Stable content hash over the tracked fields of an extracted match"""
+    content = json.dumps([record[field] for field in TRACKED_FIELDS], default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+def diff_matches(previous, current):
+    """
+    Diff two {match_id: {"hash": ..., "record": ...}} states.
+    Returns (inserted, updated, deleted).
+    """
+    inserted, updated = [], []
+    for match_id, entry in current.items():
+        old = previous.get(match_id)
+        if old is None:
+            inserted.append(entry['record'])
+        elif old['hash'] != entry['hash']:
+            changed = [f for f in TRACKED_FIELDS if old['record'].get(f) != entry['record'].get(f)]
+            updated.append({'match_id': match_id, 'changed': changed, 'record': entry['record'],
+                            'previous': {f: old['record'].get(f) for f in changed}})
+    deleted = sorted(match_id for match_id in previous if match_id not in current)
+    return inserted, updated, deleted
+
+def build_state(schedule, year, competition=competitions.DEFAULT_COMPETITIONS):
+    state = {}
+    teams = TeamLookup()
+    for match in iter_schedule_matches(schedule):
+        record = extract_match_data(match, year, competition, teams)
+        if record:
+            match_id = str(record['match_id'])
+            state[match_id] = {'hash': match_hash(record), 'record': record}
+    teams.fill(entry['record'] for entry in state.values())
+    return state
+
+def read_json(key):
+    try:
+        obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)
+    except s3_client.exceptions.NoSuchKey:
+        return None
+    return json.loads(obj['Body'].read())
+
+def write_json(data, key):
+    s3_client.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=key,
+        Body=json.dumps(data, separators=(',', ':'), default=str),
+        ContentType='application/json'
+    )
+
+def diff_season(competition, year, timestamp, publisher=None):
+    """Diff one competition's season against its stored state. Returns the delta, or None if unchanged."""
+    schedule = read_json(schedule_key(competition, year))
+    if schedule is None:
+        print(f"  No {competition} schedule for {year}")
+        return None
+
+    current = build_state(schedule, year, competition)
+    state_key = STATE_KEY.format(competition=competition, year=year)
+    previous = read_json(state_key) or {}
+    inserted, updated, deleted = diff_matches(previous, current)
+
+    print(f"  {competition} {year}: {len(inserted)} inserted, {len(updated)} updated, {len(deleted)} deleted")
+    if not (inserted or updated or deleted):
+        return None
+
+    delta = {
+        'competition': competition,
+        'season_year': year,
+        'generated_at': timestamp.isoformat(),
+        'inserted': inserted,
+        'updated': updated,
+        'deleted': deleted,
+    }
+    write_json(delta, DELTA_KEY.format(competition=competition, year=year,
+                                       timestamp=timestamp.strftime('%Y%m%dT%H%M%SZ')))
+    # Only advance the state once the delta is safely written
+    write_json(current, state_key)
+    if publisher:
+        publisher.publish(match_events.events_from_delta(delta))
+    return delta
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write per-season match deltas between schedule snapshots")
+    parser.add_argument('--competition', type=competitions.parse_codes,
+                        help="Comma-separated competition codes (default: UCL_COMPETITIONS)")
+    parser.add_argument('--seasons', help="Comma-separated seasons (default: each competition's season range)")
+    args = parser.parse_args(argv)
+
+    print("=== Diffing schedule snapshots ===")
+    timestamp = datetime.now(timezone.utc)
+    publisher = match_events.Publisher(match_events.sinks_from_env())
+    changed = []
+    for competition in args.competition or competitions.active_codes():
+        if args.seasons:
+            seasons = [int(year) for year in args.seasons.split(',')]
+        else:
+            seasons = competitions.seasons(competition)
+        changed += [f"{competition} {year}" for year in seasons
+                    if diff_season(competition, year, timestamp, publisher)]
+    print(f"Seasons with changes: {changed or 'none'}")
+
+    # The deltas are already stored, so a failed sink is reported (and can be replayed) rather than fatal
+    stats = publisher.close()
+    for error in publisher.errors:
+        print(f"✗ {error}")
+    print(f"Match events: {stats.get('delivered', 0)} delivered in {stats.get('batches', 0)} batches")
+    instrumentation.flush("diff_schedules")
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,238 @@
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import boto3
 from botocore.exceptions import ClientError
 
+from scripts import instrumentation, profiling
+
 S3_BUCKET_NAME = "ucl-lake-2025"
 s3_client = boto3.client('s3', region_name='ap-southeast-1')
 
-def fix_json_file(s3_key):
-    """Download JSON file, ensure proper formatting, and re-upload as single line"""
+# Objects rewritten by this script (or uploaded compact by ingestion) carry this tag
+NORMALIZED_METADATA_KEY = 'normalized'
+
+# key -> ETag of every object known to be normalized; lets unchanged objects
+# be skipped straight from the listing without even a HEAD request
+MANIFEST_KEY = 'raw/_manifests/normalized.json'
+# Pipeline bookkeeping (manifests, metrics) lives under raw/_*/ and is not raw data
+INTERNAL_PREFIX = 'raw/_'
+SUMMARY_KEY = 'raw/json_processing_summary.json'
+
+# Upper bound on bytes downloaded but not yet processed across all workers
+DEFAULT_MAX_INFLIGHT_BYTES = 64 * 1024 * 1024
+
+class ByteBudget:
+    """Blocks callers until their object fits within the in-flight byte budget"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, size):
+        with self.condition:
+            # A single object larger than the budget is still let through on its own
+            while self.in_flight and self.in_flight + size > self.limit:
+                self.condition.wait()
+            self.in_flight += size
+
+    def release(self, size):
+        with self.condition:
+            self.in_flight -= size
+            self.condition.notify_all()
+
+def is_tagged_normalized(s3_key):
+    """HEAD the object and check for the normalized metadata tag"""
+    head = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+    return head.get('Metadata', {}).get(NORMALIZED_METADATA_KEY) == 'true', head['ETag']
+
+def fix_json_file(s3_key, size=0, budget=None):
+    """
+    Download JSON file, ensure proper formatting, and re-upload as single line.
+    Returns the object's ETag once it is normalized, or None on failure.
+    Only the download takes `size` bytes from `budget`; a tagged object costs one HEAD.
+    """
+    with instrumentation.timer("fix_json.file"):
+        return _fix_json_file(s3_key, size, budget)
+
+def _fix_json_file(s3_key, size, budget):
     try:
-        # Download the file
-        print(f"Processing {s3_key}...")
-        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
-        content = response['Body'].read().decode('utf-8')
-        
-        # Try to parse and validate JSON
-        try:
-            data = json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"⚠️  JSON parsing error in {s3_key}: {e}")
-            # Try to fix common JSON issues
-            content = content.strip()
-            if not content.startswith('{') and not content.startswith('['):
-                print(f"⚠️  File doesn't start with valid JSON: {s3_key}")
-                return False
-            try:
-                data = json.loads(content)
-            except json.JSONDecodeError:
-                print(f"✗ Cannot fix JSON in {s3_key}")
-                return False
-        
-        # Re-serialize as single line JSON (no indentation)
-        single_line_json = json.dumps(data, separators=(',', ':'))
-        
-        # Verify the result is still valid JSON
+        # Skip objects already tagged as normalized without downloading them
+        normalized, etag = is_tagged_normalized(s3_key)
+        if normalized:
+            instrumentation.count("fix_json.skipped_tagged")
+            print(f"✓ {s3_key} already normalized (tagged)")
+            return etag
+
+        if budget:
+            budget.acquire(size)
         try:
-            json.loads(single_line_json)
-        except json.JSONDecodeError:
-            print(f"✗ Generated invalid JSON for {s3_key}")
-            return False
-        
-        # Only upload if content has changed
-        if content != single_line_json:
-            s3_client.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=s3_key,
-                Body=single_line_json,
-                ContentType='application/json'
-            )
-            print(f"✓ Fixed {s3_key} (reduced from {len(content)} to {len(single_line_json)} chars)")
-        else:
-            print(f"✓ {s3_key} already properly formatted")
-        
-        return True
-        
+            return _normalize(s3_key)
+        finally:
+            if budget:
+                budget.release(size)
+
     except Exception as e:
         print(f"✗ Error processing {s3_key}: {e}")
-        return False
+        return None
 
-def main():
+def _normalize(s3_key):
+    """Rewrite (or tag in place) one untagged object. Returns its ETag, or None if it is not valid JSON."""
+    # Download the file
+    print(f"Processing {s3_key}...")
+    response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+    content = response['Body'].read().decode('utf-8')
+    instrumentation.count("fix_json.bytes_downloaded", len(content))
+
+    # Try to parse and validate JSON
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        print(f"⚠️  JSON parsing error in {s3_key}: {e}")
+        # Try to fix common JSON issues
+        content = content.strip()
+        if not content.startswith('{') and not content.startswith('['):
+            print(f"⚠️  File doesn't start with valid JSON: {s3_key}")
+            return None
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError:
+            print(f"✗ Cannot fix JSON in {s3_key}")
+            return None
+
+    # Re-serialize as single line JSON (no indentation); json.dumps of
+    # parsed data is always valid JSON, so there is nothing to re-verify
+    single_line_json = json.dumps(data, separators=(',', ':'))
+
+    # Only upload if content has changed
+    if content != single_line_json:
+        result = s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=s3_key,
+            Body=single_line_json,
+            ContentType='application/json',
+            Metadata={NORMALIZED_METADATA_KEY: 'true'}
+        )
+        instrumentation.count("fix_json.rewritten")
+        instrumentation.count("fix_json.bytes_uploaded", len(single_line_json))
+        print(f"✓ Fixed {s3_key} (reduced from {len(content)} to {len(single_line_json)} chars)")
+    else:
+        # Tag in place so the next run can skip it without a download
+        result = s3_client.copy_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=s3_key,
+            CopySource={'Bucket': S3_BUCKET_NAME, 'Key': s3_key},
+            ContentType='application/json',
+            Metadata={NORMALIZED_METADATA_KEY: 'true'},
+            MetadataDirective='REPLACE'
+        )['CopyObjectResult']
+        instrumentation.count("fix_json.tagged_in_place")
+        print(f"✓ {s3_key} already properly formatted")
+
+    return result['ETag']
+
+def load_manifest():
+    try:
+        response = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=MANIFEST_KEY)
+        return json.loads(response['Body'].read())
+    except ClientError:
+        return {}
+
+def save_manifest(manifest):
+    s3_client.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=MANIFEST_KEY,
+        Body=json.dumps(manifest, separators=(',', ':')),
+        ContentType='application/json'
+    )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize raw JSON files to single-line JSON")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of concurrent workers (default: 1, sequential)")
+    parser.add_argument('--max-inflight-mb', type=int,
+                        default=DEFAULT_MAX_INFLIGHT_BYTES // (1024 * 1024),
+                        help="Max MB of objects being processed at once across workers")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile the listing and processing stages (see scripts/profiling.py)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Fix JSON formatting for all raw data files"""
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable()
     print("Fixing JSON formatting for raw data files...")
-    
+
     try:
         # List all objects in raw/ folder
         paginator = s3_client.get_paginator('list_objects_v2')
         pages = paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix='raw/')
-        
+
         json_files = []
-        for page in pages:
-            if 'Contents' in page:
-                for obj in page['Contents']:
-                    if obj['Key'].endswith('.json'):
-                        json_files.append(obj['Key'])
-        
+        with profiling.stage("fix_json.list"):
+            for page in pages:
+                if 'Contents' in page:
+                    for obj in page['Contents']:
+                        if (obj['Key'].endswith('.json')
+                                and obj['Key'] not in (SUMMARY_KEY, instrumentation.REPORT_KEY)
+                                and not obj['Key'].startswith(INTERNAL_PREFIX)):
+                            json_files.append(obj)
+
         if not json_files:
             print("No JSON files found in raw/ folder")
             return
-        
+
         print(f"Found {len(json_files)} JSON files to process")
-        
-        success_count = 0
-        for json_file in json_files:
-            if fix_json_file(json_file):
+
+        # Objects whose listed ETag matches the manifest are unchanged since
+        # they were last normalized: skip them without any request
+        manifest = load_manifest()
+        pending = [obj for obj in json_files if manifest.get(obj['Key']) != obj['ETag']]
+        skipped = len(json_files) - len(pending)
+        instrumentation.count("fix_json.skipped_manifest", skipped)
+        if skipped:
+            print(f"Skipping {skipped} files unchanged since last normalization")
+
+        budget = ByteBudget(args.max_inflight_mb * 1024 * 1024)
+
+        def process(obj):
+            return obj['Key'], fix_json_file(obj['Key'], obj['Size'], budget)
+
+        with profiling.stage("fix_json.process"), ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            results = list(executor.map(process, pending))
+
+        success_count = skipped
+        for key, etag in results:
+            if etag:
+                manifest[key] = etag
                 success_count += 1
-        
+        save_manifest(manifest)
+
         print(f"\nCompleted! Successfully processed {success_count}/{len(json_files)} files")
-        
+
         # Also create a summary file
         summary = {
             "processing_timestamp": "2025-01-01T00:00:00Z",
             "total_files": len(json_files),
             "successfully_processed": success_count,
-            "files_processed": json_files[:10]  # First 10 files as sample
+            "skipped_unchanged": skipped,
+            "files_processed": [obj['Key'] for obj in json_files[:10]]  # First 10 files as sample
         }
-        
+
         s3_client.put_object(
             Bucket=S3_BUCKET_NAME,
-            Key='raw/json_processing_summary.json',
+            Key=SUMMARY_KEY,
             Body=json.dumps(summary, separators=(',', ':')),
             ContentType='application/json'
         )
-        
+
     except Exception as e:
         print(f"Error listing S3 objects: {e}")
 
+    instrumentation.flush("fix_json_format", s3_client)
+
 if __name__ == "__main__":
     main()
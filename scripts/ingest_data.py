@@ -1,147 +1,373 @@
 # Fixed ingest_data.py script
 import os
+import sys
+import argparse
+import hashlib
+import threading
+import time
 import requests
 import boto3
 import json
 from datetime import datetime
 
+from scripts import competitions, instrumentation, profiling, raw_snapshots
+
 # --- Configuration ---
 API_KEY = os.environ.get("RAPIDAPI_KEY") or os.getenv("RAPIDAPI_KEY")
-API_HOST = "uefa-champions-league1.p.rapidapi.com"
 S3_BUCKET_NAME = "ucl-lake-2025"
-HEADERS = {"X-RapidAPI-Key": API_KEY, "X-RapidAPI-Host": API_HOST}
+# Overridable so the pipeline can be pointed at a local stand-in (see benchmarks/)
+API_BASE_URL = os.environ.get("RAPIDAPI_BASE_URL")
 s3_client = boto3.client('s3')
 
-# Years to fetch data for
-START_YEAR = 2015
-END_YEAR = 2025
+# Rosters are expensive (one call per team), so only fetch them for recent seasons
+ROSTER_MIN_YEAR = int(os.environ.get("UCL_ROSTER_MIN_YEAR", "2023"))
+ROSTERS_PER_SEASON = int(os.environ.get("UCL_ROSTERS_PER_SEASON", "5"))
+
+# Requests per second across every competition fetched by this process (0 = no limit).
+# Across processes the quota is shared through the rapidapi_quota Airflow pool,
+# so the overall rate is at most pool slots x UCL_API_RATE_LIMIT.
+API_RATE_LIMIT = float(os.environ.get("UCL_API_RATE_LIMIT", "2"))
+
+# Each entity is fetched once per competition and season; attempts are tried in
+# order until one succeeds
+ENTITIES = {
+    "teams": {
+        "attempts": [("teams/list", "year"), ("team/list", "year")],
+        "file": "teams_{year}.json",
+    },
+    "schedules": {
+        "attempts": [("schedule", "year"), ("schedule", "season")],
+        "file": "schedule_{year}.json",
+    },
+    "standings": {
+        "attempts": [("standings", "year"), ("standings", "season")],
+        "file": "standings_{year}.json",
+    },
+}
+
+# Every ingestion unit records the objects it wrote under the run's manifest
+# prefix; --summary consolidates them into a single manifest for verification
+RUN_ID = instrumentation.RUN_ID
+MANIFEST_FRAGMENT_KEY = "raw/_manifests/runs/{run_id}/{competition}/{entity}_{year}.json"
+MANIFEST_KEY = "raw/_manifests/ingestion_manifest.json"
+ROSTERS_ENTITY = "team_rosters"
+
+class RateLimiter:
+    """Token bucket: lets `rate` calls per second through, with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+            # Claim the token now so concurrent callers queue up behind this one
+            self.tokens -= 1
+        if wait:
+            instrumentation.count("api.throttled")
+            time.sleep(wait)
+
+# One limiter for every competition, since they all draw on the same RapidAPI quota
+rate_limiter = RateLimiter(API_RATE_LIMIT)
 
 # --- Helper Functions ---
-def fetch_from_api(endpoint, params=None):
-    url = f"https://{API_HOST}/{endpoint}"
+def fetch_from_api(endpoint, params=None, competition=competitions.DEFAULT_COMPETITIONS):
+    host = competitions.api_host(competition)
+    url = f"{API_BASE_URL or f'https://{host}'}/{endpoint}"
+    headers = {"X-RapidAPI-Key": API_KEY, "X-RapidAPI-Host": host}
     print(f"Fetching: {url} with params: {params}")
-    response = requests.get(url, headers=HEADERS, params=params)
+    rate_limiter.acquire()
+    with instrumentation.timer(f"api.{endpoint}"):
+        response = requests.get(url, headers=headers, params=params)
+    instrumentation.count("api.requests")
+    instrumentation.count("api.bytes_fetched", len(response.content))
     if response.status_code == 200:
         print(f"✓ Successfully fetched {endpoint}")
         return response.json()
     else:
+        instrumentation.count("api.errors")
         print(f"✗ Error fetching {endpoint}: {response.status_code} - {response.text}")
         return None
 
-def upload_to_s3(data, s3_key):
+def upload_to_s3(data, s3_key, content_addressed=False):
+    """
+    Upload data as JSON. Returns a manifest entry (key, size, sha256) or None.
+    Payloads (content_addressed=True) are also kept once by hash for raw snapshots.
+    """
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')  # Single-line JSON
+    digest = hashlib.sha256(body).hexdigest()
     try:
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=s3_key,
-            Body=json.dumps(data)  # Remove indent=4 to create single-line JSON
-        )
+        if content_addressed:
+            with instrumentation.timer("s3.store_content"):
+                raw_snapshots.store(body, digest)
+        with instrumentation.timer("s3.upload"):
+            s3_client.put_object(
+                Bucket=S3_BUCKET_NAME,
+                Key=s3_key,
+                Body=body,
+                ContentType='application/json',
+                # Already in the form fix_json_format.py produces, so it can skip this object
+                Metadata={'normalized': 'true'}
+            )
+        instrumentation.count("s3.objects_uploaded")
+        instrumentation.count("s3.bytes_uploaded", len(body))
         print(f"✓ Uploaded to s3://{S3_BUCKET_NAME}/{s3_key}")
-        return True
+        return {"key": s3_key, "size": len(body), "sha256": digest}
     except Exception as e:
         print(f"✗ Error uploading to S3: {e}")
-        return False
+        return None
+
+def write_manifest_fragment(competition, entity, year, objects):
+    """Record the objects one ingestion unit wrote in this run"""
+    key = MANIFEST_FRAGMENT_KEY.format(run_id=RUN_ID, competition=competition, entity=entity, year=year)
+    return upload_to_s3({"competition": competition, "entity": entity, "season": year, "objects": objects}, key)
+
+def extract_team_ids(team_list):
+    """Return the team IDs found in a team list payload"""
+    # Handle both list and dict responses
+    teams = []
+    if isinstance(team_list, list):
+        # Response is already a list of teams
+        teams = team_list
+    elif isinstance(team_list, dict):
+        # Response is a dictionary, extract teams
+        teams = team_list.get('teams', []) or team_list.get('data', []) or []
+
+    team_ids = []
+    for team in teams:
+        if isinstance(team, dict):
+            team_id = team.get('id') or team.get('teamId') or team.get('team_id')
+            if team_id:
+                team_ids.append(team_id)
+    return team_ids
+
+# --- Ingestion Units ---
+def ingest_entity(entity, year, competition=competitions.DEFAULT_COMPETITIONS):
+    """Fetch one entity for one competition and season and upload it. Returns the payload or None."""
+    with profiling.stage(f"ingest.{competition}.{entity}.{year}"):
+        return _ingest_entity(entity, year, competition)
+
+def _ingest_entity(entity, year, competition):
+    config = ENTITIES[entity]
+    print(f"\n--- Fetching {competition} {entity} for {year} ---")
+
+    payload = None
+    for endpoint, param in config["attempts"]:
+        payload = fetch_from_api(endpoint, params={param: str(year)}, competition=competition)
+        if payload:
+            break
+
+    if not payload:
+        return None
+
+    entry = upload_to_s3(payload, competitions.raw_key(entity, competition, year, config["file"].format(year=year)),
+                         content_addressed=True)
+    if not entry:
+        return None
+    if entity == "teams":
+        # Kept in the manifest so the --summary step can count teams without re-reading payloads
+        entry["teams"] = len(extract_team_ids(payload))
+    write_manifest_fragment(competition, entity, year, [entry])
+    return payload
+
+def ingest_rosters(year, limit=ROSTERS_PER_SEASON, team_ids=None, competition=competitions.DEFAULT_COMPETITIONS):
+    """
+    Fetch rosters for up to `limit` teams of a season.
+    Returns (fetched, failed): rosters uploaded, and rosters (or the team list) that could not be.
+    """
+    with profiling.stage(f"ingest.{competition}.{ROSTERS_ENTITY}.{year}"):
+        return _ingest_rosters(year, limit, team_ids, competition)
+
+def _ingest_rosters(year, limit, team_ids, competition):
+    print(f"\n--- Fetching {competition} rosters for {year} ---")
+
+    if team_ids is None:
+        # Read back the team list written by the teams step for this season
+        key = competitions.raw_key("teams", competition, year, ENTITIES["teams"]["file"].format(year=year))
+        try:
+            obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)
+            team_ids = extract_team_ids(json.loads(obj['Body'].read()))
+        except Exception as e:
+            print(f"✗ Could not read team list {key}: {e}")
+            return 0, 1
+
+    objects, failed = [], 0
+    for team_id in team_ids[:limit]:
+        print(f"\n--- Fetching roster for team {team_id} ({year}) ---")
+        roster = fetch_from_api("team/roster", params={"teamId": str(team_id), "year": str(year)},
+                                competition=competition)
+        key = competitions.raw_key(ROSTERS_ENTITY, competition, year, f"team_{team_id}_roster_{year}.json")
+        entry = roster and upload_to_s3(roster, key, content_addressed=True)
+        if entry:
+            objects.append(entry)
+        else:
+            failed += 1
+
+    if objects:
+        write_manifest_fragment(competition, ROSTERS_ENTITY, year, objects)
+    return len(objects), failed
+
+def expected_units(codes):
+    """All (competition, entity, season) combinations a full run should produce"""
+    units = []
+    for competition in codes:
+        seasons = competitions.seasons(competition)
+        units += [(competition, entity, year) for year in seasons for entity in ENTITIES]
+        units += [(competition, ROSTERS_ENTITY, year) for year in seasons if year >= ROSTER_MIN_YEAR]
+    return units
+
+def write_manifest(codes):
+    """Consolidate this run's fragments into raw/_manifests/ingestion_manifest.json"""
+    objects, missing = [], []
+    for competition, entity, year in expected_units(codes):
+        key = MANIFEST_FRAGMENT_KEY.format(run_id=RUN_ID, competition=competition, entity=entity, year=year)
+        try:
+            fragment = json.loads(s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)['Body'].read())
+        except s3_client.exceptions.NoSuchKey:
+            missing.append({"competition": competition, "entity": entity, "season": year})
+            continue
+        for entry in fragment["objects"]:
+            objects.append(dict(entry, competition=competition, entity=entity, season=year))
+
+    manifest = {
+        "run_id": RUN_ID,
+        "generated_at": datetime.now().isoformat(),
+        "competitions": codes,
+        "seasons": {competition: competitions.seasons(competition) for competition in codes},
+        "entities": list(ENTITIES) + [ROSTERS_ENTITY],
+        "objects": objects,
+        "missing": missing,
+    }
+    print(f"Manifest: {len(objects)} objects, {len(missing)} missing units")
+    # Units missing from this run keep their previous payloads in the snapshot
+    raw_snapshots.write_snapshot(objects, RUN_ID)
+    return manifest if upload_to_s3(manifest, MANIFEST_KEY) else None
+
+def manifest_counts(manifest):
+    """(teams_found, rosters_fetched) for the run a manifest describes"""
+    objects = manifest["objects"]
+    teams_found = sum(entry.get("teams", 0) for entry in objects if entry["entity"] == "teams")
+    rosters_fetched = sum(1 for entry in objects if entry["entity"] == ROSTERS_ENTITY)
+    return teams_found, rosters_fetched
+
+def write_summary(codes, teams_found=None, rosters_fetched=None):
+    summary = {
+        "ingestion_date": datetime.now().isoformat(),
+        "competitions": codes,
+        "years_processed": {competition: competitions.seasons(competition) for competition in codes},
+        "entities": list(ENTITIES),
+        "teams_found": teams_found,
+        "rosters_fetched": rosters_fetched,
+    }
+    return upload_to_s3(summary, "raw/ingestion_summary.json")
 
 # --- Main Ingestion Logic ---
-def main():
+def main(codes=None):
+    codes = codes or competitions.active_codes()
     print(f"Starting ingestion to bucket: {S3_BUCKET_NAME}")
     print(f"API Key available: {'Yes' if API_KEY else 'No'}")
-    print(f"Fetching data for years: {START_YEAR} to {END_YEAR}")
-    
+
     if not API_KEY:
         print("ERROR: RAPIDAPI_KEY not found in environment!")
         return
-    
-    # Track all teams across years for roster fetching
+
+    # Track all teams across competitions and years for roster fetching
     all_team_ids = set()
-    
-    # Loop through each year
-    for year in range(START_YEAR, END_YEAR + 1):
+    rosters_fetched = 0
+
+    for competition in codes:
+        seasons = competitions.seasons(competition)
+        print(f"\nFetching {competitions.get(competition)['name']} data for years: {seasons[0]} to {seasons[-1]}")
+
+        # Loop through each year
+        for year in seasons:
+            print(f"\n{'='*50}")
+            print(f"Processing {competition} Year: {year}")
+            print(f"{'='*50}")
+
+            team_list = ingest_entity("teams", year, competition)
+            if team_list:
+                for team_id in extract_team_ids(team_list):
+                    all_team_ids.add((competition, team_id, year))
+
+            ingest_entity("schedules", year, competition)
+            ingest_entity("standings", year, competition)
+
+        # Fetch team rosters (limit to recent years and a few teams to avoid rate limits)
         print(f"\n{'='*50}")
-        print(f"Processing Year: {year}")
+        print(f"Fetching {competition} Team Rosters")
         print(f"{'='*50}")
-        
-        # 1. Get Team List for this year
-        print(f"\n--- Fetching Team List for {year} ---")
-        team_list = fetch_from_api("teams/list", params={"year": str(year)})
-        if not team_list:
-            # Try alternative endpoint
-            team_list = fetch_from_api("team/list", params={"year": str(year)})
-        
-        if team_list:
-            upload_to_s3(team_list, f"raw/teams/year={year}/teams_{year}.json")
-            
-            # Handle both list and dict responses
-            teams = []
-            if isinstance(team_list, list):
-                # Response is already a list of teams
-                teams = team_list
-            elif isinstance(team_list, dict):
-                # Response is a dictionary, extract teams
-                teams = team_list.get('teams', []) or team_list.get('data', []) or []
-            
-            # Extract team IDs
-            for team in teams:
-                if isinstance(team, dict):
-                    team_id = team.get('id') or team.get('teamId') or team.get('team_id')
-                    if team_id:
-                        all_team_ids.add((team_id, year))
-        
-        # 2. Get Schedule for this year
-        print(f"\n--- Fetching Schedule for {year} ---")
-        schedule = fetch_from_api("schedule", params={"year": str(year)})
-        if not schedule:
-            # Try with season parameter
-            schedule = fetch_from_api("schedule", params={"season": str(year)})
-        
-        if schedule:
-            upload_to_s3(schedule, f"raw/schedules/year={year}/schedule_{year}.json")
-        
-        # 3. Get Standings for this year
-        print(f"\n--- Fetching Standings for {year} ---")
-        standings = fetch_from_api("standings", params={"year": str(year)})
-        if not standings:
-            # Try with season parameter
-            standings = fetch_from_api("standings", params={"season": str(year)})
-        
-        if standings:
-            upload_to_s3(standings, f"raw/standings/year={year}/standings_{year}.json")
-        
-        # Add small delay to avoid rate limiting
-        import time
-        time.sleep(1)
-    
-    # 4. Fetch team rosters (limit to recent years and a few teams to avoid rate limits)
-    print(f"\n{'='*50}")
-    print("Fetching Team Rosters")
-    print(f"{'='*50}")
-    
-    # Only fetch rosters for recent years and limit number of teams
-    recent_teams = [(tid, yr) for tid, yr in all_team_ids if yr >= 2023]
-    
-    for i, (team_id, year) in enumerate(recent_teams[:10]):  # Limit to 10 rosters
-        print(f"\n--- Fetching roster for team {team_id} ({year}) ---")
-        roster = fetch_from_api("team/roster", params={"teamId": str(team_id), "year": str(year)})
-        if roster:
-            upload_to_s3(roster, f"raw/team_rosters/year={year}/team_{team_id}_roster_{year}.json")
-        
-        # Add delay to avoid rate limiting
-        time.sleep(0.5)
-    
-    # 5. Create a summary file
-    summary = {
-        "ingestion_date": datetime.now().isoformat(),
-        "years_processed": list(range(START_YEAR, END_YEAR + 1)),
-        "total_years": END_YEAR - START_YEAR + 1,
-        "teams_found": len(all_team_ids),
-        "rosters_fetched": min(10, len(recent_teams))
-    }
-    upload_to_s3(summary, "raw/ingestion_summary.json")
-    
+
+        for year in seasons:
+            if year < ROSTER_MIN_YEAR:
+                continue
+            team_ids = [tid for comp, tid, yr in all_team_ids if comp == competition and yr == year]
+            rosters_fetched += ingest_rosters(year, team_ids=team_ids, competition=competition)[0]
+
+    write_manifest(codes)
+    write_summary(codes, teams_found=len(all_team_ids), rosters_fetched=rosters_fetched)
+
     print(f"\n{'='*50}")
     print("Ingestion Complete!")
-    print(f"Processed {END_YEAR - START_YEAR + 1} years of data")
-    print(f"Found {len(all_team_ids)} unique team-year combinations")
+    print(f"Processed {len(codes)} competitions: {', '.join(codes)}")
+    print(f"Found {len(all_team_ids)} unique competition-team-year combinations")
     print(f"{'='*50}")
 
+def run_cli(argv=None):
+    """Run a single ingestion unit, exiting non-zero so the caller can retry just that unit"""
+    parser = argparse.ArgumentParser(description="Ingest competition data from RapidAPI to S3")
+    parser.add_argument("--competition", type=competitions.parse_codes,
+                        help="Comma-separated competition codes (default: UCL_COMPETITIONS)")
+    parser.add_argument("--entity", choices=sorted(ENTITIES), help="Fetch a single entity")
+    parser.add_argument("--season", type=int, help="Season for --entity or --rosters")
+    parser.add_argument("--rosters", action="store_true", help="Fetch team rosters for --season")
+    parser.add_argument("--summary", action="store_true",
+                        help="Write the run manifest and raw/ingestion_summary.json")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each ingestion unit (see scripts/profiling.py)")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable()
+    codes = args.competition or competitions.active_codes()
+
+    if args.summary:
+        manifest = write_manifest(codes)
+        if not manifest:
+            return 1
+        teams_found, rosters_fetched = manifest_counts(manifest)
+        return 0 if write_summary(codes, teams_found=teams_found, rosters_fetched=rosters_fetched) else 1
+
+    if not (args.entity or args.rosters):
+        main(codes)
+        instrumentation.flush("ingest")
+        return 0
+
+    if not API_KEY:
+        print("ERROR: RAPIDAPI_KEY not found in environment!")
+        return 1
+    if args.season is None:
+        parser.error("--season is required with --entity/--rosters")
+
+    label = "_".join(codes)
+    if args.rosters:
+        failed = sum(ingest_rosters(args.season, competition=competition)[1] for competition in codes)
+        instrumentation.flush(f"ingest_rosters_{label}_{args.season}")
+        if failed:
+            print(f"✗ {failed} rosters could not be fetched")
+        return 1 if failed else 0
+
+    ok = all([ingest_entity(args.entity, args.season, competition) for competition in codes])
+    instrumentation.flush(f"ingest_{args.entity}_{label}_{args.season}")
+    return 0 if ok else 1
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(run_cli())
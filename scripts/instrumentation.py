@@ -0,0 +1,203 @@
+"""
+Champions League Match Tracker - Run Instrumentation
+
+Lightweight timers, counters and latency histograms for the pipeline
+scripts. Each process records into an in-memory registry and flushes it as
+one fragment per component:
+
+    s3://ucl-lake-2025/raw/_metrics/<run_id>/<component>.json
+
+Running this module merges every fragment of a run into a single report
+next to the ingestion summary:
+
+    s3://ucl-lake-2025/raw/run_metrics.json
+
+Set UCL_METRICS_DIR to write fragments and the report to a local directory
+instead of S3.
+
+Usage:
+    python -m scripts.instrumentation            # merge the current UCL_RUN_ID
+    python -m scripts.instrumentation --report-key raw/live_run_metrics.json
+"""
+
+import argparse
+import bisect
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import boto3
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+FRAGMENT_PREFIX = "raw/_metrics/{run_id}/"
+FRAGMENT_KEY = FRAGMENT_PREFIX + "{component}.json"
+REPORT_KEY = "raw/run_metrics.json"
+
+# Shared by every process of one pipeline run (the DAG passes its run_id)
+RUN_ID = re.sub(r'[^A-Za-z0-9_.-]', '_',
+                os.environ.get("UCL_RUN_ID") or datetime.now().strftime("manual__%Y%m%dT%H%M%S"))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_athena_queries = []
+
+def _new_histogram():
+    return {'count': 0, 'sum_ms': 0.0, 'min_ms': None, 'max_ms': None,
+            'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+
+def count(name, value=1):
+    """Add value to a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name, elapsed_ms):
+    """Record one latency sample in milliseconds"""
+    with _lock:
+        histogram = _histograms.setdefault(name, _new_histogram())
+        histogram['count'] += 1
+        histogram['sum_ms'] += elapsed_ms
+        histogram['min_ms'] = elapsed_ms if histogram['min_ms'] is None else min(histogram['min_ms'], elapsed_ms)
+        histogram['max_ms'] = elapsed_ms if histogram['max_ms'] is None else max(histogram['max_ms'], elapsed_ms)
+        histogram['buckets'][bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+@contextmanager
+def timer(name):
+    """Time a block into the `name` histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000)
+
+def record_athena(query_execution, label=None):
+    """Record the statistics of a finished get_query_execution response"""
+    execution = query_execution['QueryExecution']
+    statistics = execution.get('Statistics', {})
+    entry = {
+        'label': label,
+        'query_id': execution['QueryExecutionId'],
+        'state': execution['Status']['State'],
+        'engine_execution_ms': statistics.get('EngineExecutionTimeInMillis'),
+        'data_scanned_bytes': statistics.get('DataScannedInBytes'),
+        'queue_ms': statistics.get('QueryQueueTimeInMillis'),
+        'total_ms': statistics.get('TotalExecutionTimeInMillis'),
+    }
+    with _lock:
+        _athena_queries.append(entry)
+    return entry
+
+def snapshot(component):
+    with _lock:
+        return {
+            'run_id': RUN_ID,
+            'component': component,
+            'recorded_at': datetime.now().isoformat(),
+            'counters': dict(_counters),
+            'histograms': {name: dict(h, buckets=list(h['buckets'])) for name, h in _histograms.items()},
+            'athena_queries': list(_athena_queries),
+        }
+
+def _write(key, data, s3_client=None):
+    body = json.dumps(data, separators=(',', ':'))
+    metrics_dir = os.environ.get("UCL_METRICS_DIR")
+    if metrics_dir:
+        path = os.path.join(metrics_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        return path
+    s3_client = s3_client or boto3.client('s3')
+    s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=body, ContentType='application/json')
+    return f"s3://{S3_BUCKET_NAME}/{key}"
+
+def flush(component, s3_client=None):
+    """Write this process's metrics as the run fragment for `component`"""
+    try:
+        location = _write(FRAGMENT_KEY.format(run_id=RUN_ID, component=component), snapshot(component), s3_client)
+        print(f"✓ Metrics written to {location}")
+    except Exception as e:
+        # Metrics must never fail the pipeline
+        print(f"✗ Could not write metrics: {e}")
+
+def merge(fragments):
+    """Combine per-component fragments into one run report"""
+    counters, histograms, athena_queries = {}, {}, []
+    for fragment in fragments:
+        for name, value in fragment['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+        for name, h in fragment['histograms'].items():
+            merged = histograms.setdefault(name, _new_histogram())
+            merged['count'] += h['count']
+            merged['sum_ms'] += h['sum_ms']
+            merged['min_ms'] = h['min_ms'] if merged['min_ms'] is None else min(merged['min_ms'], h['min_ms'])
+            merged['max_ms'] = h['max_ms'] if merged['max_ms'] is None else max(merged['max_ms'], h['max_ms'])
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], h['buckets'])]
+        for entry in fragment['athena_queries']:
+            athena_queries.append(dict(entry, component=fragment['component']))
+
+    for h in histograms.values():
+        h['mean_ms'] = round(h['sum_ms'] / h['count'], 3) if h['count'] else None
+
+    return {
+        'run_id': fragments[0]['run_id'] if fragments else RUN_ID,
+        'generated_at': datetime.now().isoformat(),
+        'components': sorted(fragment['component'] for fragment in fragments),
+        'latency_buckets_ms': LATENCY_BUCKETS_MS,
+        'counters': counters,
+        'histograms': histograms,
+        'athena_queries': athena_queries,
+        'athena_totals': {
+            'engine_execution_ms': sum(q['engine_execution_ms'] or 0 for q in athena_queries),
+            'data_scanned_bytes': sum(q['data_scanned_bytes'] or 0 for q in athena_queries),
+        },
+    }
+
+def load_fragments(run_id, s3_client=None):
+    prefix = FRAGMENT_PREFIX.format(run_id=run_id)
+    metrics_dir = os.environ.get("UCL_METRICS_DIR")
+    fragments = []
+    if metrics_dir:
+        directory = os.path.join(metrics_dir, prefix)
+        for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                fragments.append(json.load(f))
+        return fragments
+
+    s3_client = s3_client or boto3.client('s3')
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            body = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=obj['Key'])['Body'].read()
+            fragments.append(json.loads(body))
+    return fragments
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge a run's metrics fragments into raw/run_metrics.json")
+    parser.add_argument('--run-id', default=RUN_ID)
+    parser.add_argument('--report-key', default=REPORT_KEY, help=f"Where to write the report (default: {REPORT_KEY})")
+    args = parser.parse_args(argv)
+
+    fragments = load_fragments(args.run_id)
+    if not fragments:
+        print(f"No metrics fragments found for run {args.run_id}")
+        return 0
+
+    report = merge(fragments)
+    location = _write(args.report_key, report)
+    print(f"Merged {len(fragments)} fragments for run {args.run_id} into {location}")
+    for name, h in sorted(report['histograms'].items()):
+        print(f"  {name}: n={h['count']} mean={h['mean_ms']}ms max={h['max_ms']:.1f}ms")
+    totals = report['athena_totals']
+    print(f"  athena: {totals['engine_execution_ms']}ms engine, {totals['data_scanned_bytes']} bytes scanned")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
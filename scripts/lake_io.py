@@ -0,0 +1,159 @@
+"""
+Champions League Match Tracker - Lake I/O Helpers
+
+Small pandas/S3 helpers shared by the analytics scripts that read the
+extracted matches and write Parquet tables under processed/.
+
+Every function takes an optional `local_dir`: when set, keys are resolved
+as paths under that directory instead of s3://ucl-lake-2025/, so the same
+code runs against a local copy of the lake.
+"""
+
+import csv
+import io
+import json
+import os
+
+import boto3
+import pandas as pd
+
+from scripts import competitions
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+
+s3_client = boto3.client('s3', region_name='ap-southeast-1')
+
+def _match_csv_bodies(codes=None):
+    """Text of each competition's extracted CSV in S3 (competitions not extracted yet are skipped)"""
+    bodies = []
+    for code in codes or competitions.active_codes():
+        body = read_bytes(competitions.matches_key(code))
+        if body is None:
+            print(f"No extracted matches for {code}")
+            continue
+        bodies.append(body.decode('utf-8'))
+    return bodies
+
+def read_match_rows(path=None, codes=None):
+    """real_matches.csv rows as dicts of strings, from a local path or every competition's CSV in S3"""
+    if path:
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    return [row for body in _match_csv_bodies(codes) for row in csv.DictReader(io.StringIO(body))]
+
+def read_matches(path=None, codes=None):
+    """
+    Load real_matches.csv (local path, or every competition's extracted CSV in S3) as
+    typed columns: ids as strings, scores as nullable integers, completed as bool,
+    plus the competition code of each match.
+    """
+    if path:
+        matches = pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        frames = [pd.read_csv(io.StringIO(body), dtype=str, keep_default_na=False)
+                  for body in _match_csv_bodies(codes)]
+        if not frames:
+            raise FileNotFoundError("No extracted matches in S3; run extract_real_matches first")
+        matches = pd.concat(frames, ignore_index=True)
+    matches['competition'] = matches['match_short_name'].map(
+        {name: competitions.code_for_short_name(name) for name in matches['match_short_name'].unique()})
+    for column in ('home_score', 'away_score'):
+        matches[column] = pd.to_numeric(matches[column], errors='coerce').astype('Int64')
+    matches['season_year'] = pd.to_numeric(matches['season_year'], errors='coerce').astype('Int64')
+    matches['completed'] = matches['completed'] == 'True'
+    return matches
+
+def completed_matches(matches):
+    """Completed matches with both scores and a date, oldest first"""
+    mask = (matches['completed'] & matches['home_score'].notna() & matches['away_score'].notna()
+            & (matches['match_date'] != '') & (matches['home_team_id'] != '') & (matches['away_team_id'] != ''))
+    return matches[mask].sort_values(['match_date', 'match_datetime', 'match_id'], kind='stable').reset_index(drop=True)
+
+def fingerprint(df, columns):
+    """Order-independent hash of the given columns, to detect changes in already processed rows"""
+    if df.empty:
+        return '0'
+    return str(int(pd.util.hash_pandas_object(df[columns].astype(str), index=False).sum()))
+
+def read_bytes(key, local_dir=None):
+    """Object body, or None if it does not exist"""
+    if local_dir:
+        path = os.path.join(local_dir, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    try:
+        return s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)['Body'].read()
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+def write_bytes(key, body, local_dir=None, content_type='application/octet-stream'):
+    """Write an object and return its location"""
+    if local_dir:
+        path = os.path.join(local_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return path
+    s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=body, ContentType=content_type)
+    return f"s3://{S3_BUCKET_NAME}/{key}"
+
+def read_json(key, local_dir=None):
+    body = read_bytes(key, local_dir)
+    return json.loads(body) if body is not None else None
+
+def write_json(data, key, local_dir=None):
+    body = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    return write_bytes(key, body, local_dir, content_type='application/json')
+
+def write_parquet(df, key, local_dir=None):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return write_bytes(key, buffer.getvalue(), local_dir)
+
+def list_keys(prefix, local_dir=None):
+    if local_dir:
+        directory = os.path.join(local_dir, prefix)
+        keys = []
+        for root, _, files in os.walk(directory):
+            for name in files:
+                keys.append(os.path.relpath(os.path.join(root, name), local_dir).replace(os.sep, '/'))
+        return sorted(keys)
+    keys = []
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []))
+    return keys
+
+def list_objects(prefix, local_dir=None):
+    """[(key, version, last_modified)] under a prefix; version is the ETag (size and mtime locally)"""
+    if local_dir:
+        objects = []
+        for key in list_keys(prefix, local_dir):
+            stat = os.stat(os.path.join(local_dir, key))
+            modified = pd.Timestamp(stat.st_mtime_ns, unit='ns', tz='UTC')
+            objects.append((key, f"{stat.st_size}-{stat.st_mtime_ns}", modified))
+        return objects
+    objects = []
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix=prefix):
+        objects.extend((obj['Key'], obj['ETag'].strip('"'), pd.Timestamp(obj['LastModified']))
+                       for obj in page.get('Contents', []))
+    return objects
+
+def read_parquet_prefix(prefix, local_dir=None):
+    """Concatenate every Parquet file under a prefix, or None if there are none"""
+    frames = [pd.read_parquet(io.BytesIO(read_bytes(key, local_dir)))
+              for key in list_keys(prefix, local_dir) if key.endswith('.parquet')]
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+def delete_prefix(prefix, local_dir=None):
+    """Delete every object under a prefix. Returns the number deleted."""
+    keys = list_keys(prefix, local_dir)
+    if local_dir:
+        for key in keys:
+            os.remove(os.path.join(local_dir, key))
+        return len(keys)
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(Bucket=S3_BUCKET_NAME,
+                                 Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]]})
+    return len(keys)
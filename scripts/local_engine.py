@@ -0,0 +1,187 @@
+"""
+Champions League Match Tracker - Local SQL Engine
+
+Runs the Athena CTAS files in scripts/sql/ against local copies of the data
+in DuckDB, so table logic can be changed and regression-tested offline.
+
+Inputs (all local):
+- real_matches.csv, exposed as ucl_analytics_db.real_matches_csv and
+  ucl_analytics_db.real_matches_for_standings (all columns STRING, like the
+  Athena external tables)
+- raw/<entity>/competition=<code>/season=YYYY/*.json
+  (e.g. `aws s3 sync s3://ucl-lake-2025/raw/ raw/`), exposed as
+  ucl_analytics_db.raw(col0, partition_0, competition, year)
+
+Athena-specific SQL is translated before execution:
+- CREATE TABLE ... WITH (format=..., external_location=...) AS -> CREATE TABLE ... AS
+- TRY(CAST(x AS T))         -> TRY_CAST(x AS T); other TRY(...) wrappers are dropped
+                               because the functions below already return NULL on failure
+- REGEXP_EXTRACT            -> NULL instead of '' when there is no match
+- from_iso8601_timestamp(x) -> TRY_CAST(x AS TIMESTAMPTZ)
+- TIMESTAMP(3)              -> TIMESTAMP
+- table aliases that are reserved words in DuckDB (e.g. `at`) are quoted
+
+Usage:
+    python -m scripts.local_engine --raw-dir raw --output-dir local_tables
+"""
+
+import argparse
+import csv
+import os
+import re
+import time
+
+import duckdb
+
+from extract_real_matches import CSV_COLUMNS
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql')
+
+# Same order as the DAG's table builds
+SQL_FILES = [
+    'create_dim_teams.sql',
+    'create_dim_players.sql',
+    'create_fact_matches.sql',
+    'create_fact_standings.sql',
+]
+
+COMPAT_MACROS = [
+    "CREATE OR REPLACE MACRO athena_regexp_extract(s, p, g) AS NULLIF(regexp_extract(s, p, g), '')",
+    "CREATE OR REPLACE MACRO from_iso8601_timestamp(s) AS TRY_CAST(s AS TIMESTAMPTZ)",
+]
+
+# Valid table aliases in Athena but reserved in DuckDB
+RESERVED_ALIASES = ['at']
+
+CTAS_PROPERTIES = re.compile(r'(CREATE\s+TABLE\s+[\w.]+)\s+WITH\s*\(.*?\)\s*AS', re.IGNORECASE | re.DOTALL)
+
+def _matching_paren(sql, open_index):
+    """Index of the parenthesis closing the one at open_index (ignores string literals)"""
+    depth = 0
+    in_string = False
+    for i in range(open_index, len(sql)):
+        char = sql[i]
+        if char == "'":
+            in_string = not in_string
+        elif in_string:
+            continue
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError(f"Unbalanced parentheses at offset {open_index}")
+
+def _rewrite_try(sql):
+    pattern = re.compile(r'\bTRY\s*\(', re.IGNORECASE)
+    match = pattern.search(sql)
+    while match:
+        open_index = match.end() - 1
+        close_index = _matching_paren(sql, open_index)
+        inner = sql[open_index + 1:close_index].strip()
+
+        cast = re.match(r'CAST\s*\(', inner, re.IGNORECASE)
+        if cast and _matching_paren(inner, cast.end() - 1) == len(inner) - 1:
+            replacement = 'TRY_CAST(' + inner[cast.end():]
+        else:
+            replacement = inner
+
+        sql = sql[:match.start()] + replacement + sql[close_index + 1:]
+        match = pattern.search(sql, match.start())
+    return sql
+
+def translate_athena_sql(sql):
+    """Rewrite an Athena CTAS statement into DuckDB SQL"""
+    sql = CTAS_PROPERTIES.sub(r'\1 AS', sql, count=1)
+    sql = _rewrite_try(sql)
+    sql = re.sub(r'\bREGEXP_EXTRACT\s*\(', 'athena_regexp_extract(', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bTIMESTAMP\s*\(\s*\d+\s*\)', 'TIMESTAMP', sql, flags=re.IGNORECASE)
+    for alias in RESERVED_ALIASES:
+        sql = re.sub(rf'\b((?:FROM|JOIN)\s+[\w.]+\s+){alias}\b', rf'\1"{alias}"', sql, flags=re.IGNORECASE)
+        sql = re.sub(rf'(?<![\w."]){alias}\.', f'"{alias}".', sql)
+    return sql
+
+def table_name(sql):
+    return re.search(r'CREATE\s+TABLE\s+([\w.]+)', sql, re.IGNORECASE).group(1)
+
+def connect(matches_csv, raw_dir=None, database=':memory:'):
+    """Open DuckDB with the Athena source tables and compatibility macros in place"""
+    con = duckdb.connect(database)
+    con.execute("CREATE SCHEMA IF NOT EXISTS ucl_analytics_db")
+    for macro in COMPAT_MACROS:
+        con.execute(macro)
+
+    # Like Athena, columns missing from an older CSV read as NULL
+    with open(matches_csv, newline='', encoding='utf-8') as f:
+        present = next(csv.reader(f), [])
+    file_columns = [column for column in CSV_COLUMNS if column in present]
+    columns = ', '.join(f"'{column}': 'VARCHAR'" for column in file_columns)
+    select = ', '.join(column if column in present else f"CAST(NULL AS VARCHAR) AS {column}"
+                       for column in CSV_COLUMNS)
+    for view in ('real_matches_csv', 'real_matches_for_standings'):
+        con.execute(f"""
+            CREATE OR REPLACE VIEW ucl_analytics_db.{view} AS
+            SELECT {select} FROM read_csv('{matches_csv}', header = true, columns = {{{columns}}})
+        """)
+
+    # Raw files are single-line JSON after normalization, so one file is one row
+    if raw_dir and os.path.isdir(raw_dir):
+        pattern = os.path.join(raw_dir, '*', 'competition=*', 'season=*', '*.json')
+        con.execute(f"""
+            CREATE OR REPLACE VIEW ucl_analytics_db.raw AS
+            SELECT
+                content AS col0,
+                regexp_extract(filename, '([^/\\\\]+)[/\\\\]competition=', 1) AS partition_0,
+                regexp_extract(filename, 'competition=(\\w+)', 1) AS competition,
+                regexp_extract(filename, 'season=(\\d+)', 1) AS year
+            FROM read_text('{pattern}')
+        """)
+    else:
+        print(f"No raw directory at {raw_dir!r}; ucl_analytics_db.raw will be empty")
+        con.execute("""
+            CREATE OR REPLACE TABLE ucl_analytics_db.raw (
+                col0 VARCHAR, partition_0 VARCHAR, competition VARCHAR, year VARCHAR
+            )
+        """)
+    return con
+
+def run_sql_file(con, sql_path, output_dir=None):
+    """Execute one CTAS file. Returns (table, row_count, seconds)."""
+    with open(sql_path, encoding='utf-8') as f:
+        sql = translate_athena_sql(f.read().strip())
+
+    table = table_name(sql)
+    started = time.perf_counter()
+    con.execute(f"DROP TABLE IF EXISTS {table}")
+    con.execute(sql)
+    elapsed = time.perf_counter() - started
+
+    row_count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if output_dir:
+        path = os.path.join(output_dir, table.split('.')[-1])
+        os.makedirs(path, exist_ok=True)
+        con.execute(f"COPY {table} TO '{os.path.join(path, 'data.parquet')}' (FORMAT PARQUET)")
+    return table, row_count, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scripts/sql against local data in DuckDB")
+    parser.add_argument('--matches-csv', default='real_matches.csv', help="Extracted matches CSV")
+    parser.add_argument('--raw-dir', default='raw', help="Local copy of s3://ucl-lake-2025/raw/")
+    parser.add_argument('--output-dir', help="Write each table as Parquet under this directory")
+    parser.add_argument('--database', default=':memory:', help="DuckDB database file")
+    parser.add_argument('sql_files', nargs='*', help="SQL files to run (default: all four tables)")
+    args = parser.parse_args(argv)
+
+    sql_paths = args.sql_files or [os.path.join(SQL_DIR, name) for name in SQL_FILES]
+    con = connect(args.matches_csv, args.raw_dir, args.database)
+
+    print("=== Building tables locally in DuckDB ===")
+    total_started = time.perf_counter()
+    for sql_path in sql_paths:
+        table, row_count, elapsed = run_sql_file(con, sql_path, args.output_dir)
+        print(f"✓ {table}: {row_count} rows in {elapsed:.2f}s")
+    print(f"\nBuilt {len(sql_paths)} tables in {time.perf_counter() - total_started:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Champions League Match Tracker - Binary Match Archive
+
+Exports real_matches.csv to a fixed-width, column-oriented binary file
+that readers can mmap instead of parsing CSV:
+
+    magic "UCLMARC1" | uint64 header length | JSON header | columns
+
+The JSON header lists every column's dtype, byte offset and (for
+dictionary-encoded columns) its dictionary. Columns start on 64-byte
+boundaries and are little-endian, so each one is a zero-copy NumPy view
+over the mapped file:
+
+    match_id              int64
+    kickoff               int64   epoch seconds, -1 if unknown
+    match_date            int32   days since 1970-01-01, -1 if unknown
+    season_year           int16
+    completed             uint8
+    home_team, away_team  uint32  codes into the shared "team" dictionary
+    home_score, away_score int16  -1 if not played
+    status, venue,
+    match_name, match_short_name  uint16/uint32 dictionary codes
+
+Usage:
+    python -m scripts.match_archive --input real_matches.csv --output real_matches.ucla
+
+    from scripts.match_archive import open_archive
+    archive = open_archive('real_matches.ucla')
+    archive['home_score'], archive.decode('home_team')
+
+Output: s3://ucl-lake-2025/processed/match_archive/real_matches.ucla
+"""
+
+import argparse
+import json
+import mmap
+import struct
+
+import numpy as np
+import pandas as pd
+
+from scripts import lake_io
+
+ARCHIVE_KEY = "processed/match_archive/real_matches.ucla"
+
+MAGIC = b"UCLMARC1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# column -> dictionary it is encoded with (home and away share the team dictionary)
+DICTIONARY_COLUMNS = {
+    'home_team': 'team',
+    'away_team': 'team',
+    'status': 'status',
+    'venue': 'venue',
+    'match_name': 'match_name',
+    'match_short_name': 'match_short_name',
+}
+
+def _pad(length):
+    return -length % ALIGNMENT
+
+def _code_dtype(size):
+    return '<u2' if size <= np.iinfo(np.uint16).max else '<u4'
+
+def encode_columns(matches):
+    """Turn the typed matches frame (see lake_io.read_matches) into {name: array} and dictionaries"""
+    kickoff = pd.to_datetime(matches['match_datetime'], utc=True, errors='coerce')
+    match_date = pd.to_datetime(matches['match_date'], errors='coerce')
+
+    columns = {
+        'match_id': pd.to_numeric(matches['match_id'], errors='coerce').fillna(-1).to_numpy('<i8'),
+        'kickoff': np.where(kickoff.isna(), -1,
+                            kickoff.dt.tz_convert(None).to_numpy('datetime64[s]').astype('int64')).astype('<i8'),
+        'match_date': np.where(match_date.isna(), -1,
+                               match_date.to_numpy('datetime64[D]').astype('int64')).astype('<i4'),
+        'season_year': matches['season_year'].fillna(-1).to_numpy('<i2'),
+        'completed': matches['completed'].to_numpy('u1'),
+        'home_score': matches['home_score'].fillna(-1).to_numpy('<i2'),
+        'away_score': matches['away_score'].fillna(-1).to_numpy('<i2'),
+    }
+
+    sources = {
+        'home_team': matches['home_team_id'], 'away_team': matches['away_team_id'],
+        'status': matches['match_status'], 'venue': matches['venue'],
+        'match_name': matches['match_name'], 'match_short_name': matches['match_short_name'],
+    }
+    dictionaries = {}
+    for name in sorted(set(DICTIONARY_COLUMNS.values())):
+        values = pd.concat([sources[c] for c, d in DICTIONARY_COLUMNS.items() if d == name], ignore_index=True)
+        dictionaries[name] = sorted(values.unique().tolist())
+    for column, name in DICTIONARY_COLUMNS.items():
+        codes = pd.Index(dictionaries[name]).get_indexer(sources[column])
+        columns[column] = codes.astype(_code_dtype(len(dictionaries[name])))
+
+    return columns, dictionaries
+
+def write_archive(matches):
+    """Serialize the matches frame to archive bytes"""
+    columns, dictionaries = encode_columns(matches)
+
+    specs, offset = [], 0
+    for name, array in columns.items():
+        specs.append({'name': name, 'dtype': array.dtype.str, 'offset': offset, 'nbytes': array.nbytes,
+                      'dictionary': DICTIONARY_COLUMNS.get(name)})
+        offset += array.nbytes + _pad(array.nbytes)
+
+    header = {'version': FORMAT_VERSION, 'rows': len(matches), 'columns': specs, 'dictionaries': dictionaries}
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    prefix = MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes
+    data_start = len(prefix) + _pad(len(prefix))
+
+    body = bytearray(data_start + offset)
+    body[:len(prefix)] = prefix
+    for spec, array in zip(specs, columns.values()):
+        start = data_start + spec['offset']
+        body[start:start + spec['nbytes']] = array.tobytes()
+    return bytes(body)
+
+class MatchArchive:
+    """Read-only view over an archive; columns are NumPy arrays backed by the mapped file"""
+
+    def __init__(self, buffer):
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a match archive (bad magic)")
+        header_length, = struct.unpack_from('<Q', buffer, len(MAGIC))
+        header_end = len(MAGIC) + 8 + header_length
+        self.header = json.loads(bytes(buffer[len(MAGIC) + 8:header_end]))
+        if self.header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive version {self.header['version']}")
+
+        data_start = header_end + _pad(header_end)
+        self.rows = self.header['rows']
+        self.dictionaries = self.header['dictionaries']
+        self.columns = {
+            spec['name']: np.frombuffer(buffer, dtype=spec['dtype'], count=self.rows,
+                                        offset=data_start + spec['offset'])
+            for spec in self.header['columns']
+        }
+        self._specs = {spec['name']: spec for spec in self.header['columns']}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def decode(self, name):
+        """Dictionary-encoded column as a pandas Categorical; other columns are returned as-is"""
+        dictionary = self._specs[name]['dictionary']
+        if dictionary is None:
+            return self.columns[name]
+        return pd.Categorical.from_codes(self.columns[name], categories=self.dictionaries[dictionary])
+
+    def dates(self):
+        """match_date as datetime64[D] (NaT where unknown)"""
+        days = self.columns['match_date']
+        return np.where(days < 0, np.datetime64('NaT'), days.astype('datetime64[D]'))
+
+    def to_pandas(self):
+        frame = pd.DataFrame({name: self.decode(name) for name in self.columns})
+        frame['kickoff'] = pd.to_datetime(np.where(frame['kickoff'] < 0, np.nan, frame['kickoff']), unit='s', utc=True)
+        frame['match_date'] = self.dates()
+        return frame
+
+def open_archive(path):
+    """mmap an archive file; the file stays mapped as long as the returned object's arrays live"""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return MatchArchive(buffer)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export real_matches.csv to a memory-mappable binary archive")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output', help="Local archive path (default: upload to S3)")
+    args = parser.parse_args(argv)
+
+    matches = lake_io.read_matches(args.input)
+    body = write_archive(matches)
+    print(f"Archived {len(matches)} matches into {len(body)} bytes")
+
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(body)
+        archive = open_archive(args.output)
+        print(f"✓ Archive saved to {args.output} ({len(archive.dictionaries['team'])} teams, "
+              f"{len(archive.dictionaries['venue'])} venues)")
+    else:
+        print(f"✓ Uploaded to {lake_io.write_bytes(ARCHIVE_KEY, body)}")
+
+if __name__ == "__main__":
+    main()
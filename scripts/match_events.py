@@ -0,0 +1,301 @@
+"""
+Champions League Match Tracker - Match Event Publisher
+
+Turns the schedule deltas written by scripts/diff_schedules.py into score
+and status change events and delivers them in ordered batches, so
+consumers hear about new results within seconds of the diff instead of
+polling Athena after the daily rebuild.
+
+An event is emitted for every updated match whose home_score, away_score,
+match_status or completed flag changed:
+
+    {"event_id", "sequence", "type": "score" | "status" | "final", "match_id",
+     "competition", "season_year", "match_datetime", "home_team_id", "home_team_name",
+     "away_team_id", "away_team_name", "home_score", "away_score", "match_status",
+     "completed", "changed": [...], "previous": {field: old value}, "detected_at"}
+
+event_id is a hash of the match and its new score/status, so a replayed
+event has the same id and consumers can drop duplicates.
+
+Delivery goes through a Publisher: events wait in a pending buffer keyed by
+match_id, and a background thread sends them to every sink in batches of
+up to MAX_BATCH, at most MAX_DELAY seconds after the oldest was queued.
+A second change to a match still waiting replaces the first (coalescing),
+and publish() blocks once MAX_PENDING matches are waiting (backpressure),
+so a slow sink slows the producer instead of growing the buffer.
+
+Sinks (UCL_EVENT_SINKS, comma-separated, default "lake"):
+    lake           NDJSON batch objects under processed/match_events/date=YYYY-MM-DD/
+    file:<path>    NDJSON lines appended to a local file
+    webhook:<url>  one JSON POST per batch, retried with backoff
+QueueSink puts batches on an in-process queue for embedding.
+
+Usage:
+    python -m scripts.match_events replay --since 20251021T190000Z
+    python -m scripts.match_events replay --since 20251021T190000Z --sink file:events.ndjson
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from scripts import instrumentation, lake_io
+
+EVENT_FIELDS = ['home_score', 'away_score', 'match_status', 'completed']
+SCORE_FIELDS = ['home_score', 'away_score']
+MATCH_FIELDS = ['match_id', 'match_datetime', 'home_team_id', 'home_team_name', 'away_team_id', 'away_team_name']
+
+DELTA_PREFIX = "processed/schedule_deltas/"
+EVENTS_KEY = "processed/match_events/date={date}/batch_{batch_id}.ndjson"
+
+MAX_BATCH = int(os.environ.get("UCL_EVENT_MAX_BATCH", 100))
+MAX_DELAY = float(os.environ.get("UCL_EVENT_MAX_DELAY", 1.0))
+MAX_PENDING = int(os.environ.get("UCL_EVENT_MAX_PENDING", 1000))
+WEBHOOK_TIMEOUT = 10
+WEBHOOK_RETRIES = 3
+
+def event_id(record):
+    content = json.dumps([str(record.get('match_id'))] + [record.get(field) for field in EVENT_FIELDS], default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+def event_type(changed, record):
+    if 'completed' in changed and record.get('completed'):
+        return 'final'
+    return 'score' if any(field in changed for field in SCORE_FIELDS) else 'status'
+
+def events_from_delta(delta):
+    """Score/status events for the updated matches of one delta, in kickoff order"""
+    events = []
+    for update in delta.get('updated', []):
+        record = update['record']
+        changed = [field for field in EVENT_FIELDS if field in update.get('changed', [])]
+        if not changed:
+            continue
+        events.append({
+            'event_id': event_id(record),
+            'type': event_type(changed, record),
+            **{field: record.get(field) for field in MATCH_FIELDS},
+            'match_id': str(record['match_id']),
+            'competition': delta['competition'],
+            'season_year': delta['season_year'],
+            **{field: record.get(field) for field in EVENT_FIELDS},
+            'changed': changed,
+            'previous': {field: update.get('previous', {}).get(field) for field in changed},
+            'detected_at': delta['generated_at'],
+        })
+    return sorted(events, key=lambda event: (str(event['match_datetime']), event['match_id']))
+
+def coalesce(older, newer):
+    """One event for two changes of the same match: the newer values, everything that changed since the older"""
+    changed = [field for field in EVENT_FIELDS if field in older['changed'] or field in newer['changed']]
+    previous = {field: older['previous'].get(field, newer['previous'].get(field)) for field in changed}
+    # A change that was undone before delivery is not a change
+    changed = [field for field in changed if previous[field] != newer[field]]
+    return dict(newer, changed=changed, previous={field: previous[field] for field in changed},
+                type=event_type(changed, newer))
+
+def ndjson(events):
+    return ''.join(json.dumps(event, separators=(',', ':'), default=str) + '\n' for event in events).encode('utf-8')
+
+class LakeSink:
+    """One NDJSON object per batch under processed/match_events/ (S3, or local_dir)"""
+    def __init__(self, local_dir=None):
+        self.local_dir = local_dir
+
+    def send(self, batch):
+        key = EVENTS_KEY.format(date=batch['sent_at'][:10], batch_id=batch['batch_id'])
+        lake_io.write_bytes(key, ndjson(batch['events']), self.local_dir, content_type='application/x-ndjson')
+
+class FileSink:
+    """NDJSON lines appended to a local file"""
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, batch):
+        with open(self.path, 'ab') as f:
+            f.write(ndjson(batch['events']))
+
+class QueueSink:
+    """Batches on an in-process queue.Queue; a bounded queue pushes back on the publisher"""
+    def __init__(self, queue):
+        self.queue = queue
+
+    def send(self, batch):
+        self.queue.put(batch)
+
+class WebhookSink:
+    """One JSON POST per batch; 5xx and connection errors are retried with backoff"""
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT, retries=WEBHOOK_RETRIES):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+
+    def send(self, batch):
+        body = json.dumps(batch, separators=(',', ':'), default=str).encode('utf-8')
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(self.url, data=body, method='POST',
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                return
+            except urllib.error.HTTPError as e:
+                if e.code < 500 or attempt == self.retries:
+                    raise
+            except OSError:
+                if attempt == self.retries:
+                    raise
+            time.sleep(0.5 * 2 ** attempt)
+
+def sinks_from_spec(spec, local_dir=None):
+    """Sinks for a comma-separated spec such as "lake,webhook:https://example.com/hook" """
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        kind, _, target = item.partition(':')
+        if kind == 'lake':
+            sinks.append(LakeSink(local_dir))
+        elif kind == 'file' and target:
+            sinks.append(FileSink(target))
+        elif kind == 'webhook' and target:
+            sinks.append(WebhookSink(target))
+        else:
+            raise ValueError(f"Unknown event sink {item!r} (expected lake, file:<path> or webhook:<url>)")
+    return sinks
+
+def sinks_from_env(local_dir=None):
+    return sinks_from_spec(os.environ.get("UCL_EVENT_SINKS", "lake"), local_dir)
+
+class Publisher:
+    """Coalescing, bounded event buffer drained in ordered batches by a background thread"""
+    def __init__(self, sinks, max_batch=MAX_BATCH, max_delay=MAX_DELAY, max_pending=MAX_PENDING):
+        self.sinks = sinks
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.oldest = None
+        self.sequence = 0
+        self.closed = False
+        self.stats = Counter()
+        self.errors = []
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name='match-events', daemon=True)
+        self.thread.start()
+
+    def publish(self, events):
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Publisher is closed")
+            for event in events:
+                match_id = event['match_id']
+                older = self.pending.pop(match_id, None)
+                if older is not None:
+                    event = coalesce(older, event)
+                    self.stats['coalesced'] += 1
+                else:
+                    while len(self.pending) >= self.max_pending:
+                        self.stats['waits'] += 1
+                        self.condition.notify_all()
+                        self.condition.wait()
+                # Re-queued at the end: batches follow the order of each match's latest change
+                self.pending[match_id] = event
+                self.oldest = self.oldest or time.monotonic()
+                self.stats['published'] += 1
+            self.condition.notify_all()
+
+    def _next_batch(self):
+        """Wait for a full batch, the oldest event's deadline or close. None once closed and drained."""
+        with self.condition:
+            while True:
+                if self.pending:
+                    waited = time.monotonic() - self.oldest
+                    if len(self.pending) >= self.max_batch or waited >= self.max_delay or self.closed:
+                        break
+                    self.condition.wait(self.max_delay - waited)
+                elif self.closed:
+                    return None
+                else:
+                    self.condition.wait()
+
+            events = [self.pending.popitem(last=False)[1] for _ in range(min(self.max_batch, len(self.pending)))]
+            if not self.pending:
+                self.oldest = None
+            # Changes undone while waiting are dropped before they get a sequence number
+            events = [event for event in events if event['changed']]
+            for event in events:
+                self.sequence += 1
+                event['sequence'] = self.sequence
+            self.condition.notify_all()
+        if not events:
+            return {'events': []}
+        return {
+            'batch_id': f"{instrumentation.RUN_ID}-{events[0]['sequence']:06d}",
+            'sent_at': datetime.now(timezone.utc).isoformat(),
+            'events': events,
+        }
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch['events']:
+                continue
+            started = time.perf_counter()
+            for sink in self.sinks:
+                try:
+                    sink.send(batch)
+                except Exception as e:
+                    self.stats['failed_batches'] += 1
+                    self.errors.append(f"{type(sink).__name__} batch {batch['batch_id']}: {e}")
+            instrumentation.observe("match_events.batch_send", (time.perf_counter() - started) * 1000)
+            self.stats['batches'] += 1
+            self.stats['delivered'] += len(batch['events'])
+
+    def close(self):
+        """Send everything still pending and stop. Returns the delivery stats."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        for name, value in self.stats.items():
+            instrumentation.count(f"match_events.{name}", value)
+        return dict(self.stats)
+
+def delta_keys(since=None, local_dir=None):
+    """Delta keys in the order they were written (their timestamp), optionally from `since` on"""
+    keys = [key for key in lake_io.list_keys(DELTA_PREFIX, local_dir) if key.endswith('.json')]
+    stamped = sorted((key.rsplit('delta_', 1)[-1][:-len('.json')], key) for key in keys)
+    return [key for stamp, key in stamped if not since or stamp >= since]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish match score/status events from schedule deltas")
+    commands = parser.add_subparsers(dest='command', required=True)
+    replay = commands.add_parser('replay', help="Re-publish the events of stored deltas")
+    replay.add_argument('--since', help="First delta timestamp, e.g. 20251021T190000Z (default: all)")
+    replay.add_argument('--sink', help="Sink spec (default: UCL_EVENT_SINKS or lake)")
+    replay.add_argument('--local-dir', help="Local lake directory (default: S3)")
+    args = parser.parse_args(argv)
+
+    spec = args.sink or os.environ.get("UCL_EVENT_SINKS", "lake")
+    publisher = Publisher(sinks_from_spec(spec, args.local_dir))
+    keys = delta_keys(args.since, args.local_dir)
+    for key in keys:
+        publisher.publish(events_from_delta(lake_io.read_json(key, args.local_dir)))
+    stats = publisher.close()
+    for error in publisher.errors:
+        print(f"✗ {error}")
+    print(f"{'✗' if publisher.errors else '✓'} {stats.get('delivered', 0)} events from {len(keys)} deltas "
+          f"in {stats.get('batches', 0)} batches -> {spec}")
+    return 1 if publisher.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Champions League Match Tracker - Match Feature Store
+
+Precomputes rolling-form features for every (team, match) from the
+completed matches in real_matches.csv, for training and batch scoring an
+outcome model without recomputing form per query.
+
+Features only use matches played before the one they describe:
+- {stat}_last{N}: mean points, wins, goals for and goals against over the
+  team's previous N matches (N in WINDOWS; fewer early on)
+- matches_before: matches the team had played
+- rest_days: days since the team's previous match
+Labels: goals_for, goals_against, points of the match itself.
+
+Windows are differences of per-team cumulative sums (groupby cumsum/shift),
+so there is no per-group Python. Runs are incremental like
+scripts/team_ratings.py: only matches after the last processed date are
+computed, using each team's last max(WINDOWS) matches as context, and
+appended as a new Parquet part.
+
+Output: s3://ucl-lake-2025/processed/match_features/part-<first>_<last>.parquet
+State:  s3://ucl-lake-2025/processed/match_features_state/state.json
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from scripts import lake_io
+
+TABLE_PREFIX = "processed/match_features/"
+PART_KEY = TABLE_PREFIX + "part-{first}_{last}.parquet"
+STATE_KEY = "processed/match_features_state/state.json"
+
+WINDOWS = (3, 5, 10)
+ROLLING_STATS = ['points', 'win', 'goals_for', 'goals_against']
+
+SOURCE_FIELDS = ['match_id', 'match_date', 'match_datetime', 'home_team_id', 'away_team_id',
+                 'home_score', 'away_score']
+
+def team_rows(matches):
+    """One row per team per match, sorted by team and kickoff"""
+    common = {
+        'match_id': matches['match_id'],
+        'match_date': matches['match_date'],
+        'kickoff': pd.to_datetime(matches['match_datetime'], utc=True, errors='coerce')
+                     .fillna(pd.to_datetime(matches['match_date'], utc=True)),
+        'season_year': matches['season_year'].astype('int32'),
+        'competition': matches['competition'],
+    }
+    home = pd.DataFrame(dict(common, team_id=matches['home_team_id'], opponent_id=matches['away_team_id'],
+                             is_home=True, goals_for=matches['home_score'], goals_against=matches['away_score']))
+    away = pd.DataFrame(dict(common, team_id=matches['away_team_id'], opponent_id=matches['home_team_id'],
+                             is_home=False, goals_for=matches['away_score'], goals_against=matches['home_score']))
+    rows = pd.concat([home, away], ignore_index=True)
+    rows['goals_for'] = rows['goals_for'].astype('int64')
+    rows['goals_against'] = rows['goals_against'].astype('int64')
+    rows['win'] = (rows['goals_for'] > rows['goals_against']).astype('int64')
+    rows['points'] = np.select([rows['goals_for'] > rows['goals_against'], rows['goals_for'] == rows['goals_against']],
+                               [3, 1], 0)
+    return rows.sort_values(['team_id', 'kickoff', 'match_id'], kind='stable').reset_index(drop=True)
+
+def compute_features(rows, windows=WINDOWS, matches_offset=None):
+    """
+    Add the rolling features to team rows (sorted by team and kickoff).
+    matches_offset maps team_id to matches played before the first row given.
+    """
+    rows = rows.copy()
+    by_team = rows.groupby('team_id', sort=False)
+    position = by_team.cumcount()
+
+    for stat in ROLLING_STATS:
+        # Sum of all earlier matches of the team at each row
+        before = by_team[stat].cumsum() - rows[stat]
+        for window in windows:
+            earlier = before.groupby(rows['team_id'], sort=False).shift(window, fill_value=0)
+            count = np.minimum(position, window)
+            rows[f'{stat}_last{window}'] = ((before - earlier) / count.where(count > 0)).round(3)
+
+    offset = rows['team_id'].map(matches_offset or {}).fillna(0).astype('int64')
+    rows['matches_before'] = position + offset
+    rows['rest_days'] = (rows['kickoff'] - by_team['kickoff'].shift(1)).dt.total_seconds() / 86400
+    rows['rest_days'] = rows['rest_days'].round(2)
+    return rows
+
+def training_frame(features):
+    """One row per match: home_* and away_* features side by side, labelled with the result"""
+    columns = [c for c in features.columns if c.endswith(tuple(f'_last{w}' for w in WINDOWS))]
+    columns += ['matches_before', 'rest_days']
+    home = features[features['is_home']].set_index('match_id')
+    away = features[~features['is_home']].set_index('match_id')
+    frame = home[['match_date', 'season_year', 'team_id', 'opponent_id']].rename(
+        columns={'team_id': 'home_team_id', 'opponent_id': 'away_team_id'})
+    frame = frame.join(home[columns].add_prefix('home_')).join(away[columns].add_prefix('away_'), how='inner')
+    frame['result'] = np.sign(home['goals_for'] - home['goals_against']).reindex(frame.index)
+    return frame.reset_index()
+
+def build(matches, history=None):
+    """Features for `matches`, with `history` (already processed matches) as context"""
+    rows = team_rows(matches)
+    if history is None or history.empty:
+        return compute_features(rows)
+
+    context = team_rows(history)
+    tail = context.groupby('team_id', sort=False).tail(max(WINDOWS))
+    offset = (context['team_id'].value_counts() - tail['team_id'].value_counts()).to_dict()
+    combined = pd.concat([tail, rows], ignore_index=True).sort_values(['team_id', 'kickoff', 'match_id'], kind='stable')
+    features = compute_features(combined.reset_index(drop=True), matches_offset=offset)
+    return features[features['match_id'].isin(set(matches['match_id']))].reset_index(drop=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build rolling-form match features into Parquet")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output-dir', help="Local lake directory (default: write to S3)")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the state and recompute all matches")
+    args = parser.parse_args(argv)
+
+    matches = lake_io.completed_matches(lake_io.read_matches(args.input))
+    print(f"=== Building match features from {len(matches)} completed matches ===")
+
+    state = None if args.rebuild else lake_io.read_json(STATE_KEY, args.output_dir)
+    if state and state['windows'] != list(WINDOWS):
+        print("Feature windows changed, rebuilding")
+        state = None
+    if state:
+        history = matches[matches['match_date'] <= state['last_date']]
+        if lake_io.fingerprint(history, SOURCE_FIELDS) != state['history_hash']:
+            print(f"Matches on or before {state['last_date']} changed, rebuilding")
+            state = None
+
+    if state:
+        new = matches[matches['match_date'] > state['last_date']]
+        if new.empty:
+            print(f"✓ Features up to date through {state['last_date']}")
+            return
+        features = build(new, history)
+    else:
+        deleted = lake_io.delete_prefix(TABLE_PREFIX, args.output_dir)
+        if deleted:
+            print(f"Removed {deleted} existing parts")
+        new = matches
+        features = build(new)
+
+    if features.empty:
+        print("No completed matches to process")
+        return
+
+    first, last = new['match_date'].iloc[0], new['match_date'].iloc[-1]
+    features = features.sort_values(['kickoff', 'match_id', 'is_home'], ascending=[True, True, False], kind='stable')
+    location = lake_io.write_parquet(features, PART_KEY.format(first=first, last=last), args.output_dir)
+    print(f"✓ Features for {len(new)} matches from {first} to {last} ({len(features)} rows) -> {location}")
+
+    lake_io.write_json({
+        'windows': list(WINDOWS),
+        'last_date': last,
+        'history_hash': lake_io.fingerprint(matches[matches['match_date'] <= last], SOURCE_FIELDS),
+    }, STATE_KEY, args.output_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Champions League Match Tracker - Analytics Rollups
+
+Materializes match aggregates at the grouping levels dashboards ask for,
+so they read a few kilobytes instead of scanning fact_matches:
+
+- season:                 matches, home/away wins, draws, goals, rates
+- season_team:            per team and season
+- season_team_home_away:  per team, season and home/away
+- venue:                  per venue over all seasons
+
+Every level is also split by competition (its leading key column).
+
+Team levels carry matches, W/D/L, goals for/against, goal difference and
+points (3/1/0). Every table is rebuilt from the completed matches in
+real_matches.csv on each run, which is one vectorized groupby per level.
+
+Output: s3://ucl-lake-2025/processed/rollups/<level>/rollup.parquet
+"""
+
+import argparse
+
+import numpy as np
+
+from scripts import lake_io
+from scripts.match_features import team_rows
+
+ROLLUP_KEY = "processed/rollups/{level}/rollup.parquet"
+
+TEAM_LEVELS = {
+    'season_team': ['competition', 'season_year', 'team_id'],
+    'season_team_home_away': ['competition', 'season_year', 'team_id', 'home_away'],
+}
+
+def _match_outcomes(matches):
+    matches = matches.assign(
+        home_win=(matches['home_score'] > matches['away_score']).astype('int64'),
+        draw=(matches['home_score'] == matches['away_score']).astype('int64'),
+        away_win=(matches['home_score'] < matches['away_score']).astype('int64'),
+        goals=(matches['home_score'] + matches['away_score']).astype('int64'),
+    )
+    matches['season_year'] = matches['season_year'].astype('int32')
+    matches['home_score'] = matches['home_score'].astype('int64')
+    matches['away_score'] = matches['away_score'].astype('int64')
+    return matches
+
+def _match_rollup(matches, keys):
+    rollup = matches.groupby(keys, sort=True).agg(
+        matches=('match_id', 'size'),
+        home_wins=('home_win', 'sum'),
+        draws=('draw', 'sum'),
+        away_wins=('away_win', 'sum'),
+        home_goals=('home_score', 'sum'),
+        away_goals=('away_score', 'sum'),
+        goals=('goals', 'sum'),
+    ).reset_index()
+    rollup['goals_per_match'] = (rollup['goals'] / rollup['matches']).round(3)
+    rollup['home_win_rate'] = (rollup['home_wins'] / rollup['matches']).round(3)
+    return rollup
+
+def _team_rollup(rows, keys):
+    rollup = rows.groupby(keys, sort=True).agg(
+        matches=('match_id', 'size'),
+        wins=('win', 'sum'),
+        draws=('draw', 'sum'),
+        losses=('loss', 'sum'),
+        goals_for=('goals_for', 'sum'),
+        goals_against=('goals_against', 'sum'),
+        points=('points', 'sum'),
+    ).reset_index()
+    rollup['goal_difference'] = rollup['goals_for'] - rollup['goals_against']
+    rollup['win_rate'] = (rollup['wins'] / rollup['matches']).round(3)
+    rollup['points_per_match'] = (rollup['points'] / rollup['matches']).round(3)
+    return rollup
+
+def build_rollups(matches):
+    """{level: DataFrame} for completed matches (see lake_io.completed_matches)"""
+    outcomes = _match_outcomes(matches)
+    rows = team_rows(matches)
+    rows['home_away'] = np.where(rows['is_home'], 'home', 'away')
+    rows['draw'] = (rows['goals_for'] == rows['goals_against']).astype('int64')
+    rows['loss'] = (rows['goals_for'] < rows['goals_against']).astype('int64')
+
+    rollups = {'season': _match_rollup(outcomes, ['competition', 'season_year'])}
+    for level, keys in TEAM_LEVELS.items():
+        rollups[level] = _team_rollup(rows, keys)
+    rollups['venue'] = _match_rollup(outcomes[outcomes['venue'] != ''], ['competition', 'venue'])
+    return rollups
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write season/team/venue rollups of the completed matches")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output-dir', help="Local lake directory (default: write to S3)")
+    args = parser.parse_args(argv)
+
+    matches = lake_io.completed_matches(lake_io.read_matches(args.input))
+    print(f"=== Building rollups from {len(matches)} completed matches ===")
+
+    for level, rollup in build_rollups(matches).items():
+        location = lake_io.write_parquet(rollup, ROLLUP_KEY.format(level=level), args.output_dir)
+        print(f"✓ {level}: {len(rollup)} rows -> {location}")
+
+if __name__ == "__main__":
+    main()
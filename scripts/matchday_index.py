@@ -0,0 +1,105 @@
+"""
+Champions League Match Tracker - Matchday Index
+
+Builds an index of kickoff windows from the extracted schedules of every
+competition (real_matches.csv) so the live pipeline only polls the API
+while matches are actually being played, and only for the competitions
+playing in the window.
+
+Each window spans from shortly before the first kickoff to the expected
+end of the last match in a group of overlapping fixtures. Windows whose
+matches are all completed are marked as closed.
+
+Output: s3://ucl-lake-2025/processed/matchday_index/matchday_index.json
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+
+import boto3
+
+from scripts import competitions, lake_io
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+INDEX_KEY = "processed/matchday_index/matchday_index.json"
+
+# Start polling a little before kickoff, stop once extra time and penalties are over
+PRE_KICKOFF = timedelta(minutes=15)
+MATCH_DURATION = timedelta(minutes=150)
+
+def parse_kickoff(value):
+    """Parse an ISO kickoff timestamp, returning an aware UTC datetime or None"""
+    if not value:
+        return None
+    try:
+        kickoff = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if kickoff.tzinfo is None:
+        kickoff = kickoff.replace(tzinfo=timezone.utc)
+    return kickoff.astimezone(timezone.utc)
+
+def build_index(rows, pre_kickoff=PRE_KICKOFF, match_duration=MATCH_DURATION):
+    """Group match rows into merged kickoff windows"""
+    fixtures = []
+    for row in rows:
+        kickoff = parse_kickoff(row.get('match_datetime'))
+        if kickoff is None:
+            continue
+        fixtures.append((kickoff, row))
+    fixtures.sort(key=lambda item: item[0])
+
+    windows = []
+    for kickoff, row in fixtures:
+        start = kickoff - pre_kickoff
+        end = kickoff + match_duration
+        pending = str(row.get('completed')) != 'True'
+
+        if windows and start <= windows[-1]['end']:
+            window = windows[-1]
+            window['end'] = max(window['end'], end)
+        else:
+            window = {'start': start, 'end': end, 'season_year': int(row['season_year']),
+                      'competitions': [], 'match_ids': [], 'pending_matches': 0}
+            windows.append(window)
+
+        competition = competitions.code_for_short_name(row.get('match_short_name'))
+        if competition not in window['competitions']:
+            window['competitions'].append(competition)
+        window['match_ids'].append(str(row['match_id']))
+        window['pending_matches'] += int(pending)
+
+    return {
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'matchdays': sorted({w['start'].date().isoformat() for w in windows}),
+        'windows': [
+            dict(w, start=w['start'].isoformat(), end=w['end'].isoformat())
+            for w in windows
+        ],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the matchday index from real_matches.csv")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output', help="Local JSON path (default: upload to S3)")
+    args = parser.parse_args(argv)
+
+    s3 = boto3.client('s3', region_name='ap-southeast-1')
+
+    index = build_index(lake_io.read_match_rows(args.input))
+    body = json.dumps(index, separators=(',', ':'))
+    open_windows = sum(1 for w in index['windows'] if w['pending_matches'])
+    print(f"Built {len(index['windows'])} kickoff windows over {len(index['matchdays'])} matchdays "
+          f"({open_windows} with pending matches)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(body)
+        print(f"Index saved to {args.output}")
+    else:
+        s3.put_object(Bucket=S3_BUCKET_NAME, Key=INDEX_KEY, Body=body, ContentType='application/json')
+        print(f"Uploaded to s3://{S3_BUCKET_NAME}/{INDEX_KEY}")
+
+if __name__ == "__main__":
+    main()
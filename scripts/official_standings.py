@@ -0,0 +1,135 @@
+"""
+Champions League Match Tracker - Official Standings
+
+Flattens the standings payloads that ingestion stores every run
+(raw/standings/competition=<code>/season=YYYY/standings_YYYY.json) into one
+typed row per competition, team and group, for both the group stage
+("Group A".."Group H") and the single league-phase table.
+
+The payload is walked rather than addressed by fixed paths: any object
+with an "entries" list of team entries is a table, named after its own or
+its nearest parent's name/group. Stats may be a dict or an ESPN-style list
+of {"name", "value"} objects.
+
+Output: s3://ucl-lake-2025/processed/official_standings/standings.parquet
+"""
+
+import argparse
+import json
+import re
+import sys
+
+import pandas as pd
+
+from scripts import lake_io
+
+RAW_PREFIX = "raw/standings/"
+STANDINGS_KEY = "processed/official_standings/standings.parquet"
+
+# Output column -> stat names used by the API for it, in order of preference
+STAT_NAMES = {
+    'position': ['rank', 'position'],
+    'games_played': ['gamesPlayed', 'played'],
+    'wins': ['wins'],
+    'draws': ['ties', 'draws'],
+    'losses': ['losses'],
+    'goals_for': ['pointsFor', 'goalsFor'],
+    'goals_against': ['pointsAgainst', 'goalsAgainst'],
+    'goal_difference': ['pointDifferential', 'goalDifference'],
+    'points': ['points'],
+}
+
+COLUMNS = ['competition', 'season_year', 'phase', 'group_name', 'position', 'team_id', 'team_name', 'team_abbrev',
+           *[column for column in STAT_NAMES if column != 'position']]
+
+def _stats(entry):
+    stats = entry.get('stats') or {}
+    if isinstance(stats, list):
+        stats = {s.get('name') or s.get('type'): s.get('value') for s in stats if isinstance(s, dict)}
+    return stats
+
+def iter_tables(node, group_name=None):
+    """Yield (group_name, entries) for every standings table in a payload"""
+    if isinstance(node, dict):
+        name = node.get('group') or node.get('name') or group_name
+        if isinstance(name, dict):
+            name = name.get('name') or name.get('displayName') or group_name
+        entries = node.get('entries')
+        if isinstance(entries, list) and any(isinstance(e, dict) and 'team' in e for e in entries):
+            yield name, entries
+        for key, value in node.items():
+            if key != 'entries':
+                yield from iter_tables(value, name)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_tables(item, group_name)
+
+def parse_standings(data, year, competition):
+    """Rows for one competition's season payload"""
+    rows = []
+    for group_name, entries in iter_tables(data):
+        group_name = group_name or 'League Phase'
+        phase = 'groups' if re.match(r'group\s+\w\b', group_name, re.IGNORECASE) else 'league'
+        for index, entry in enumerate(e for e in entries if isinstance(e, dict)):
+            team = entry.get('team') or {}
+            stats = _stats(entry)
+            row = {
+                'competition': competition,
+                'season_year': year,
+                'phase': phase,
+                'group_name': group_name,
+                'team_id': str(team.get('id') or ''),
+                'team_name': team.get('displayName') or team.get('name'),
+                'team_abbrev': team.get('abbreviation'),
+            }
+            for column, names in STAT_NAMES.items():
+                row[column] = next((stats[n] for n in names if stats.get(n) not in (None, '')), None)
+            if row['position'] is None:
+                row['position'] = index + 1
+            rows.append(row)
+    return rows
+
+def to_frame(rows):
+    frame = pd.DataFrame(rows, columns=COLUMNS)
+    frame = frame[frame['team_id'] != '']
+    for column in ['season_year', *[c for c in STAT_NAMES]]:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').round().astype('Int32')
+    missing_gd = frame['goal_difference'].isna()
+    frame.loc[missing_gd, 'goal_difference'] = frame['goals_for'] - frame['goals_against']
+    return frame.sort_values(['competition', 'season_year', 'group_name', 'position'],
+                             kind='stable').reset_index(drop=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flatten raw standings payloads into typed Parquet")
+    parser.add_argument('--raw-dir', help="Local lake directory holding raw/standings/ (default: S3)")
+    parser.add_argument('--output-dir', help="Local lake directory (default: write to S3)")
+    args = parser.parse_args(argv)
+
+    print("=== Parsing official standings ===")
+    rows = []
+    for key in lake_io.list_keys(RAW_PREFIX, args.raw_dir):
+        match = re.search(r'competition=(\w+)/season=(\d{4})/[^/]*\.json$', key)
+        if not match:
+            continue
+        competition, season = match.group(1), match.group(2)
+        try:
+            data = json.loads(lake_io.read_bytes(key, args.raw_dir))
+        except json.JSONDecodeError as e:
+            print(f"✗ {key}: invalid JSON ({e})")
+            continue
+        season_rows = parse_standings(data, int(season), competition)
+        groups = len({row['group_name'] for row in season_rows})
+        print(f"  {competition} {season}: {len(season_rows)} rows in {groups} tables")
+        rows.extend(season_rows)
+
+    frame = to_frame(rows)
+    if frame.empty:
+        print("ERROR: No standings rows found")
+        return 1
+    location = lake_io.write_parquet(frame, STANDINGS_KEY, args.output_dir)
+    seasons = len(frame[['competition', 'season_year']].drop_duplicates())
+    print(f"✓ {len(frame)} standings rows for {seasons} competition seasons -> {location}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
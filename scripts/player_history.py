@@ -0,0 +1,188 @@
+"""
+Champions League Match Tracker - Player/Team History (SCD2)
+
+Builds dim_player_team_bridge, a type-2 slowly changing bridge between
+players and teams, from the roster payloads ingestion stores under
+raw/team_rosters/competition=<code>/season=YYYY/team_<id>_roster_YYYY.json.
+
+Each row is one version of a player in one competition: the team they
+were listed for plus their name, position and jersey number, valid from
+the time a roster first showed it until valid_to (NULL while current).
+A player keeps one current row per competition, so a club's UCL and UEL
+rosters do not close each other's rows. Per roster, every player's
+tracked fields are hashed and compared with their current row in that
+competition:
+
+    new player          -> open a row
+    changed hash        -> close the current row, open a new one (transfer, new number, ...)
+    same hash           -> keep the row, only last_season moves forward
+    left the roster     -> close the current row
+    from an older season than the current row -> ignored (stale)
+
+Runs are incremental: the state file keeps the version (ETag) of every
+roster already applied, so only re-fetched rosters whose content changed
+are read. Rows closed by a run are appended as their own Parquet part and
+never rewritten; only the current rows are.
+
+Output: s3://ucl-lake-2025/processed/dim_player_team_bridge/current.parquet
+        s3://ucl-lake-2025/processed/dim_player_team_bridge/closed-<run_id>.parquet
+State:  s3://ucl-lake-2025/processed/player_team_bridge_state/state.json
+"""
+
+import argparse
+import io
+import json
+import re
+import sys
+
+import pandas as pd
+
+from scripts import instrumentation, lake_io
+
+RAW_PREFIX = "raw/team_rosters/"
+TABLE_PREFIX = "processed/dim_player_team_bridge/"
+CURRENT_KEY = TABLE_PREFIX + "current.parquet"
+CLOSED_KEY = TABLE_PREFIX + "closed-{run_id}.parquet"
+STATE_KEY = "processed/player_team_bridge_state/state.json"
+
+ROSTER_KEY = re.compile(r'competition=(\w+)/season=(\d{4})/team_([^_/]+)_roster_\d{4}\.json$')
+
+# Current rows are keyed on (player_id, competition); a change in any tracked field opens a new version
+KEY_FIELDS = ['player_id', 'competition']
+TRACKED_FIELDS = ['team_id', 'player_name', 'position', 'position_abbr', 'jersey_number']
+COLUMNS = [*KEY_FIELDS, *TRACKED_FIELDS, 'first_season', 'last_season', 'row_hash',
+           'valid_from', 'valid_to', 'is_current']
+
+def iter_athletes(payload):
+    """Athlete objects of a roster, flat or grouped by position ({"items": [...]})"""
+    athletes = payload.get('athletes') if isinstance(payload, dict) else payload
+    for athlete in athletes or []:
+        if isinstance(athlete, dict) and isinstance(athlete.get('items'), list):
+            yield from (item for item in athlete['items'] if isinstance(item, dict))
+        elif isinstance(athlete, dict):
+            yield athlete
+
+def parse_roster(payload, competition, season, team_id):
+    """One row per player listed in a roster payload"""
+    rows = []
+    for athlete in iter_athletes(payload):
+        player_id = str(athlete.get('id') or '')
+        if not player_id:
+            continue
+        position = athlete.get('position') if isinstance(athlete.get('position'), dict) else {}
+        name = athlete.get('displayName') or athlete.get('fullName') or ' '.join(
+            filter(None, [athlete.get('firstName'), athlete.get('lastName')]))
+        rows.append({
+            'player_id': player_id,
+            'team_id': team_id,
+            'competition': competition,
+            'player_name': name or None,
+            'position': position.get('displayName') or position.get('name') or athlete.get('position') or None,
+            'position_abbr': position.get('abbreviation'),
+            'jersey_number': str(athlete['jersey']) if athlete.get('jersey') not in (None, '') else None,
+        })
+    roster = pd.DataFrame(rows, columns=[*KEY_FIELDS, *TRACKED_FIELDS]).drop_duplicates('player_id', keep='last')
+    roster['row_hash'] = row_hashes(roster)
+    return roster
+
+def row_hashes(frame):
+    return pd.util.hash_pandas_object(frame[TRACKED_FIELDS].astype(str), index=False).astype(str)
+
+def empty_bridge():
+    bridge = pd.DataFrame(columns=COLUMNS)
+    return bridge.astype({'first_season': 'int32', 'last_season': 'int32', 'is_current': bool,
+                          'valid_from': 'datetime64[ms]', 'valid_to': 'datetime64[ms]'})
+
+def apply_roster(current, roster, competition, season, team_id, observed_at):
+    """
+    Apply one roster observation to the current rows.
+    Returns (current, closed): the new current rows and the rows this observation closed.
+    """
+    # Only the player's rows in this roster's competition are compared, closed or extended
+    other = current['competition'] != competition
+    others, current = current[other], current[~other]
+    open_rows = current.set_index('player_id')
+    known = roster['player_id'].isin(open_rows.index)
+    open_hash = roster['player_id'].map(open_rows['row_hash'])
+    open_season = roster['player_id'].map(open_rows['last_season'])
+    stale = known & (open_season > season)
+    changed = known & ~stale & (open_hash != roster['row_hash'])
+    unchanged = known & ~stale & ~changed
+
+    # Players this team listed before (up to this season) who are no longer on it
+    departed = ((current['team_id'] == team_id) & (current['last_season'] <= season)
+                & ~current['player_id'].isin(roster['player_id']))
+    closing = departed | current['player_id'].isin(roster.loc[changed, 'player_id'])
+    closed = current[closing].assign(valid_to=observed_at, is_current=False)
+
+    current = current[~closing].copy()
+    seen = current['player_id'].isin(roster.loc[unchanged, 'player_id'])
+    current.loc[seen, 'last_season'] = current.loc[seen, 'last_season'].clip(lower=season)
+
+    opened = roster[~known | changed].assign(first_season=season, last_season=season, valid_from=observed_at,
+                                             valid_to=pd.NaT, is_current=True)
+    parts = [part for part in (others, current, opened[COLUMNS]) if len(part)]
+    current = pd.concat(parts, ignore_index=True) if parts else empty_bridge()
+    return current.astype(empty_bridge().dtypes.to_dict()), closed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the SCD2 player/team bridge from roster payloads")
+    parser.add_argument('--raw-dir', help="Local lake directory holding raw/team_rosters/ (default: S3)")
+    parser.add_argument('--output-dir', help="Local lake directory (default: write to S3)")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the state and replay every roster")
+    parser.add_argument('--run-id', default=instrumentation.RUN_ID, help="Names this run's closed-rows part")
+    args = parser.parse_args(argv)
+
+    state = None if args.rebuild else lake_io.read_json(STATE_KEY, args.output_dir)
+    if state:
+        body = lake_io.read_bytes(CURRENT_KEY, args.output_dir)
+        current = pd.read_parquet(io.BytesIO(body)) if body else empty_bridge()
+        # Hashes are recomputed so rows written with another TRACKED_FIELDS compare like new ones
+        current['row_hash'] = row_hashes(current)
+    else:
+        deleted = lake_io.delete_prefix(TABLE_PREFIX, args.output_dir)
+        if deleted:
+            print(f"Removed {deleted} existing parts")
+        state = {'rosters': {}}
+        current = empty_bridge()
+
+    rosters = []
+    for key, version, modified in lake_io.list_objects(RAW_PREFIX, args.raw_dir):
+        match = ROSTER_KEY.search(key)
+        if match and state['rosters'].get(key) != version:
+            rosters.append((int(match.group(2)), modified, key, version, match.group(1), match.group(3)))
+
+    print(f"=== Applying {len(rosters)} new or changed rosters to {len(current)} current players ===")
+    before = lake_io.fingerprint(current, COLUMNS)
+    closed_parts = []
+    # Oldest season first, then in the order they were fetched
+    for season, modified, key, version, competition, team_id in sorted(rosters):
+        try:
+            payload = json.loads(lake_io.read_bytes(key, args.raw_dir))
+        except json.JSONDecodeError as e:
+            print(f"✗ {key}: invalid JSON ({e})")
+            continue
+        roster = parse_roster(payload, competition, season, team_id)
+        observed_at = modified.tz_convert(None).floor('ms')
+        current, closed = apply_roster(current, roster, competition, season, team_id, observed_at)
+        if len(closed):
+            closed_parts.append(closed)
+        state['rosters'][key] = version
+
+    if closed_parts:
+        closed = pd.concat(closed_parts, ignore_index=True)
+        location = lake_io.write_parquet(closed, CLOSED_KEY.format(run_id=args.run_id), args.output_dir)
+        print(f"✓ Closed {len(closed)} player versions -> {location}")
+    # Re-fetched rosters are usually identical; the current rows are only rewritten when something moved
+    if closed_parts or lake_io.fingerprint(current, COLUMNS) != before or not state.get('current_rows'):
+        location = lake_io.write_parquet(current, CURRENT_KEY, args.output_dir)
+        print(f"✓ {len(current)} current player versions -> {location}")
+    else:
+        print(f"✓ Player history up to date ({len(current)} current players)")
+
+    state['current_rows'] = len(current)
+    lake_io.write_json(state, STATE_KEY, args.output_dir)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Champions League Match Tracker - Opt-in Profiling
+
+Wraps pipeline stages in cProfile and tracemalloc when profiling is turned
+on (UCL_PROFILE=1, or --profile on ingest_data, extract_real_matches and
+fix_json_format). For every stage it writes, next to the run's metrics:
+
+    raw/_profiles/<run_id>/<stage>.pstats            cProfile stats of the stage's thread
+    raw/_profiles/<run_id>/<stage>.collapsed.txt     sampled stacks of all threads, for
+                                                     flamegraph.pl / speedscope
+    raw/_profiles/<run_id>/<stage>.allocations.txt   top allocation sites (tracemalloc)
+
+Set UCL_METRICS_DIR (or UCL_PROFILE_DIR) to write them locally instead of S3.
+Only one stage is profiled at a time: a stage opened while another is
+running (nested, or from another thread) is folded into it.
+
+When profiling is off, stage() is a no-op context manager and neither
+cProfile nor tracemalloc is imported.
+
+Usage:
+    with profiling.stage("extract.ucl"):
+        ...
+    python -m pstats profiles/raw/_profiles/<run_id>/extract.ucl.pstats
+"""
+
+import contextlib
+import io
+import os
+import re
+import sys
+import threading
+import time
+
+from scripts import instrumentation
+
+PROFILE_PREFIX = "raw/_profiles/{run_id}/"
+
+# Stack sampling interval for the collapsed-stack output
+SAMPLE_INTERVAL = float(os.environ.get("UCL_PROFILE_INTERVAL_MS", "5")) / 1000
+TOP_ALLOCATIONS = 25
+
+_enabled = os.environ.get("UCL_PROFILE", "").lower() in ('1', 'true', 'yes')
+_active_lock = threading.Lock()
+_active = None
+
+def enable():
+    """Turn profiling on for the rest of the process (the --profile flag)"""
+    global _enabled
+    _enabled = True
+
+def enabled():
+    return _enabled
+
+def stage(name):
+    """Profile a block as `name`; free when profiling is off"""
+    global _active
+    if not _enabled:
+        return contextlib.nullcontext()
+    with _active_lock:
+        if _active:
+            return contextlib.nullcontext()
+        _active = name
+    return _profile(name)
+
+class StackSampler:
+    """Samples every thread's Python stack at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread.ident:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                key = ';'.join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+def _write(name, body):
+    """Write one profile file and return its location"""
+    key = PROFILE_PREFIX.format(run_id=instrumentation.RUN_ID) + name
+    local_dir = os.environ.get("UCL_PROFILE_DIR") or os.environ.get("UCL_METRICS_DIR")
+    if local_dir:
+        path = os.path.join(local_dir, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return path
+    instrumentation.boto3.client('s3').put_object(Bucket=instrumentation.S3_BUCKET_NAME, Key=key, Body=body)
+    return f"s3://{instrumentation.S3_BUCKET_NAME}/{key}"
+
+def allocation_report(snapshot, limit=TOP_ALLOCATIONS):
+    stats = snapshot.statistics('lineno')
+    total = sum(stat.size for stat in stats)
+    lines = [f"Top {limit} allocation sites still held at stage end, {total / 1024:.1f} KiB in total"]
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}")
+    return '\n'.join(lines) + '\n'
+
+@contextlib.contextmanager
+def _profile(name):
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    global _active
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    sampler = StackSampler()
+    sampler.start()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+        _active = None
+
+        # Profiling must never fail the stage it observes
+        try:
+            filename = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+            stats = pstats.Stats(profiler, stream=io.StringIO())
+            location = _write(f"{filename}.pstats", _marshal_stats(stats))
+            _write(f"{filename}.collapsed.txt", sampler.collapsed().encode('utf-8'))
+            _write(f"{filename}.allocations.txt", allocation_report(snapshot).encode('utf-8'))
+            print(f"✓ Profiled {name}: {elapsed:.2f}s, peak {peak / 1024 / 1024:.1f} MiB traced -> "
+                  f"{location.rsplit('.', 1)[0]}.*")
+        except Exception as e:
+            print(f"✗ Could not write profile for {name}: {e}")
+
+def _marshal_stats(stats):
+    """The bytes pstats.Stats.dump_stats would write"""
+    import marshal
+    return marshal.dumps(stats.stats)
@@ -0,0 +1,344 @@
+"""
+Champions League Match Tracker - Read-Only Query Service
+
+Serves standings, fixtures and results from memory so the front end does not
+wait on Athena. fact_matches, fact_standings and dim_teams are loaded from
+the processed Parquet (s3://ucl-lake-2025/processed/<table>/) or from a
+local directory, and indexed by competition season, team and date.
+
+Endpoints (all GET, JSON):
+    /table?season=2025[&competition=ucl]
+    /fixtures?[team=<id>][&season=2025][&competition=ucl][&date=YYYY-MM-DD][&limit=N]
+    /results?[team=<id>][&season=2025][&competition=ucl][&date=YYYY-MM-DD][&limit=N]
+    /teams/<team_id>
+    /health
+
+Responses are kept in an LRU cache keyed by the request path and query.
+A watcher polls the snapshot (object ETags locally: mtimes and sizes) every
+--reload-interval seconds; when it changes the tables are reloaded into a
+new store, which replaces the old store and its cache in one assignment.
+Requests in flight finish against the snapshot they started with, and a
+snapshot that fails to load leaves the current one serving.
+
+Usage:
+    python -m scripts.query_service --port 8080
+    python -m scripts.query_service --data-dir local_tables
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from scripts import competitions, lake_io
+
+TABLES = ['fact_matches', 'fact_standings', 'dim_teams']
+TABLE_PREFIX = "processed/{table}/"
+
+CACHE_SIZE = int(os.environ.get("UCL_QUERY_CACHE_SIZE", "4096"))
+RELOAD_INTERVAL = 30
+DEFAULT_LIMIT = 50
+
+MATCH_FIELDS = ['match_id', 'match_datetime', 'match_date', 'completed', 'match_status', 'home_team_id',
+                'home_score', 'away_team_id', 'away_score', 'match_name', 'venue', 'season_year']
+STANDING_FIELDS = ['position', 'team_id', 'team_name', 'team_abbrev', 'points', 'games_played', 'wins',
+                   'draws', 'losses', 'goals_for', 'goals_against', 'goal_difference']
+TEAM_COLUMNS = [f'{side}_team_{field}' for side in ('home', 'away') for field in ('name', 'abbrev', 'logo')]
+TEAM_FIELDS = ['team_id', 'team_name', 'team_abbr', 'team_short_name', 'team_logo_url']
+
+def table_prefix(table, data_dir=None):
+    """Prefix of a table in the lake, or under data_dir (lake layout or local_engine --output-dir)"""
+    prefix = TABLE_PREFIX.format(table=table)
+    if data_dir and not os.path.isdir(os.path.join(data_dir, prefix)):
+        return f"{table}/"
+    return prefix
+
+def _data_keys(prefix, data_dir=None):
+    # Athena CTAS output has no file extension; skip markers and metadata
+    return [key for key in lake_io.list_keys(prefix, data_dir)
+            if not os.path.basename(key).startswith(('_', '.')) and not key.endswith(('.metadata', '.csv'))]
+
+def snapshot_version(data_dir=None):
+    """Fingerprint of the current snapshot of every table"""
+    version = []
+    for table in TABLES:
+        prefix = table_prefix(table, data_dir)
+        if data_dir:
+            for key in _data_keys(prefix, data_dir):
+                stat = os.stat(os.path.join(data_dir, key))
+                version.append((key, stat.st_size, stat.st_mtime_ns))
+            continue
+        for page in lake_io.s3_client.get_paginator('list_objects_v2').paginate(
+                Bucket=lake_io.S3_BUCKET_NAME, Prefix=prefix):
+            version.extend((obj['Key'], obj['ETag']) for obj in page.get('Contents', []))
+    return tuple(sorted(version))
+
+def read_table(table, data_dir=None):
+    frames = [pd.read_parquet(io.BytesIO(lake_io.read_bytes(key, data_dir)))
+              for key in _data_keys(table_prefix(table, data_dir), data_dir)]
+    if not frames:
+        raise FileNotFoundError(f"No Parquet files for {table} under {table_prefix(table, data_dir)}")
+    return pd.concat(frames, ignore_index=True)
+
+def _records(frame, fields):
+    """JSON-ready dicts: NaN/NaT -> None, numpy scalars -> Python, timestamps -> ISO strings"""
+    frame = frame.reindex(columns=fields)
+    for column in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = frame[column].map(lambda value: value.isoformat() if pd.notna(value) else None)
+    frame = frame.astype(object)
+    frame = frame.where(frame.notna(), None)
+    return [{key: value.item() if hasattr(value, 'item') else value for key, value in row.items()}
+            for row in frame.to_dict('records')]
+
+class MatchStore:
+    """One immutable snapshot of the tables and their indexes"""
+
+    def __init__(self, matches, standings, teams, version=None):
+        self.version = version
+        self.loaded_at = time.time()
+        self.teams = {team['team_id']: team for team in _records(teams.drop_duplicates('team_id', keep='last'),
+                                                                  TEAM_FIELDS)}
+        # dim_teams is scraped from raw fragments and can miss teams the standings name
+        for row in standings.drop_duplicates('team_id', keep='last').itertuples():
+            if row.team_id not in self.teams:
+                self.teams[row.team_id] = dict(dict.fromkeys(TEAM_FIELDS), team_id=row.team_id,
+                                               team_name=row.team_name, team_abbr=row.team_abbrev)
+
+        matches = matches.assign(competition=matches['match_short_name'].map(competitions.code_for_short_name),
+                                 season_year=matches['season_year'].astype('Int32'))
+        matches = matches.sort_values(['match_datetime', 'match_id'], kind='stable', na_position='last')
+        self.matches = _records(matches, MATCH_FIELDS + ['competition'] + TEAM_COLUMNS)
+        self.matches_by_season = {}
+        self.matches_by_team = {}
+        self.matches_by_date = {}
+        for index, match in enumerate(self.matches):
+            match['home_team'] = self._team_summary(match, 'home')
+            match['away_team'] = self._team_summary(match, 'away')
+            self.matches_by_season.setdefault((match['competition'], match['season_year']), []).append(index)
+            self.matches_by_team.setdefault(match['home_team_id'], []).append(index)
+            self.matches_by_team.setdefault(match['away_team_id'], []).append(index)
+            self.matches_by_date.setdefault(match['match_date'], []).append(index)
+
+        # fact_standings names each table after the competition (group_name = match_name)
+        codes = {entry['name']: code for code, entry in competitions.registry().items()}
+        standings = standings.assign(competition=standings['group_name'].map(codes).fillna(standings['group_name']))
+        standings = standings.sort_values(['competition', 'season_year', 'position'], kind='stable')
+        self.standings = {}
+        for (competition, season), rows in standings.groupby(['competition', 'season_year'], sort=False):
+            self.standings[(competition, int(season))] = _records(rows, STANDING_FIELDS)
+
+    @classmethod
+    def load(cls, data_dir=None):
+        version = snapshot_version(data_dir)
+        frames = [read_table(table, data_dir) for table in TABLES]
+        return cls(*frames, version=version)
+
+    def _team_summary(self, match, side):
+        """Team details written at extraction, else dim_teams' (popped from the match row)"""
+        team_id = match[f'{side}_team_id']
+        team = self.teams.get(team_id) or {}
+        return {'id': team_id,
+                'name': match.pop(f'{side}_team_name') or team.get('team_name'),
+                'abbrev': match.pop(f'{side}_team_abbrev') or team.get('team_abbr'),
+                'logo': match.pop(f'{side}_team_logo') or team.get('team_logo_url')}
+
+    def table(self, season, competition=competitions.DEFAULT_COMPETITIONS):
+        return self.standings.get((competition, season))
+
+    def matches_for(self, completed, team=None, season=None, competition=None, date=None, limit=DEFAULT_LIMIT):
+        """Fixtures (completed=False, soonest first) or results (completed=True, latest first)"""
+        candidates = []
+        if team is not None:
+            candidates.append(self.matches_by_team.get(team, []))
+        if date is not None:
+            candidates.append(self.matches_by_date.get(date, []))
+        if season is not None:
+            if competition is not None:
+                candidates.append(self.matches_by_season.get((competition, season), []))
+            else:
+                candidates.append([i for (_, year), rows in self.matches_by_season.items()
+                                   if year == season for i in rows])
+        # Scan the narrowest index, filter by the rest
+        indexes = min(candidates, key=len) if candidates else range(len(self.matches))
+        selected = []
+        for index in (reversed(indexes) if completed else indexes):
+            match = self.matches[index]
+            if (match['completed'] != completed
+                    or (team is not None and team not in (match['home_team_id'], match['away_team_id']))
+                    or (date is not None and match['match_date'] != date)
+                    or (season is not None and match['season_year'] != season)
+                    or (competition is not None and match['competition'] != competition)):
+                continue
+            selected.append(match)
+            if len(selected) >= limit:
+                break
+        return selected
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            response = self.entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key, response):
+        with self._lock:
+            self.entries[key] = response
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+class QueryService:
+    def __init__(self, data_dir=None, cache_size=CACHE_SIZE):
+        self.data_dir = data_dir
+        self.cache_size = cache_size
+        self._snapshot = (MatchStore.load(data_dir), ResponseCache(cache_size))
+
+    @property
+    def store(self):
+        return self._snapshot[0]
+
+    def reload_if_changed(self):
+        """Swap in a new snapshot if one has landed. Returns True if it reloaded."""
+        if snapshot_version(self.data_dir) == self.store.version:
+            return False
+        store = MatchStore.load(self.data_dir)
+        self._snapshot = (store, ResponseCache(self.cache_size))
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.reload_if_changed():
+                        print(f"✓ Reloaded snapshot: {len(self.store.matches)} matches, "
+                              f"{len(self.store.standings)} standings tables")
+                except Exception as e:
+                    print(f"✗ Reload failed, still serving the previous snapshot: {e}")
+        threading.Thread(target=run, name='snapshot-watcher', daemon=True).start()
+
+    def handle(self, target):
+        """(status, JSON body) for a request target such as '/table?season=2025'"""
+        store, cache = self._snapshot
+        response = cache.get(target)
+        if response is not None:
+            return response
+        response = self._respond(store, cache, target)
+        if response[0] == 200 and not target.startswith('/health'):
+            cache.put(target, response)
+        return response
+
+    def _respond(self, store, cache, target):
+        url = urlparse(target)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/')
+        try:
+            season = int(params['season']) if 'season' in params else None
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return _json(400, {'error': "season and limit must be integers"})
+        competition = params.get('competition')
+
+        if path == '/table':
+            if season is None:
+                return _json(400, {'error': "season is required"})
+            rows = store.table(season, competition or competitions.DEFAULT_COMPETITIONS)
+            if rows is None:
+                return _json(404, {'error': f"No standings for {competition or 'ucl'} {season}"})
+            return _json(200, {'season': season, 'competition': competition or 'ucl', 'standings': rows})
+        if path in ('/fixtures', '/results'):
+            matches = store.matches_for(path == '/results', params.get('team'), season, competition,
+                                        params.get('date'), limit)
+            return _json(200, {'count': len(matches), 'matches': matches})
+        if path.startswith('/teams/'):
+            team = store.teams.get(path.split('/', 2)[2])
+            return _json(200, team) if team else _json(404, {'error': "Unknown team"})
+        if path == '/health':
+            return _json(200, {'matches': len(store.matches), 'standings_tables': len(store.standings),
+                               'teams': len(store.teams), 'loaded_at': store.loaded_at,
+                               'cache': {'entries': len(cache.entries), 'hits': cache.hits, 'misses': cache.misses}})
+        return _json(404, {'error': f"Unknown endpoint {url.path}"})
+
+def _json(status, payload):
+    return status, json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; don't let Nagle hold the body back for a delayed ACK
+    disable_nagle_algorithm = True
+    service = None
+
+    def do_GET(self):
+        status, body = self.service.handle(self.path)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(service, host='127.0.0.1', port=0):
+    """Serve on a background thread. Returns (server, base_url)."""
+    handler = type('Handler', (QueryHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve standings, fixtures and results from memory")
+    parser.add_argument('--data-dir', help="Local lake or local_engine output directory (default: S3)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="LRU response cache entries")
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL,
+                        help="Seconds between snapshot checks (0 disables reloading)")
+    args = parser.parse_args(argv)
+
+    try:
+        started = time.perf_counter()
+        service = QueryService(args.data_dir, args.cache_size)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}")
+        return 1
+    store = service.store
+    print(f"✓ Loaded {len(store.matches)} matches, {len(store.standings)} standings tables and "
+          f"{len(store.teams)} teams in {time.perf_counter() - started:.2f}s")
+
+    if args.reload_interval > 0:
+        service.watch(args.reload_interval)
+    server, base_url = start_server(service, args.host, args.port)
+    print(f"Serving at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Champions League Match Tracker - Content-Addressed Raw Snapshots
+
+Ingestion overwrites raw/<entity>/competition=<code>/season=YYYY/*.json on
+every run. To keep the history without storing identical closed-season
+payloads again and again, each payload is also stored once by content:
+
+    raw/_objects/sha256/<2 hex>/<sha256>.json   payload bytes, written only if new
+
+and the ingestion summary step records the state of the raw zone after the
+run as a snapshot manifest:
+
+    raw/_snapshots/<run_id>.json   {"run_id", "parent", "generated_at",
+                                    "objects": {raw_key: [sha256, size]}}
+    raw/_snapshots/latest.json     {"run_id": <newest snapshot>}
+
+A snapshot is complete on its own: keys the run did not fetch are carried
+over from its parent. Storage grows with the number of distinct payloads,
+plus one small manifest per run.
+
+Usage:
+    python -m scripts.raw_snapshots list
+    python -m scripts.raw_snapshots diff <run_id> [<other_run_id>]    # default: against its parent
+    python -m scripts.raw_snapshots restore <run_id> --output-dir snapshot   # local copy of raw/
+    python -m scripts.raw_snapshots restore <run_id> --in-place              # rewrite raw/ in S3
+    python -m scripts.raw_snapshots seed                                     # snapshot the current raw/
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+from scripts import instrumentation
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+OBJECT_KEY = "raw/_objects/sha256/{prefix}/{digest}.json"
+SNAPSHOT_PREFIX = "raw/_snapshots/"
+SNAPSHOT_KEY = SNAPSHOT_PREFIX + "{run_id}.json"
+LATEST_KEY = SNAPSHOT_PREFIX + "latest.json"
+
+# Payload objects, as opposed to pipeline bookkeeping under raw/_*/ and top-level summaries
+RAW_DATA_KEY = re.compile(r'^raw/[^_/][^/]*/competition=[^/]+/season=\d{4}/[^/]+\.json$')
+
+s3_client = boto3.client('s3', region_name='ap-southeast-1')
+
+def object_key(digest):
+    return OBJECT_KEY.format(prefix=digest[:2], digest=digest)
+
+def store(body, digest=None):
+    """Store a payload by content unless it is already stored. Returns its sha256."""
+    digest = digest or hashlib.sha256(body).hexdigest()
+    key = object_key(digest)
+    try:
+        s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=key)
+        instrumentation.count("snapshots.objects_deduplicated")
+        return digest
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+    s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=body, ContentType='application/json')
+    instrumentation.count("snapshots.objects_stored")
+    instrumentation.count("snapshots.bytes_stored", len(body))
+    return digest
+
+def _read_json(key):
+    try:
+        return json.loads(s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)['Body'].read())
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+def _write_json(data, key):
+    s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, ContentType='application/json',
+                         Body=json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+def latest_run_id():
+    pointer = _read_json(LATEST_KEY)
+    return pointer and pointer['run_id']
+
+def load_snapshot(run_id):
+    snapshot = _read_json(SNAPSHOT_KEY.format(run_id=run_id))
+    if snapshot is None:
+        raise ValueError(f"No snapshot for run {run_id!r} under s3://{S3_BUCKET_NAME}/{SNAPSHOT_PREFIX}")
+    return snapshot
+
+def write_snapshot(entries, run_id):
+    """
+    Record the raw zone after a run: the parent snapshot's objects overlaid
+    with this run's manifest entries ({key, sha256, size}). Returns the snapshot.
+    """
+    parent = latest_run_id()
+    if parent == run_id:
+        # Re-running the summary step for the same run rebuilds on the same parent
+        parent = load_snapshot(run_id).get('parent')
+    parent_objects = load_snapshot(parent)['objects'] if parent else {}
+    objects = dict(parent_objects)
+    for entry in entries:
+        objects[entry['key']] = [entry['sha256'], entry['size']]
+
+    snapshot = {
+        "run_id": run_id,
+        "parent": parent,
+        "generated_at": datetime.now().isoformat(),
+        "objects": dict(sorted(objects.items())),
+    }
+    _write_json(snapshot, SNAPSHOT_KEY.format(run_id=run_id))
+    _write_json({"run_id": run_id}, LATEST_KEY)
+    added, changed, _ = diff(parent_objects, objects)
+    print(f"✓ Snapshot {run_id}: {len(objects)} objects ({len(added)} new, {len(changed)} changed) "
+          f"-> s3://{S3_BUCKET_NAME}/{SNAPSHOT_KEY.format(run_id=run_id)}")
+    return snapshot
+
+def list_snapshots():
+    snapshots = []
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix=SNAPSHOT_PREFIX):
+        for obj in page.get('Contents', []):
+            if obj['Key'] != LATEST_KEY:
+                snapshots.append((obj['LastModified'], obj['Key'][len(SNAPSHOT_PREFIX):-len('.json')]))
+    return [run_id for _, run_id in sorted(snapshots)]
+
+def diff(old_objects, new_objects):
+    """(added, changed, removed) raw keys between two snapshots' objects"""
+    added = sorted(key for key in new_objects if key not in old_objects)
+    changed = sorted(key for key in new_objects if key in old_objects and new_objects[key][0] != old_objects[key][0])
+    removed = sorted(key for key in old_objects if key not in new_objects)
+    return added, changed, removed
+
+def restore(run_id, output_dir=None, workers=8):
+    """Write every object of a snapshot to output_dir/<raw key>, or back to its raw key in S3"""
+    objects = load_snapshot(run_id)['objects']
+
+    def restore_one(item):
+        key, (digest, _) = item
+        body = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=object_key(digest))['Body'].read()
+        if output_dir:
+            path = os.path.join(output_dir, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(body)
+        else:
+            s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=key, Body=body, ContentType='application/json',
+                                 Metadata={'normalized': 'true'})
+        return len(body)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        total = sum(pool.map(restore_one, objects.items()))
+    return len(objects), total
+
+def seed(run_id, workers=8):
+    """Snapshot the raw zone as it is now, e.g. before the first snapshotting run"""
+    keys = []
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=S3_BUCKET_NAME, Prefix='raw/'):
+        keys.extend(obj['Key'] for obj in page.get('Contents', []) if RAW_DATA_KEY.match(obj['Key']))
+
+    def seed_one(key):
+        body = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=key)['Body'].read()
+        return {"key": key, "sha256": store(body), "size": len(body)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = list(pool.map(seed_one, keys))
+    return write_snapshot(entries, run_id)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, diff and restore content-addressed raw snapshots")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List snapshots, oldest first")
+    diff_parser = commands.add_parser('diff', help="Keys added, changed or removed between two snapshots")
+    diff_parser.add_argument('run_id')
+    diff_parser.add_argument('other_run_id', nargs='?', help="Default: compare run_id with its parent")
+    restore_parser = commands.add_parser('restore', help="Rebuild the raw zone of a snapshot")
+    restore_parser.add_argument('run_id')
+    target = restore_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output-dir', help="Write raw/... under this local directory")
+    target.add_argument('--in-place', action='store_true', help="Overwrite raw/ in S3")
+    seed_parser = commands.add_parser('seed', help="Snapshot the current raw/ zone")
+    seed_parser.add_argument('--run-id', default=instrumentation.RUN_ID)
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        latest = latest_run_id()
+        for run_id in list_snapshots():
+            snapshot = load_snapshot(run_id)
+            marker = ' (latest)' if run_id == latest else ''
+            print(f"{run_id}{marker}: {len(snapshot['objects'])} objects, parent {snapshot['parent']}")
+        return 0
+
+    if args.command == 'diff':
+        new = load_snapshot(args.other_run_id or args.run_id)
+        old_id = args.run_id if args.other_run_id else new['parent']
+        old_objects = load_snapshot(old_id)['objects'] if old_id else {}
+        added, changed, removed = diff(old_objects, new['objects'])
+        print(f"=== {old_id} -> {new['run_id']}: {len(added)} added, {len(changed)} changed, {len(removed)} removed ===")
+        for label, keys in (('+', added), ('~', changed), ('-', removed)):
+            for key in keys:
+                print(f"  {label} {key}")
+        return 0
+
+    if args.command == 'restore':
+        count, total = restore(args.run_id, args.output_dir)
+        location = args.output_dir or f"s3://{S3_BUCKET_NAME}/"
+        print(f"✓ Restored {count} objects ({total / 1024 / 1024:.1f} MiB) of {args.run_id} -> {location}")
+        return 0
+
+    snapshot = seed(args.run_id)
+    instrumentation.flush("raw_snapshots")
+    return 0 if snapshot['objects'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Champions League Match Tracker - Standings Reconciliation
+
+Compares the official standings (scripts/official_standings.py) with
+standings computed from real_matches.csv, per (competition, season, team),
+and flags
+every field that differs.
+
+Only the matches an official table covers are counted: matches between
+two teams of the same group, capped at each team's official games played
+(so knockout ties that follow the group or league phase are left out).
+Teams without games played fall back to the date the last team of the
+competition's season completed its phase.
+
+Output: s3://ucl-lake-2025/processed/standings_reconciliation/reconciliation.parquet
+"""
+
+import argparse
+import io
+import sys
+
+import numpy as np
+import pandas as pd
+
+from scripts import lake_io
+from scripts.match_features import team_rows
+from scripts.official_standings import STANDINGS_KEY
+
+RECONCILIATION_KEY = "processed/standings_reconciliation/reconciliation.parquet"
+
+COMPARED_FIELDS = ['games_played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points']
+
+def phase_matches(official, matches):
+    """Team rows of the matches covered by the official tables"""
+    rows = team_rows(matches)
+    groups = official[['competition', 'season_year', 'team_id', 'group_name', 'games_played']].astype(
+        {'season_year': 'int32'})
+    rows = rows.merge(groups, on=['competition', 'season_year', 'team_id'])
+    opponents = groups.rename(columns={'team_id': 'opponent_id', 'group_name': 'opponent_group'})
+    rows = rows.merge(opponents[['competition', 'season_year', 'opponent_id', 'opponent_group']],
+                      on=['competition', 'season_year', 'opponent_id'])
+    rows = rows[rows['group_name'] == rows['opponent_group']].sort_values(['team_id', 'kickoff'], kind='stable')
+
+    played = rows.groupby(['competition', 'season_year', 'team_id'], sort=False).cumcount() + 1
+    games_played = rows['games_played'].astype('Float64')
+
+    # The phase ends on the date the slowest team played its last official game
+    cutoff = rows[played == games_played].groupby(['competition', 'season_year'])['kickoff'].max()
+    cutoff = rows[['competition', 'season_year']].join(cutoff.rename('cutoff'), on=['competition', 'season_year'])['cutoff']
+    within_phase = cutoff.isna() | (rows['kickoff'] <= cutoff)
+    return rows[(played <= games_played).fillna(within_phase).astype(bool)]
+
+def computed_standings(rows):
+    rows = rows.assign(draw=(rows['goals_for'] == rows['goals_against']).astype('int64'),
+                       loss=(rows['goals_for'] < rows['goals_against']).astype('int64'))
+    return rows.groupby(['competition', 'season_year', 'team_id'], sort=True).agg(
+        games_played=('match_id', 'size'),
+        wins=('win', 'sum'),
+        draws=('draw', 'sum'),
+        losses=('loss', 'sum'),
+        goals_for=('goals_for', 'sum'),
+        goals_against=('goals_against', 'sum'),
+        points=('points', 'sum'),
+    ).reset_index()
+
+def reconcile(official, matches):
+    """One row per (competition, season, team) with official_*/computed_* fields, the differing fields and a status"""
+    official = official.astype({'season_year': 'int32'})
+    computed = computed_standings(phase_matches(official, matches))
+
+    merged = official[['competition', 'season_year', 'team_id', 'team_name', 'phase', 'group_name',
+                       *COMPARED_FIELDS]].merge(computed, on=['competition', 'season_year', 'team_id'], how='outer',
+                                                suffixes=('_official', '_computed'), indicator=True)
+    for field in COMPARED_FIELDS:
+        merged[f'{field}_computed'] = merged[f'{field}_computed'].astype('Int32')
+
+    differs = pd.DataFrame({
+        field: merged[f'{field}_official'].astype('Float64').ne(merged[f'{field}_computed'].astype('Float64'))
+                                          .fillna(True)
+        for field in COMPARED_FIELDS
+    })
+    names = np.array(COMPARED_FIELDS, dtype=object)
+    merged['differences'] = [','.join(names[row]) for row in differs.to_numpy(dtype=bool)]
+    merged['status'] = np.select(
+        [merged['_merge'] == 'left_only', merged['_merge'] == 'right_only', differs.any(axis=1)],
+        ['missing_computed', 'missing_official', 'mismatch'], 'match')
+    merged.loc[merged['status'].str.startswith('missing'), 'differences'] = ''
+    return merged.drop(columns='_merge').sort_values(
+        ['competition', 'season_year', 'group_name', 'team_id']).reset_index(drop=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile official standings with standings computed from matches")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output-dir', help="Local lake directory (default: S3)")
+    parser.add_argument('--fail-on-mismatch', action='store_true', help="Exit non-zero if any row differs")
+    args = parser.parse_args(argv)
+
+    body = lake_io.read_bytes(STANDINGS_KEY, args.output_dir)
+    if body is None:
+        print(f"ERROR: No official standings at {STANDINGS_KEY}; run scripts.official_standings first")
+        return 1
+    official = pd.read_parquet(io.BytesIO(body))
+    matches = lake_io.completed_matches(lake_io.read_matches(args.input))
+
+    print("=== Reconciling official and computed standings ===")
+    result = reconcile(official, matches)
+    location = lake_io.write_parquet(result, RECONCILIATION_KEY, args.output_dir)
+
+    counts = result['status'].value_counts().to_dict()
+    print(f"✓ {len(result)} rows -> {location}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    mismatches = result[result['status'] != 'match']
+    for row in mismatches.head(20).itertuples():
+        detail = f" ({row.differences})" if row.differences else ""
+        group = row.group_name if isinstance(row.group_name, str) else '-'
+        print(f"  ✗ {row.competition} {row.season_year} {group} team {row.team_id}: {row.status}{detail}")
+    if len(mismatches) > 20:
+        print(f"  ... and {len(mismatches) - 20} more")
+
+    return 1 if args.fail_on_mismatch and len(mismatches) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+-- SCD2 player/team history written by scripts/player_history.py, one row per version of a player in a competition
+-- current.parquet is rewritten and closed-<run_id>.parquet parts are appended, so this is an external table
+
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.dim_player_team_bridge (
+    player_id STRING,
+    competition STRING,
+    team_id STRING,
+    player_name STRING,
+    position STRING,
+    position_abbr STRING,
+    jersey_number STRING,
+    first_season INT,
+    last_season INT,
+    row_hash STRING,
+    valid_from TIMESTAMP,
+    valid_to TIMESTAMP,
+    is_current BOOLEAN
+)
+STORED AS PARQUET
+LOCATION 's3://ucl-lake-2025/processed/dim_player_team_bridge/'
@@ -15,13 +15,20 @@ SELECT
     CAST(match_status AS VARCHAR) as match_status,
     CAST(match_status AS VARCHAR) as match_status_detail,
     CAST(home_team_id AS VARCHAR) as home_team_id,
-    CAST(TRY(CAST(home_score AS INTEGER)) AS INTEGER) as home_score,
+    CAST(TRY(CAST(NULLIF(home_score, '') AS INTEGER)) AS INTEGER) as home_score,
     CAST(away_team_id AS VARCHAR) as away_team_id,
-    CAST(TRY(CAST(away_score AS INTEGER)) AS INTEGER) as away_score,
+    CAST(TRY(CAST(NULLIF(away_score, '') AS INTEGER)) AS INTEGER) as away_score,
     CAST(match_name AS VARCHAR) as match_name,
     CAST(match_short_name AS VARCHAR) as match_short_name,
     CAST(venue AS VARCHAR) as venue,
-    CAST(TRY(CAST(season_year AS INTEGER)) AS INTEGER) as season_year
+    CAST(TRY(CAST(season_year AS INTEGER)) AS INTEGER) as season_year,
+    -- Team details written at extraction; NULL for rows extracted before they existed
+    CAST(NULLIF(home_team_name, '') AS VARCHAR) as home_team_name,
+    CAST(NULLIF(home_team_abbrev, '') AS VARCHAR) as home_team_abbrev,
+    CAST(NULLIF(home_team_logo, '') AS VARCHAR) as home_team_logo,
+    CAST(NULLIF(away_team_name, '') AS VARCHAR) as away_team_name,
+    CAST(NULLIF(away_team_abbrev, '') AS VARCHAR) as away_team_abbrev,
+    CAST(NULLIF(away_team_logo, '') AS VARCHAR) as away_team_logo
 FROM ucl_analytics_db.real_matches_csv
 WHERE match_id IS NOT NULL
   AND match_id != ''
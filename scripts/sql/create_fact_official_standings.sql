@@ -0,0 +1,23 @@
+-- Official group / league-phase tables parsed by scripts/official_standings.py
+-- Unlike fact_standings (computed from matches, one table per season) this keeps the real groups
+
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.fact_official_standings (
+    competition STRING,
+    season_year INT,
+    phase STRING,
+    group_name STRING,
+    position INT,
+    team_id STRING,
+    team_name STRING,
+    team_abbrev STRING,
+    games_played INT,
+    wins INT,
+    draws INT,
+    losses INT,
+    goals_for INT,
+    goals_against INT,
+    goal_difference INT,
+    points INT
+)
+STORED AS PARQUET
+LOCATION 's3://ucl-lake-2025/processed/official_standings/'
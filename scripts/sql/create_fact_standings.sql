@@ -12,28 +12,44 @@ WITH completed_matches AS (
         match_date,
         CASE WHEN completed = 'True' THEN true ELSE false END as completed,
         home_team_id,
-        TRY(CAST(home_score AS INTEGER)) as home_score,
+        TRY(CAST(NULLIF(home_score, '') AS INTEGER)) as home_score,
         away_team_id,
-        TRY(CAST(away_score AS INTEGER)) as away_score,
-        TRY(CAST(season_year AS INTEGER)) as season_year
+        TRY(CAST(NULLIF(away_score, '') AS INTEGER)) as away_score,
+        TRY(CAST(season_year AS INTEGER)) as season_year,
+        match_name,
+        NULLIF(home_team_name, '') as home_team_name,
+        NULLIF(home_team_abbrev, '') as home_team_abbrev,
+        NULLIF(away_team_name, '') as away_team_name,
+        NULLIF(away_team_abbrev, '') as away_team_abbrev
     FROM ucl_analytics_db.real_matches_for_standings
     WHERE completed = 'True'
       AND home_score IS NOT NULL
       AND away_score IS NOT NULL
-      AND TRY(CAST(home_score AS INTEGER)) IS NOT NULL
-      AND TRY(CAST(away_score AS INTEGER)) IS NOT NULL
+      AND TRY(CAST(NULLIF(home_score, '') AS INTEGER)) IS NOT NULL
+      AND TRY(CAST(NULLIF(away_score, '') AS INTEGER)) IS NOT NULL
 ),
--- Get all teams from matches
+-- Get all teams from matches, per competition, with the names written at extraction
 all_teams AS (
-    SELECT DISTINCT home_team_id as team_id, season_year FROM completed_matches
-    UNION
-    SELECT DISTINCT away_team_id as team_id, season_year FROM completed_matches
+    SELECT team_id, season_year, match_name, MAX(team_name) as team_name, MAX(team_abbrev) as team_abbrev
+    FROM (
+        SELECT home_team_id as team_id, season_year, match_name,
+               home_team_name as team_name, home_team_abbrev as team_abbrev
+        FROM completed_matches
+        UNION ALL
+        SELECT away_team_id as team_id, season_year, match_name,
+               away_team_name as team_name, away_team_abbrev as team_abbrev
+        FROM completed_matches
+    ) sides
+    GROUP BY team_id, season_year, match_name
 ),
 -- Calculate team statistics
 team_stats AS (
     SELECT 
         at.season_year,
+        at.match_name,
         at.team_id,
+        at.team_name,
+        at.team_abbrev,
         -- Games played
         COUNT(cm.match_id) as games_played,
         -- Wins, draws, losses
@@ -68,17 +84,18 @@ team_stats AS (
     LEFT JOIN completed_matches cm ON 
         (cm.home_team_id = at.team_id OR cm.away_team_id = at.team_id)
         AND cm.season_year = at.season_year
-    GROUP BY at.season_year, at.team_id
+        AND cm.match_name = at.match_name
+    GROUP BY at.season_year, at.match_name, at.team_id, at.team_name, at.team_abbrev
 ),
 -- Add team names and calculate final standings
 final_standings AS (
     SELECT 
         ts.team_id,
-        COALESCE(dt.team_name, 'Team ' || ts.team_id) as team_name,
-        COALESCE(dt.team_abbr, 'T' || ts.team_id) as team_abbrev,
-        'Champions League' as group_name,
+        COALESCE(ts.team_name, 'Team ' || ts.team_id) as team_name,
+        COALESCE(ts.team_abbrev, 'T' || ts.team_id) as team_abbrev,
+        ts.match_name as group_name,
         ROW_NUMBER() OVER (
-            PARTITION BY ts.season_year 
+            PARTITION BY ts.season_year, ts.match_name 
             ORDER BY ts.points DESC, (ts.goals_for - ts.goals_against) DESC, ts.goals_for DESC
         ) as position,
         ts.points,
@@ -91,7 +108,6 @@ final_standings AS (
         (ts.goals_for - ts.goals_against) as goal_difference,
         ts.season_year
     FROM team_stats ts
-    LEFT JOIN ucl_analytics_db.dim_teams dt ON ts.team_id = dt.team_id AND ts.season_year = dt.season_year
     WHERE ts.games_played > 0
 )
 SELECT 
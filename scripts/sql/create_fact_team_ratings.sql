@@ -0,0 +1,16 @@
+-- Elo ratings written by scripts/team_ratings.py, one row per team per rated match
+-- The Parquet parts are appended incrementally, so this is an external table, not a CTAS
+
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.fact_team_ratings (
+    rating_date DATE,
+    season_year INT,
+    match_id STRING,
+    team_id STRING,
+    opponent_id STRING,
+    is_home BOOLEAN,
+    rating_before DOUBLE,
+    rating_change DOUBLE,
+    rating_after DOUBLE
+)
+STORED AS PARQUET
+LOCATION 's3://ucl-lake-2025/processed/fact_team_ratings/'
@@ -0,0 +1,22 @@
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.raw (
+    col0 string
+)
+PARTITIONED BY (
+    partition_0 string,
+    competition string,
+    year string
+)
+STORED AS INPUTFORMAT 'org.apache.hadoop.mapred.TextInputFormat'
+OUTPUTFORMAT 'org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat'
+LOCATION 's3://ucl-lake-2025/raw/'
+TBLPROPERTIES (
+    'projection.enabled' = 'true',
+    'projection.partition_0.type' = 'enum',
+    'projection.partition_0.values' = 'teams,schedules,standings,team_rosters',
+    'projection.competition.type' = 'enum',
+    'projection.competition.values' = '${competitions}',
+    'projection.year.type' = 'integer',
+    'projection.year.range' = '${season_range}',
+    'projection.year.digits' = '4',
+    'storage.location.template' = 's3://ucl-lake-2025/raw/${partition_0}/competition=${competition}/season=${year}/'
+)
@@ -0,0 +1,29 @@
+-- Official vs computed standings per (competition, season, team), written by scripts/reconcile_standings.py
+-- status: match, mismatch, missing_computed, missing_official; differences lists the fields that differ
+
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.standings_reconciliation (
+    competition STRING,
+    season_year INT,
+    team_id STRING,
+    team_name STRING,
+    phase STRING,
+    group_name STRING,
+    games_played_official INT,
+    wins_official INT,
+    draws_official INT,
+    losses_official INT,
+    goals_for_official INT,
+    goals_against_official INT,
+    points_official INT,
+    games_played_computed INT,
+    wins_computed INT,
+    draws_computed INT,
+    losses_computed INT,
+    goals_for_computed INT,
+    goals_against_computed INT,
+    points_computed INT,
+    differences STRING,
+    status STRING
+)
+STORED AS PARQUET
+LOCATION 's3://ucl-lake-2025/processed/standings_reconciliation/'
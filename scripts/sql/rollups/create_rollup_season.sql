@@ -0,0 +1,17 @@
+-- Per-season rollup written by scripts/match_rollups.py (rebuilt every run)
+
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.rollup_season (
+    competition STRING,
+    season_year INT,
+    matches BIGINT,
+    home_wins BIGINT,
+    draws BIGINT,
+    away_wins BIGINT,
+    home_goals BIGINT,
+    away_goals BIGINT,
+    goals BIGINT,
+    goals_per_match DOUBLE,
+    home_win_rate DOUBLE
+)
+STORED AS PARQUET
+LOCATION 's3://ucl-lake-2025/processed/rollups/season/'
@@ -0,0 +1,20 @@
+-- Per season, team and home/away rollup written by scripts/match_rollups.py (rebuilt every run)
+
+CREATE EXTERNAL TABLE IF NOT EXISTS ucl_analytics_db.rollup_season_team_home_away (
+    competition STRING,
+    season_year INT,
+    team_id STRING,
+    home_away STRING,
+    matches BIGINT,
+    wins BIGINT,
+    draws BIGINT,
+    losses BIGINT,
+    goals_for BIGINT,
+    goals_against BIGINT,
+    points BIGINT,
+    goal_difference BIGINT,
+    win_rate DOUBLE,
+    points_per_match DOUBLE
+)
+STORED AS PARQUET
+LOCATION 's3://ucl-lake-2025/processed/rollups/season_team_home_away/'
@@ -0,0 +1,32 @@
+WITH data_summary AS (
+    SELECT 
+        partition_0,
+        year,
+        COUNT(*) as record_count,
+        AVG(LENGTH(col0)) as avg_json_length,
+        MIN(LENGTH(col0)) as min_json_length,
+        MAX(LENGTH(col0)) as max_json_length,
+        'summary' as query_type
+    FROM ucl_analytics_db.raw
+    WHERE year IN ('2024', '2025')
+    GROUP BY partition_0, year
+),
+sample_data AS (
+    SELECT 
+        partition_0,
+        year,
+        1 as record_count,
+        LENGTH(col0) as avg_json_length,
+        LENGTH(col0) as min_json_length,
+        LENGTH(col0) as max_json_length,
+        'sample' as query_type
+    FROM ucl_analytics_db.raw
+    WHERE year IN ('2024', '2025')
+      AND col0 IS NOT NULL
+      AND LENGTH(col0) > 10
+    LIMIT 5
+)
+SELECT * FROM data_summary
+UNION ALL
+SELECT * FROM sample_data
+ORDER BY query_type, partition_0, year
@@ -0,0 +1,201 @@
+"""
+Champions League Match Tracker - Team History Index
+
+Precomputed head-to-head and team record index over the extracted matches
+of every competition (real_matches.csv), so questions like "all meetings between 83 and 131" or
+"1068's home record since 2015" are dictionary lookups instead of scans of
+fact_matches.
+
+Entries are keyed by:
+- pairs: unordered team pair "low|high" (team ids sorted), oriented from
+  the first team in the key
+- teams: "team|home|season" and "team|away|season"
+
+Each entry holds the match ids plus running W/D/L and goal aggregates over
+completed matches. The index also keeps the compact row it applied for
+every match, so a refresh only touches new or changed matches (e.g. a
+score correction is un-applied and re-applied).
+
+Output: s3://ucl-lake-2025/processed/team_history/team_history.json.gz
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+from datetime import datetime, timezone
+
+import boto3
+
+from scripts import lake_io
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+INDEX_KEY = "processed/team_history/team_history.json.gz"
+
+INDEX_VERSION = 1
+
+def _empty_entry():
+    return {'match_ids': [], 'played': 0, 'wins': 0, 'draws': 0, 'losses': 0,
+            'goals_for': 0, 'goals_against': 0}
+
+def new_index():
+    return {'version': INDEX_VERSION, 'built_at': None, 'seasons': [],
+            'matches': {}, 'pairs': {}, 'teams': {}}
+
+def _team_sort_key(team_id):
+    return (0, int(team_id), '') if team_id.isdigit() else (1, 0, team_id)
+
+def pair_key(team_a, team_b):
+    low, high = sorted((str(team_a), str(team_b)), key=_team_sort_key)
+    return f"{low}|{high}"
+
+def team_key(team_id, venue, season):
+    return f"{team_id}|{venue}|{season}"
+
+def match_row(row):
+    """Compact [home, away, home_score, away_score, season, completed] for a CSV row, or None"""
+    home, away = str(row.get('home_team_id') or ''), str(row.get('away_team_id') or '')
+    if not home or not away:
+        return None
+    completed = str(row.get('completed')) == 'True'
+    try:
+        home_score, away_score = int(row['home_score']), int(row['away_score'])
+    except (KeyError, TypeError, ValueError):
+        home_score = away_score = None
+        completed = False
+    return [home, away, home_score, away_score, int(row['season_year']), completed]
+
+def _update(entry, match_id, goals_for, goals_against, completed, sign):
+    if sign > 0:
+        entry['match_ids'].append(match_id)
+    else:
+        entry['match_ids'].remove(match_id)
+    if not completed:
+        return
+    entry['played'] += sign
+    entry['goals_for'] += sign * goals_for
+    entry['goals_against'] += sign * goals_against
+    if goals_for > goals_against:
+        entry['wins'] += sign
+    elif goals_for < goals_against:
+        entry['losses'] += sign
+    else:
+        entry['draws'] += sign
+
+def _apply(index, match_id, row, sign):
+    home, away, home_score, away_score, season, completed = row
+    key = pair_key(home, away)
+    pair = index['pairs'].setdefault(key, _empty_entry())
+    if key.startswith(f"{home}|"):
+        _update(pair, match_id, home_score, away_score, completed, sign)
+    else:
+        _update(pair, match_id, away_score, home_score, completed, sign)
+
+    for team, venue, goals_for, goals_against in ((home, 'home', home_score, away_score),
+                                                  (away, 'away', away_score, home_score)):
+        entry = index['teams'].setdefault(team_key(team, venue, season), _empty_entry())
+        _update(entry, match_id, goals_for, goals_against, completed, sign)
+
+def refresh_index(index, rows):
+    """Apply new or changed matches to the index in place. Returns (added, changed)."""
+    added = changed = 0
+    for csv_row in rows:
+        row = match_row(csv_row)
+        if row is None:
+            continue
+        match_id = str(csv_row['match_id'])
+        previous = index['matches'].get(match_id)
+        if previous == row:
+            continue
+        if previous is None:
+            added += 1
+        else:
+            _apply(index, match_id, previous, -1)
+            changed += 1
+        _apply(index, match_id, row, 1)
+        index['matches'][match_id] = row
+        if row[4] not in index['seasons']:
+            bisect.insort(index['seasons'], row[4])
+
+    index['built_at'] = datetime.now(timezone.utc).isoformat()
+    return added, changed
+
+def head_to_head(index, team_a, team_b):
+    """All meetings between two teams, oriented from team_a"""
+    key = pair_key(team_a, team_b)
+    entry = index['pairs'].get(key)
+    if entry is None:
+        return _empty_entry()
+    if key.startswith(f"{team_a}|"):
+        return entry
+    return dict(entry, wins=entry['losses'], losses=entry['wins'],
+                goals_for=entry['goals_against'], goals_against=entry['goals_for'])
+
+def team_record(index, team_id, venue=None, since=None, until=None):
+    """A team's record, optionally limited to 'home'/'away' and a season range"""
+    venues = [venue] if venue else ['home', 'away']
+    record = _empty_entry()
+    for season in index['seasons']:
+        if (since and season < since) or (until and season > until):
+            continue
+        for v in venues:
+            entry = index['teams'].get(team_key(team_id, v, season))
+            if entry is None:
+                continue
+            record['match_ids'].extend(entry['match_ids'])
+            for field in ('played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against'):
+                record[field] += entry[field]
+    return record
+
+def dumps(index):
+    return gzip.compress(json.dumps(index, separators=(',', ':')).encode('utf-8'))
+
+def loads(body):
+    index = json.loads(gzip.decompress(body))
+    if index.get('version') != INDEX_VERSION:
+        print(f"Index version {index.get('version')} != {INDEX_VERSION}, rebuilding")
+        return new_index()
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or refresh the head-to-head / team history index")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output', help="Local index path (default: read and write the index in S3)")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the existing index")
+    args = parser.parse_args(argv)
+
+    s3 = boto3.client('s3', region_name='ap-southeast-1')
+
+    rows = lake_io.read_match_rows(args.input)
+
+    index = new_index()
+    if not args.rebuild:
+        try:
+            if args.output:
+                with open(args.output, 'rb') as f:
+                    index = loads(f.read())
+            else:
+                index = loads(s3.get_object(Bucket=S3_BUCKET_NAME, Key=INDEX_KEY)['Body'].read())
+        except (FileNotFoundError, s3.exceptions.NoSuchKey):
+            print("No existing index, building from scratch")
+
+    added, changed = refresh_index(index, rows)
+    print(f"Indexed {len(index['matches'])} matches ({added} new, {changed} changed): "
+          f"{len(index['pairs'])} team pairs, {len(index['teams'])} team/venue/season entries")
+
+    if not added and not changed and not args.rebuild:
+        print("✓ Index already up to date")
+        return
+
+    body = dumps(index)
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(body)
+        print(f"Index saved to {args.output} ({len(body)} bytes)")
+    else:
+        s3.put_object(Bucket=S3_BUCKET_NAME, Key=INDEX_KEY, Body=body,
+                      ContentType='application/json', ContentEncoding='gzip')
+        print(f"Uploaded to s3://{S3_BUCKET_NAME}/{INDEX_KEY} ({len(body)} bytes)")
+
+if __name__ == "__main__":
+    main()
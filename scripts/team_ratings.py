@@ -0,0 +1,153 @@
+"""
+Champions League Match Tracker - Team Ratings (Elo)
+
+Rates every team from the completed matches in real_matches.csv, oldest
+first, with a home advantage and a goal-difference multiplier (World
+Football Elo style):
+
+    expected_home = 1 / (1 + 10 ** ((away - home - HOME_ADVANTAGE) / 400))
+    change        = K * goal_weight * (result - expected_home)
+
+All matches on one date are rated in a single array update against the
+ratings from before that date, so the Python loop runs once per matchday
+rather than once per match.
+
+Runs are incremental: the state file keeps the current ratings, the last
+rated date and a fingerprint of the matches rated so far. Only matches
+after that date are rated and appended as a new Parquet part; if already
+rated history changed (late result, correction) the table is rebuilt.
+
+Output: s3://ucl-lake-2025/processed/fact_team_ratings/part-<first>_<last>.parquet
+State:  s3://ucl-lake-2025/processed/team_ratings_state/state.json
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from scripts import lake_io
+
+TABLE_PREFIX = "processed/fact_team_ratings/"
+PART_KEY = TABLE_PREFIX + "part-{first}_{last}.parquet"
+STATE_KEY = "processed/team_ratings_state/state.json"
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0
+
+RATED_FIELDS = ['match_id', 'match_date', 'home_team_id', 'away_team_id', 'home_score', 'away_score']
+
+def goal_weight(goal_difference):
+    """1 for a one-goal margin or draw, 1.5 for two goals, (11 + gd) / 8 beyond"""
+    gd = np.abs(goal_difference)
+    return np.where(gd <= 1, 1.0, np.where(gd == 2, 1.5, (11.0 + gd) / 8.0))
+
+def rate_matches(matches, ratings=None, k=K_FACTOR, home_advantage=HOME_ADVANTAGE, goal_weighting=True):
+    """
+    Rate completed matches (sorted by date) starting from `ratings` ({team_id: rating}).
+    Returns (rows, ratings): one row per team per match, and the updated ratings.
+    """
+    ratings = dict(ratings or {})
+    teams = pd.Index(sorted(set(ratings) | set(matches['home_team_id']) | set(matches['away_team_id'])))
+    current = np.array([ratings.get(team, INITIAL_RATING) for team in teams], dtype=float)
+
+    home = teams.get_indexer(matches['home_team_id'])
+    away = teams.get_indexer(matches['away_team_id'])
+    home_goals = matches['home_score'].to_numpy(dtype=float)
+    away_goals = matches['away_score'].to_numpy(dtype=float)
+    result = np.sign(home_goals - away_goals) * 0.5 + 0.5
+    weight = goal_weight(home_goals - away_goals) if goal_weighting else np.ones(len(matches))
+
+    home_before = np.empty(len(matches))
+    away_before = np.empty(len(matches))
+    change = np.empty(len(matches))
+
+    dates = matches['match_date'].to_numpy()
+    boundaries = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+    for day in np.split(np.arange(len(matches)), boundaries):
+        if not len(day):
+            continue
+        h, a = home[day], away[day]
+        home_before[day], away_before[day] = current[h], current[a]
+        expected = 1.0 / (1.0 + 10.0 ** ((current[a] - current[h] - home_advantage) / 400.0))
+        change[day] = k * weight[day] * (result[day] - expected)
+        np.add.at(current, h, change[day])
+        np.add.at(current, a, -change[day])
+
+    base = {
+        'rating_date': pd.to_datetime(matches['match_date']).dt.date,
+        'season_year': matches['season_year'].astype('int32'),
+        'match_id': matches['match_id'],
+    }
+    home_rows = pd.DataFrame(dict(base, team_id=matches['home_team_id'], opponent_id=matches['away_team_id'],
+                                  is_home=True, rating_before=home_before, rating_change=change,
+                                  rating_after=home_before + change))
+    away_rows = pd.DataFrame(dict(base, team_id=matches['away_team_id'], opponent_id=matches['home_team_id'],
+                                  is_home=False, rating_before=away_before, rating_change=-change,
+                                  rating_after=away_before - change))
+    rows = pd.concat([home_rows, away_rows], ignore_index=True).sort_values(
+        ['rating_date', 'match_id', 'is_home'], ascending=[True, True, False], kind='stable')
+    for column in ('rating_before', 'rating_change', 'rating_after'):
+        rows[column] = rows[column].round(2)
+
+    return rows.reset_index(drop=True), dict(zip(teams, current.round(4).tolist()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate teams (Elo) from real_matches.csv into fact_team_ratings")
+    parser.add_argument('--input', help="Local CSV path (default: read the CSV from S3)")
+    parser.add_argument('--output-dir', help="Local lake directory (default: write to S3)")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the state and rate all matches")
+    parser.add_argument('--k', type=float, default=K_FACTOR)
+    parser.add_argument('--home-advantage', type=float, default=HOME_ADVANTAGE)
+    parser.add_argument('--no-goal-weighting', action='store_true')
+    args = parser.parse_args(argv)
+
+    params = {'k': args.k, 'home_advantage': args.home_advantage, 'goal_weighting': not args.no_goal_weighting}
+    matches = lake_io.completed_matches(lake_io.read_matches(args.input))
+    print(f"=== Rating teams from {len(matches)} completed matches ===")
+
+    state = None if args.rebuild else lake_io.read_json(STATE_KEY, args.output_dir)
+    if state and state['params'] != params:
+        print("Rating parameters changed, rebuilding")
+        state = None
+    if state:
+        rated = matches[matches['match_date'] <= state['last_date']]
+        if lake_io.fingerprint(rated, RATED_FIELDS) != state['history_hash']:
+            print(f"Matches on or before {state['last_date']} changed, rebuilding")
+            state = None
+
+    if state:
+        new = matches[matches['match_date'] > state['last_date']]
+        if new.empty:
+            print(f"✓ Ratings up to date through {state['last_date']}")
+            return
+        rows, ratings = rate_matches(new, state['ratings'], **params)
+    else:
+        deleted = lake_io.delete_prefix(TABLE_PREFIX, args.output_dir)
+        if deleted:
+            print(f"Removed {deleted} existing parts")
+        new = matches
+        rows, ratings = rate_matches(new, **params)
+
+    if rows.empty:
+        print("No completed matches to rate")
+        return
+
+    first, last = new['match_date'].iloc[0], new['match_date'].iloc[-1]
+    location = lake_io.write_parquet(rows, PART_KEY.format(first=first, last=last), args.output_dir)
+    print(f"✓ Rated {len(new)} matches from {first} to {last} ({len(rows)} rows) -> {location}")
+
+    lake_io.write_json({
+        'params': params,
+        'last_date': last,
+        'history_hash': lake_io.fingerprint(matches[matches['match_date'] <= last], RATED_FIELDS),
+        'matches_rated': (state['matches_rated'] if state else 0) + len(new),
+        'ratings': ratings,
+    }, STATE_KEY, args.output_dir)
+
+    top = sorted(ratings.items(), key=lambda item: -item[1])[:5]
+    print("Top ratings: " + ", ".join(f"{team} {rating:.0f}" for team, rating in top))
+
+if __name__ == "__main__":
+    main()
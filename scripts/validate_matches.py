@@ -0,0 +1,191 @@
+"""
+Champions League Match Tracker - Pre-Flight Match Validation
+
+Checks every competition's extracted real_matches.csv between extraction
+and the Athena table builds, so bad input fails the run before any query
+is paid for. Each check is one vectorized pass over the CSV:
+
+    error    header           columns are not the extracted columns (older, shorter headers pass)
+    error    field_count      a line has a different number of delimiters than the header; Athena's
+                              LazySimpleSerDe ignores quotes, so a quoted comma shifts the row
+    error    id_type          match_id / home_team_id / away_team_id empty or not numeric
+    error    score_type       a score that is neither empty nor an integer
+    error    completed_type   completed is not True/False
+    error    season_type      season_year is not one of the competition's seasons
+    error    duplicate_match  a match_id appears more than once
+    error    missing_score    a completed match without both scores
+    error    season_coverage  a season with fewer matches than the registry's min_season_matches
+                              (the latest season only needs one: it may have just started)
+    warning  season_shrunk    a past season has fewer matches than in the last passing report
+
+Report: s3://ucl-lake-2025/processed/quality/match_validation.json
+(status, per-check failure counts with a few sample rows, matches per season).
+Exits non-zero when any error check fails.
+"""
+
+import argparse
+import io
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from extract_real_matches import CSV_COLUMNS
+from scripts import competitions, instrumentation, lake_io
+
+REPORT_KEY = "processed/quality/match_validation.json"
+
+# Columns every CSV must have; the team columns were added later and Athena reads them as NULL when absent
+REQUIRED_COLUMNS = CSV_COLUMNS[:CSV_COLUMNS.index('season_year') + 1]
+ID_COLUMNS = ['match_id', 'home_team_id', 'away_team_id']
+SCORE_COLUMNS = ['home_score', 'away_score']
+SAMPLES = 5
+
+CHECKS = {
+    'header': 'error',
+    'field_count': 'error',
+    'id_type': 'error',
+    'score_type': 'error',
+    'completed_type': 'error',
+    'season_type': 'error',
+    'duplicate_match': 'error',
+    'missing_score': 'error',
+    'season_coverage': 'error',
+    'season_shrunk': 'warning',
+}
+
+class Report:
+    def __init__(self):
+        self.checks = {name: {'severity': severity, 'failed': 0, 'samples': []} for name, severity in CHECKS.items()}
+
+    def add(self, name, failed, samples):
+        check = self.checks[name]
+        check['failed'] += int(failed)
+        check['samples'].extend(samples[:SAMPLES - len(check['samples'])])
+
+    def add_rows(self, name, mask, frame, label):
+        """Record the rows selected by a boolean mask, sampling their match ids"""
+        if mask.any():
+            ids = frame.loc[mask, 'match_id'].head(SAMPLES)
+            self.add(name, mask.sum(), [f"{label} match {match_id}" for match_id in ids])
+
+    def failed(self, severity='error'):
+        return [name for name, check in self.checks.items() if check['failed'] and check['severity'] == severity]
+
+def check_csv(body, label, report):
+    """Run the per-file checks on one CSV. Returns its rows (all strings) for the coverage checks."""
+    lines = pd.Series(body.splitlines(), dtype=object)
+    lines = lines[lines.str.strip() != '']
+    header = lines.iloc[0].split(',') if len(lines) else []
+    if header != CSV_COLUMNS[:len(header)] or len(header) < len(REQUIRED_COLUMNS):
+        report.add('header', 1, [f"{label}: {','.join(header)[:120]}"])
+        return None
+
+    # What Athena sees: raw delimiters per line, quotes or not
+    delimiters = lines.iloc[1:].str.count(',')
+    shifted = delimiters != len(header) - 1
+    if shifted.any():
+        samples = lines.iloc[1:][shifted].head(SAMPLES)
+        report.add('field_count', shifted.sum(), [f"{label} line {index + 1}: {line[:100]}"
+                                                  for index, line in samples.items()])
+
+    frame = pd.read_csv(io.StringIO(body), dtype=str, keep_default_na=False, on_bad_lines='skip')
+    for column in ID_COLUMNS:
+        report.add_rows('id_type', ~frame[column].str.fullmatch(r'\d+'), frame, f"{label} {column}")
+    for column in SCORE_COLUMNS:
+        report.add_rows('score_type', (frame[column] != '') & ~frame[column].str.fullmatch(r'-?\d+'), frame, label)
+    report.add_rows('completed_type', ~frame['completed'].isin(['True', 'False']), frame, label)
+    report.add_rows('duplicate_match', frame['match_id'].duplicated(keep='first'), frame, label)
+    completed = frame['completed'] == 'True'
+    report.add_rows('missing_score', completed & ((frame['home_score'] == '') | (frame['away_score'] == '')),
+                    frame, label)
+    return frame
+
+def check_seasons(frame, codes, previous, report):
+    """Season type and coverage checks across all competitions. Returns {code: {season: matches}}."""
+    frame = frame.assign(competition=frame['match_short_name'].map(competitions.code_for_short_name))
+    season = pd.to_numeric(frame['season_year'], errors='coerce')
+    valid = pd.Series(False, index=frame.index)
+    for code in frame['competition'].unique():
+        rows = frame['competition'] == code
+        valid |= rows & season.isin(competitions.seasons(code) if code in competitions.registry() else [])
+    report.add_rows('season_type', ~valid, frame, 'season_year')
+
+    counts = frame[valid].groupby(['competition', 'season_year']).size()
+    season_counts = {}
+    for code in codes:
+        seasons = competitions.seasons(code)
+        minimum = competitions.get(code).get('min_season_matches', 1)
+        season_counts[code] = {str(year): int(counts.get((code, str(year)), 0)) for year in seasons}
+        for year, matches in season_counts[code].items():
+            required = 1 if int(year) == seasons[-1] else minimum
+            if matches < required:
+                report.add('season_coverage', 1, [f"{code} {year}: {matches} matches, expected at least {required}"])
+            before = (previous or {}).get(code, {}).get(year)
+            if int(year) != seasons[-1] and before and matches < before:
+                report.add('season_shrunk', 1, [f"{code} {year}: {matches} matches, {before} in the last passing run"])
+    return season_counts
+
+def validate(bodies, codes, previous=None):
+    """Validate {label: csv text}. Returns the report dict."""
+    started = time.perf_counter()
+    report = Report()
+    frames = [check_csv(body, label, report) for label, body in bodies.items()]
+    frames = [frame for frame in frames if frame is not None]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REQUIRED_COLUMNS)
+    season_counts = check_seasons(frame, codes, previous, report)
+
+    errors = report.failed('error')
+    # A failed run's counts are not a baseline for the next one
+    baseline = season_counts if not errors else previous or {}
+    return {
+        'run_id': instrumentation.RUN_ID,
+        'generated_at': datetime.now().isoformat(),
+        'status': 'failed' if errors else 'passed',
+        'errors': errors,
+        'warnings': report.failed('warning'),
+        'rows': len(frame),
+        'seconds': round(time.perf_counter() - started, 3),
+        'checks': report.checks,
+        'season_counts': season_counts,
+        'baseline_counts': baseline,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate extracted matches before the Athena builds")
+    parser.add_argument('--input', help="Local CSV path (default: every competition's CSV in S3)")
+    parser.add_argument('--competition', type=competitions.parse_codes,
+                        help="Comma-separated competition codes (default: UCL_COMPETITIONS)")
+    parser.add_argument('--output-dir', help="Local lake directory for the report (default: S3)")
+    parser.add_argument('--warn-only', action='store_true', help="Report errors without failing")
+    args = parser.parse_args(argv)
+    codes = args.competition or competitions.active_codes()
+
+    print("=== Validating extracted matches ===")
+    if args.input:
+        with open(args.input, encoding='utf-8') as f:
+            bodies = {args.input: f.read()}
+    else:
+        bodies = {}
+        for code in codes:
+            body = lake_io.read_bytes(competitions.matches_key(code))
+            if body is not None:
+                bodies[code] = body.decode('utf-8')
+
+    previous = lake_io.read_json(REPORT_KEY, args.output_dir)
+    result = validate(bodies, codes, previous and previous.get('baseline_counts'))
+    location = lake_io.write_json(result, REPORT_KEY, args.output_dir)
+
+    for name, check in result['checks'].items():
+        if check['failed']:
+            mark = '✗' if check['severity'] == 'error' else '!'
+            print(f"  {mark} {name}: {check['failed']}")
+            for sample in check['samples']:
+                print(f"      {sample}")
+    print(f"{'✓' if result['status'] == 'passed' else '✗'} {result['rows']} matches {result['status']} "
+          f"validation in {result['seconds']:.2f}s -> {location}")
+    return 0 if result['status'] == 'passed' or args.warn_only else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
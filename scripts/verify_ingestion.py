@@ -0,0 +1,96 @@
+"""
+Champions League Match Tracker - Raw Zone Verification
+
+Verifies an ingestion run from its manifest instead of listing raw/:
+one GET for raw/_manifests/ingestion_manifest.json, then one HEAD per
+object the run says it wrote. Reports the exact (competition, entity,
+season) combinations that are missing or whose objects do not match.
+
+Exits non-zero when a required entity is missing for any competition and season.
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.exceptions import ClientError
+
+from scripts.ingest_data import MANIFEST_KEY
+
+S3_BUCKET_NAME = "ucl-lake-2025"
+
+# Downstream tables cannot be built without these
+REQUIRED_ENTITIES = {'teams', 'schedules'}
+
+s3_client = boto3.client('s3', region_name='ap-southeast-1')
+
+def check_object(entry):
+    """HEAD one manifest entry. Returns a problem description or None."""
+    try:
+        head = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=entry['key'])
+    except ClientError as e:
+        return f"missing ({e.response['Error']['Code']})"
+    if head['ContentLength'] != entry['size']:
+        return f"size {head['ContentLength']} != manifest {entry['size']}"
+    return None
+
+def verify(manifest, workers=8):
+    """Returns (problems, counts): problems is a list of {competition, entity, season, reason}"""
+    problems = [dict(unit, reason='not ingested') for unit in manifest['missing']]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(check_object, manifest['objects'])
+        for entry, problem in zip(manifest['objects'], results):
+            if problem:
+                problems.append({'competition': entry['competition'], 'entity': entry['entity'],
+                                 'season': entry['season'], 'key': entry['key'], 'reason': problem})
+
+    counts = {}
+    for entry in manifest['objects']:
+        counts[entry['entity']] = counts.get(entry['entity'], 0) + 1
+    return problems, counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the raw zone against the ingestion manifest")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent HEAD requests")
+    args = parser.parse_args(argv)
+
+    print("=== Verifying raw zone from ingestion manifest ===")
+    try:
+        obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=MANIFEST_KEY)
+    except ClientError as e:
+        print(f"ERROR: No ingestion manifest at s3://{S3_BUCKET_NAME}/{MANIFEST_KEY}: {e}")
+        return 1
+    manifest = json.loads(obj['Body'].read())
+
+    print(f"Run: {manifest['run_id']} ({manifest['generated_at']}), "
+          f"competitions: {', '.join(manifest['competitions'])}")
+    problems, counts = verify(manifest, workers=args.workers)
+
+    print("\nObjects by entity:")
+    for entity in manifest['entities']:
+        print(f"  {entity}: {counts.get(entity, 0)}")
+
+    if not manifest['objects']:
+        print("ERROR: No data found in manifest. Ingestion failed!")
+        return 1
+
+    if not problems:
+        print("\n✓ All expected objects present")
+        return 0
+
+    print(f"\n{len(problems)} problems:")
+    for problem in sorted(problems, key=lambda p: (p['competition'], p['entity'], p['season'])):
+        print(f"  ✗ {problem['competition']} {problem['entity']} {problem['season']}: {problem['reason']}")
+
+    failed = sorted({(p['competition'], p['entity'], p['season'])
+                     for p in problems if p['entity'] in REQUIRED_ENTITIES})
+    if failed:
+        print(f"ERROR: Required data missing for {failed}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
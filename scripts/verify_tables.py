@@ -0,0 +1,204 @@
+"""
+Champions League Match Tracker - Batched Table Verification
+
+Checks the raw table and the built tables in Athena with one query per
+stage. Each query is started once, polled with a short backoff, and
+written as one structured report:
+
+    --stage raw      one GROUP BY pass over ucl_analytics_db.raw: records, valid JSON,
+                     payload lengths and a sample per (entity, competition, season)
+    --stage tables   one UNION ALL of per-table row counts, distinct keys, missing names
+                     and season range over the built tables, plus their Parquet file
+                     counts and sizes from the S3 listing
+
+Tables that do not exist yet are found from the catalog (no query) and
+reported as missing rather than failing the batched query.
+
+Report: s3://ucl-lake-2025/processed/quality/verification_<stage>.json
+Exits non-zero when the query fails or any problem is found (invalid raw JSON,
+a built table missing or empty), unless --warn-only.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import boto3
+
+from scripts import instrumentation, lake_io
+
+ATHENA_DATABASE = 'ucl_analytics_db'
+ATHENA_OUTPUT_S3 = 's3://ucl-lake-2025/athena-query-results/'
+ATHENA_WORKGROUP = os.environ.get("UCL_ATHENA_WORKGROUP", "primary")
+REPORT_KEY = "processed/quality/verification_{stage}.json"
+QUERY_TIMEOUT = 300
+SAMPLE_LENGTH = 120
+
+# Built tables: (key column, name column) checked for every one of them
+TABLES = {
+    'dim_teams': ('team_id', 'team_name'),
+    'dim_players': ('player_id', 'player_name'),
+    'fact_matches': ('match_id', 'home_team_name'),
+    'fact_standings': ('team_id', 'team_name'),
+}
+
+RAW_QUERY = f"""
+SELECT partition_0 AS entity, competition, year,
+       COUNT(*) AS records,
+       SUM(CASE WHEN try(json_parse(col0)) IS NOT NULL THEN 1 ELSE 0 END) AS valid_json,
+       SUM(CASE WHEN partition_0 = 'teams'
+                 AND json_extract(try(json_parse(col0)), '$.teams') IS NOT NULL THEN 1 ELSE 0 END) AS with_teams,
+       CAST(AVG(LENGTH(col0)) AS BIGINT) AS avg_length,
+       MAX(LENGTH(col0)) AS max_length,
+       ARBITRARY(SUBSTR(col0, 1, {SAMPLE_LENGTH})) AS sample
+FROM {ATHENA_DATABASE}.raw
+GROUP BY partition_0, competition, year
+ORDER BY partition_0, competition, year
+"""
+
+TABLE_QUERY = """SELECT '{table}' AS table_name,
+       COUNT(*) AS row_count,
+       COUNT(DISTINCT {key}) AS distinct_keys,
+       SUM(CASE WHEN {name} IS NULL THEN 1 ELSE 0 END) AS missing_names,
+       MIN(season_year) AS min_season,
+       MAX(season_year) AS max_season
+FROM {database}.{table}"""
+
+athena = boto3.client('athena', region_name='ap-southeast-1')
+
+def run_query(query, label):
+    """Run one Athena query, polling with backoff. Returns (rows as dicts, get_query_execution response)."""
+    query_id = athena.start_query_execution(
+        QueryString=query,
+        QueryExecutionContext={'Database': ATHENA_DATABASE},
+        ResultConfiguration={'OutputLocation': ATHENA_OUTPUT_S3},
+        WorkGroup=ATHENA_WORKGROUP
+    )['QueryExecutionId']
+
+    # Most verification queries finish in a second or two; start polling fast and back off
+    delay, deadline = 0.25, time.monotonic() + QUERY_TIMEOUT
+    while True:
+        execution = athena.get_query_execution(QueryExecutionId=query_id)
+        state = execution['QueryExecution']['Status']['State']
+        if state in ('SUCCEEDED', 'FAILED', 'CANCELLED') or time.monotonic() > deadline:
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, 2)
+    instrumentation.record_athena(execution, label=label)
+    if state != 'SUCCEEDED':
+        reason = execution['QueryExecution']['Status'].get('StateChangeReason', state)
+        raise RuntimeError(f"{label} query {query_id} {state.lower()}: {reason}")
+
+    rows = []
+    for page in athena.get_paginator('get_query_results').paginate(QueryExecutionId=query_id):
+        rows.extend([column.get('VarCharValue') for column in row['Data']] for row in page['ResultSet']['Rows'])
+    header, rows = (rows[0], rows[1:]) if rows else ([], [])
+    return [dict(zip(header, row)) for row in rows], execution
+
+def existing_tables():
+    """Table names in the database, from the catalog rather than a query"""
+    names = set()
+    for page in athena.get_paginator('list_table_metadata').paginate(CatalogName='AwsDataCatalog',
+                                                                     DatabaseName=ATHENA_DATABASE):
+        names.update(table['Name'] for table in page['TableMetadataList'])
+    return names
+
+def _int(value):
+    return int(value) if value not in (None, '') else None
+
+def query_stats(execution):
+    statistics = execution['QueryExecution'].get('Statistics', {})
+    return {
+        'query_id': execution['QueryExecution']['QueryExecutionId'],
+        'total_ms': statistics.get('TotalExecutionTimeInMillis'),
+        'data_scanned_bytes': statistics.get('DataScannedInBytes'),
+    }
+
+def verify_raw():
+    rows, execution = run_query(RAW_QUERY, 'verify_raw')
+    partitions = []
+    for row in rows:
+        counts = {name: _int(row[name]) for name in ('records', 'valid_json', 'with_teams', 'avg_length', 'max_length')}
+        partitions.append({'entity': row['entity'], 'competition': row['competition'], 'year': row['year'],
+                           **counts, 'sample': row['sample']})
+    problems = [f"{p['entity']}/{p['competition']}/{p['year']}: {p['records'] - p['valid_json']} invalid JSON lines"
+                for p in partitions if p['valid_json'] < p['records']]
+    return {'partitions': partitions, 'problems': problems, 'query': query_stats(execution)}, bool(problems)
+
+def verify_tables():
+    present = existing_tables()
+    missing = [table for table in TABLES if table not in present]
+    checked = [table for table in TABLES if table in present]
+
+    results = {table: {'exists': False} for table in missing}
+    report = {'tables': results, 'problems': [f"{table}: table does not exist" for table in missing]}
+    if checked:
+        query = "\nUNION ALL\n".join(TABLE_QUERY.format(table=table, key=TABLES[table][0], name=TABLES[table][1],
+                                                        database=ATHENA_DATABASE) for table in checked)
+        rows, execution = run_query(query, 'verify_tables')
+        report['query'] = query_stats(execution)
+        for row in rows:
+            table = row.pop('table_name')
+            results[table] = {'exists': True, **{name: _int(value) for name, value in row.items()}}
+            if not results[table]['row_count']:
+                report['problems'].append(f"{table}: no rows")
+
+    # File counts and sizes come from the listing, not from Athena
+    for table in checked:
+        objects = list(_object_sizes(f"processed/{table}/"))
+        results[table].update(files=len(objects), bytes=sum(size for _, size in objects))
+    report['tables'] = {table: results[table] for table in TABLES}
+    return report, bool(report['problems'])
+
+def _object_sizes(prefix):
+    for page in lake_io.s3_client.get_paginator('list_objects_v2').paginate(Bucket=lake_io.S3_BUCKET_NAME,
+                                                                           Prefix=prefix):
+        for obj in page.get('Contents', []):
+            yield obj['Key'], obj['Size']
+
+def print_report(stage, report):
+    if stage == 'raw':
+        print(f"{'entity':<14}{'competition':<13}{'year':<6}{'records':>9}{'valid':>9}{'avg len':>9}")
+        for p in report['partitions']:
+            print(f"{p['entity']:<14}{p['competition']:<13}{p['year']:<6}{p['records']:>9}{p['valid_json']:>9}"
+                  f"{p['avg_length'] or 0:>9}")
+    else:
+        for table, result in report['tables'].items():
+            if not result['exists']:
+                print(f"  {table:<16} missing")
+                continue
+            print(f"  {table:<16} {result['row_count']:>7} rows, {result['distinct_keys']:>7} keys, "
+                  f"{result['missing_names']} without name, seasons {result['min_season']}-{result['max_season']}, "
+                  f"{result['files']} files ({result['bytes'] / 1024:.0f} KiB)")
+    for problem in report['problems']:
+        print(f"  ✗ {problem}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the raw or built Athena tables in one batched query")
+    parser.add_argument('--stage', choices=['raw', 'tables'], required=True)
+    parser.add_argument('--output-dir', help="Local lake directory for the report (default: S3)")
+    parser.add_argument('--warn-only', action='store_true', help="Report problems without failing")
+    args = parser.parse_args(argv)
+
+    print(f"=== Verifying {args.stage} ===")
+    started = time.perf_counter()
+    try:
+        report, failed = verify_raw() if args.stage == 'raw' else verify_tables()
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        instrumentation.flush(f"verify_{args.stage}")
+        return 1
+
+    seconds = round(time.perf_counter() - started, 3)
+    report = {'run_id': instrumentation.RUN_ID, 'generated_at': datetime.now().isoformat(), 'stage': args.stage,
+              'status': 'failed' if failed else 'passed', 'seconds': seconds, **report}
+    location = lake_io.write_json(report, REPORT_KEY.format(stage=args.stage), args.output_dir)
+    print_report(args.stage, report)
+    print(f"{'✗' if failed else '✓'} Verification {report['status']} in {seconds:.2f}s -> {location}")
+    instrumentation.flush(f"verify_{args.stage}")
+    return 1 if failed and not args.warn_only else 0
+
+if __name__ == "__main__":
+    sys.exit(main())